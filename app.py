@@ -1,23 +1,26 @@
 """
 Streamlit UI untuk Video AI Analyzer - Improved Version
-Menggunakan fungsi analyze_video() dari main.py dengan UI yang lebih user-friendly
+Analisis dimasukkan ke antrian job (job_queue.py) dan dijalankan oleh proses worker (worker.py)
 """
 import os
 import sys
 import json
-import io
-import contextlib
+import time
+import subprocess
 from pathlib import Path
 from datetime import datetime
 import streamlit as st
 from dotenv import load_dotenv
 
-# Import fungsi dari main.py
-from main import analyze_video
+# Analisis dijalankan oleh worker.py lewat antrian job
+from job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED, CANCELLED, HEARTBEAT_TIMEOUT
 
 # Load environment variables
 load_dotenv()
 
+# Akhiran file laporan yang sedang di-stream worker (sama dengan main.LIVE_REPORT_SUFFIX)
+LIVE_REPORT_SUFFIX = ".live.txt"
+
 # Konfigurasi halaman
 st.set_page_config(
     page_title="Video AI Analyzer",
@@ -216,60 +219,208 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def capture_output(func, *args, **kwargs):
+@st.cache_resource
+def get_queue():
+    """Antrian job bersama untuk semua sesi Streamlit"""
+    return JobQueue()
+
+
+def ensure_worker(queue):
     """
-    Menangkap output dari fungsi yang menggunakan print() dan sys.exit()
-    Mengembalikan tuple: (output_text, success, error_message)
+    Jalankan proses worker di background jika belum ada worker aktif
+    (untuk deployment satu container; set JOB_WORKERS_AUTOSTART=0 jika worker dijalankan terpisah)
     """
-    output_buffer = io.StringIO()
-    error_buffer = io.StringIO()
-    
-    original_exit = sys.exit
-    exit_called = [False]
-    exit_code = [0]
-    
-    def custom_exit(code=0):
-        exit_called[0] = True
-        exit_code[0] = code
-        raise SystemExit(code)
-    
-    try:
-        sys.exit = custom_exit
-        
-        with contextlib.redirect_stdout(output_buffer), \
-             contextlib.redirect_stderr(error_buffer):
-            try:
-                func(*args, **kwargs)
-                success = True
-                error_message = None
-            except SystemExit:
-                success = False
-                error_message = "Proses dihentikan karena error"
-            except Exception as e:
-                success = False
-                error_message = str(e)
-                import traceback
-                error_buffer.write(traceback.format_exc())
-            finally:
-                sys.exit = original_exit
+    processes = int(os.getenv("JOB_WORKERS_AUTOSTART", "1"))
+    if processes <= 0 or queue.active_workers():
+        return
+    if st.session_state.get("worker_started_at", 0) > time.time() - HEARTBEAT_TIMEOUT:
+        return  # Worker baru dijalankan dan belum sempat mengirim heartbeat
+    subprocess.Popen(
+        [sys.executable, "worker.py", "--processes", str(processes)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    st.session_state["worker_started_at"] = time.time()
+
+
+def read_log_tail(log_path, max_chars=20000):
+    """Baca bagian akhir file log job"""
+    if not log_path or not os.path.exists(log_path):
+        return ""
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        f.seek(max(0, os.path.getsize(log_path) - max_chars))
+        return f.read()
+
+
+def read_live_report(job):
+    """
+    Teks laporan yang sedang di-stream worker: file report_*.live.txt terbaru di folder output
+    job yang ditulis sejak job dimulai. File ini dihapus worker saat laporan selesai/gagal,
+    jadi file yang hilang di tengah jalan diabaikan
+    """
+    log_path = job.get("log_path")
+    if not log_path:
+        return ""
+    started_at = job.get("started_at") or 0
+    candidates = []
+    for path in Path(log_path).parent.glob(f"report_*{LIVE_REPORT_SUFFIX}"):
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        if mtime >= started_at:
+            candidates.append((mtime, path))
+    for _, path in sorted(candidates, reverse=True):
+        try:
+            return path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+    return ""
+
+
+def format_seconds(seconds):
+    """Format durasi detik untuk metrik"""
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.0f} dtk"
+    return f"{seconds / 60:.1f} mnt"
+
+
+def display_report_files(report_files, output_format="all", key_prefix="result"):
+    """Tampilkan file laporan (TXT, PDF, JSON) dengan tombol download dan preview"""
+    tabs = st.tabs(["📝 Text", "📕 PDF", "📊 JSON"])
+    
+    for idx, (format_type, tab) in enumerate(zip(["txt", "pdf", "json"], tabs)):
+        with tab:
+            file_path = report_files.get(format_type)
+            if file_path and file_path.exists():
+                col1, col2 = st.columns([2, 1])
                 
-    except Exception as e:
-        success = False
-        error_message = str(e)
-        sys.exit = original_exit
-    
-    output_text = output_buffer.getvalue()
-    error_text = error_buffer.getvalue()
-    
-    if error_text and not error_message:
-        error_message = error_text
-    
-    if exit_called[0] and exit_code[0] != 0:
-        success = False
-        if not error_message:
-            error_message = f"Proses gagal (exit code: {exit_code[0]})"
-    
-    return output_text, success, error_message
+                with col1:
+                    st.success(f"✅ File {format_type.upper()} berhasil dibuat!")
+                    st.info(f"📄 **{file_path.name}**")
+                    st.caption(f"Ukuran: {file_path.stat().st_size / 1024:.2f} KB")
+                
+                with col2:
+                    with open(file_path, "rb") as f:
+                        st.download_button(
+                            label=f"📥 Download {format_type.upper()}",
+                            data=f.read(),
+                            file_name=file_path.name,
+                            mime="application/pdf" if format_type == "pdf" else "application/octet-stream",
+                            key=f"{key_prefix}_download_{format_type}",
+                            use_container_width=True
+                        )
+                
+                # Preview
+                if format_type == "txt":
+                    with st.expander("👁️ Preview Laporan"):
+                        with open(file_path, "r", encoding="utf-8") as f:
+                            content = f.read()
+                            st.text_area(
+                                "Isi Lengkap",
+                                value=content,
+                                height=400,
+                                disabled=True
+                            )
+                
+                elif format_type == "json":
+                    with st.expander("👁️ Preview Data JSON"):
+                        with open(file_path, "r", encoding="utf-8") as f:
+                            try:
+                                json_data = json.load(f)
+                                st.json(json_data)
+                            except:
+                                st.error("Format JSON tidak valid")
+            else:
+                if output_format == "all" or output_format == format_type:
+                    st.warning(f"⚠️ File {format_type.upper()} tidak ditemukan")
+                else:
+                    st.info(f"ℹ️ Format {format_type.upper()} tidak dipilih")
+
+
+def display_job(queue, job):
+    """Tampilkan status job; halaman di-refresh otomatis selama job belum selesai"""
+    st.markdown("### 📋 Proses Analisis")
+    st.caption(f"Job `{job['id']}` · {job['url']}")
+    
+    status_text = st.empty()
+    
+    if job["status"] == QUEUED:
+        position = queue.position(job["id"])
+        status_text.info(f"⏳ Menunggu di antrian (posisi {position})...")
+        if not queue.active_workers():
+            st.warning("⚠️ Belum ada worker aktif. Jalankan: `python worker.py`")
+    elif job["status"] == RUNNING and job.get("cancel_requested"):
+        status_text.warning("⏹️ Membatalkan analisis...")
+    elif job["status"] == RUNNING:
+        elapsed = time.time() - (job["started_at"] or time.time())
+        status_text.info(f"⚙️ Sedang dianalisis ({format_seconds(elapsed)})...")
+    
+    log_text = read_log_tail(job.get("log_path"))
+    
+    if job["status"] in (QUEUED, RUNNING):
+        if not job.get("cancel_requested") and st.button("⏹️ Batalkan Analisis", key=f"cancel_{job['id']}"):
+            queue.cancel(job["id"])
+            st.rerun()
+        live_report = read_live_report(job) if job["status"] == RUNNING else ""
+        if live_report:
+            # Laporan tampil bertahap selama Groq masih menulis
+            with st.expander("📝 Laporan (live)", expanded=True):
+                st.markdown(live_report)
+        with st.expander("📊 Live Log", expanded=not live_report):
+            st.text_area("Log Proses", value=log_text, height=300, disabled=True)
+        # Polling status: rerun script setelah jeda singkat (lebih sering selama streaming)
+        time.sleep(0.5 if live_report else 2)
+        st.rerun()
+    
+    if job["status"] == DONE:
+        with st.container():
+            display_process_steps(6)
+        
+        status_text.markdown("""
+            <div class="success-box">
+                <h3>✅ Analisis Berhasil Diselesaikan!</h3>
+                <p>Laporan telah berhasil dibuat dan siap diunduh.</p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        with st.expander("📊 Log Proses", expanded=False):
+            st.text_area("Log Proses", value=log_text, height=200, disabled=True)
+        
+        # Tampilkan file hasil
+        st.markdown("---")
+        st.markdown("## 📁 Hasil Analisis")
+        files = (job["result"] or {}).get("files", {})
+        report_files = {format_type: Path(path) for format_type, path in files.items()}
+        display_report_files(report_files, job["options"].get("output_format", "all"),
+                             key_prefix=f"job_{job['id']}")
+        
+        # Confetti hanya sekali per job
+        if not st.session_state.get(f"celebrated_{job['id']}"):
+            st.session_state[f"celebrated_{job['id']}"] = True
+            st.balloons()
+    
+    elif job["status"] == CANCELLED:
+        status_text.warning(f"⏹️ Analisis dibatalkan: {job['error'] or '-'}")
+        st.caption("Hasil stage yang sudah selesai tersimpan; analisis ulang URL yang sama akan melanjutkannya.")
+        if log_text:
+            with st.expander("📊 Log Proses", expanded=False):
+                st.text_area("Log Proses", value=log_text, height=200, disabled=True)
+    
+    elif job["status"] == FAILED:
+        status_text.markdown(f"""
+            <div class="error-box">
+                <h3>❌ Analisis Gagal</h3>
+                <p><strong>Error:</strong> {job['error']}</p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        if log_text:
+            st.text_area("Log Error", value=log_text, height=300, disabled=True)
 
 
 def get_latest_report_files():
@@ -284,7 +435,8 @@ def get_latest_report_files():
     }
     
     if os.path.exists(output_dir):
-        for file in sorted(Path(output_dir).glob("report_*"), reverse=True):
+        # Laporan job ada di subfolder output/jobs/<id_job>/, ambil yang paling baru
+        for file in sorted(Path(output_dir).rglob("report_*"), key=lambda f: f.stat().st_mtime, reverse=True):
             ext = file.suffix[1:].lower()
             if ext in files and files[ext] is None:
                 files[ext] = file
@@ -318,6 +470,8 @@ def display_process_steps(current_step=0):
 
 def main():
     """Main Streamlit app"""
+    queue = get_queue()
+    ensure_worker(queue)
     
     # Header
     st.markdown("""
@@ -359,6 +513,15 @@ def main():
             help="Pilih format output yang Anda inginkan"
         )
         
+        # Target waktu: model Whisper dan kerapatan OCR disesuaikan agar selesai tepat waktu
+        target_seconds = st.selectbox(
+            "⏱️ Target Waktu Selesai",
+            options=[None, 300, 900, 1800, 3600],
+            format_func=lambda x: "Tanpa target (akurasi maksimal)" if x is None else f"{x // 60} menit",
+            help="Untuk video panjang, model Whisper yang lebih kecil dan OCR yang lebih jarang "
+                 "dipilih otomatis agar analisis selesai sebelum target"
+        )
+        
         st.markdown("---")
         
         # Fitur dengan expand
@@ -393,6 +556,32 @@ def main():
         else:
             st.error("❌ API Key tidak ditemukan")
             st.info("Set GROQ_API_KEY di file .env")
+        
+        # Metrik antrian job
+        st.markdown("---")
+        st.markdown("### 📈 Antrian Job")
+        metrics = queue.metrics()
+        col1, col2 = st.columns(2)
+        col1.metric("Antrian", metrics["queue_depth"])
+        col2.metric("Berjalan", metrics["running"])
+        col1.metric("Waktu tunggu", format_seconds(metrics["wait_time_avg"]),
+                    help=f"p95: {format_seconds(metrics['wait_time_p95'])}")
+        col2.metric("Waktu proses", format_seconds(metrics["service_time_avg"]),
+                    help=f"p95: {format_seconds(metrics['service_time_p95'])}")
+        st.caption(f"👷 {metrics['workers']} worker aktif")
+    
+    # Tersambung ke job yang sedang/sudah berjalan (ID dari URL, tetap ada setelah reload)
+    job_id = st.query_params.get("job")
+    if job_id:
+        job = queue.get(job_id)
+        if job:
+            if st.button("🔙 Analisis Baru"):
+                del st.query_params["job"]
+                st.rerun()
+            display_job(queue, job)
+            return
+        st.warning(f"⚠️ Job {job_id} tidak ditemukan")
+        del st.query_params["job"]
     
     # Main content area
     if not video_url:
@@ -426,7 +615,7 @@ def main():
             # Statistik sederhana
             output_dir = os.getenv("OUTPUT_DIR", "output")
             if os.path.exists(output_dir):
-                total_reports = len(list(Path(output_dir).glob("report_*")))
+                total_reports = len(list(Path(output_dir).rglob("report_*.txt")))
                 st.metric("Total Laporan", total_reports)
         
         # Tampilkan laporan terbaru
@@ -504,150 +693,13 @@ def main():
         )
     
     if start_button:
-        # Container untuk hasil
-        result_container = st.container()
-        
-        with result_container:
-            # Display steps
-            st.markdown("### 📋 Proses Analisis")
-            steps_placeholder = st.empty()
-            
-            with steps_placeholder.container():
-                display_process_steps(0)
-            
-            # Progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Log container
-            with st.expander("📊 Live Log", expanded=True):
-                log_placeholder = st.empty()
-            
-            # Simulasi step-by-step (akan diganti dengan real progress)
-            steps_info = [
-                (10, "📥 Mendownload video...", 1),
-                (30, "🎵 Mengekstrak audio...", 2),
-                (50, "🎤 Melakukan transkripsi...", 3),
-                (70, "📸 Mengekstrak teks dari frame...", 4),
-                (90, "🤖 Menghasilkan laporan AI...", 5)
-            ]
-            
-            # Jalankan analisis
-            try:
-                output_text, success, error_message = capture_output(
-                    analyze_video,
-                    video_url,
-                    output_format
-                )
-                
-                progress_bar.progress(100)
-                steps_placeholder.empty()
-                
-                if success:
-                    with steps_placeholder.container():
-                        display_process_steps(6)
-                    
-                    status_text.markdown("""
-                        <div class="success-box">
-                            <h3>✅ Analisis Berhasil Diselesaikan!</h3>
-                            <p>Laporan telah berhasil dibuat dan siap diunduh.</p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Show log
-                    with log_placeholder.container():
-                        st.text_area(
-                            "Log Proses",
-                            value=output_text,
-                            height=200,
-                            disabled=True
-                        )
-                    
-                    # Tampilkan file hasil
-                    st.markdown("---")
-                    st.markdown("## 📁 Hasil Analisis")
-                    
-                    report_files = get_latest_report_files()
-                    
-                    tabs = st.tabs(["📝 Text", "📕 PDF", "📊 JSON"])
-                    
-                    for idx, (format_type, tab) in enumerate(zip(["txt", "pdf", "json"], tabs)):
-                        with tab:
-                            file_path = report_files[format_type]
-                            if file_path and file_path.exists():
-                                col1, col2 = st.columns([2, 1])
-                                
-                                with col1:
-                                    st.success(f"✅ File {format_type.upper()} berhasil dibuat!")
-                                    st.info(f"📄 **{file_path.name}**")
-                                    st.caption(f"Ukuran: {file_path.stat().st_size / 1024:.2f} KB")
-                                
-                                with col2:
-                                    with open(file_path, "rb") as f:
-                                        st.download_button(
-                                            label=f"📥 Download {format_type.upper()}",
-                                            data=f.read(),
-                                            file_name=file_path.name,
-                                            mime="application/pdf" if format_type == "pdf" else "application/octet-stream",
-                                            key=f"result_download_{format_type}",
-                                            use_container_width=True
-                                        )
-                                
-                                # Preview
-                                if format_type == "txt":
-                                    with st.expander("👁️ Preview Laporan"):
-                                        with open(file_path, "r", encoding="utf-8") as f:
-                                            content = f.read()
-                                            st.text_area(
-                                                "Isi Lengkap",
-                                                value=content,
-                                                height=400,
-                                                disabled=True
-                                            )
-                                
-                                elif format_type == "json":
-                                    with st.expander("👁️ Preview Data JSON"):
-                                        with open(file_path, "r", encoding="utf-8") as f:
-                                            try:
-                                                json_data = json.load(f)
-                                                st.json(json_data)
-                                            except:
-                                                st.error("Format JSON tidak valid")
-                            else:
-                                if output_format == "all" or output_format == format_type:
-                                    st.warning(f"⚠️ File {format_type.upper()} tidak ditemukan")
-                                else:
-                                    st.info(f"ℹ️ Format {format_type.upper()} tidak dipilih")
-                    
-                    # Success message dengan confetti
-                    st.balloons()
-                    
-                else:
-                    status_text.markdown(f"""
-                        <div class="error-box">
-                            <h3>❌ Analisis Gagal</h3>
-                            <p><strong>Error:</strong> {error_message}</p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    if output_text:
-                        with log_placeholder.container():
-                            st.text_area(
-                                "Log Error",
-                                value=output_text,
-                                height=300,
-                                disabled=True
-                            )
-            
-            except Exception as e:
-                progress_bar.progress(100)
-                status_text.markdown(f"""
-                    <div class="error-box">
-                        <h3>❌ Terjadi Kesalahan</h3>
-                        <p><strong>Error:</strong> {str(e)}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-                st.exception(e)
+        # Analisis dijalankan worker di proses terpisah; ID job disimpan di URL
+        # agar halaman bisa tersambung lagi ke job setelah reload
+        with st.spinner("🔎 Mengecek durasi video untuk penjadwalan..."):
+            job_id = queue.enqueue(video_url, {"output_format": output_format,
+                                               "target_seconds": target_seconds})
+        st.query_params["job"] = job_id
+        st.rerun()
 
 
 if __name__ == "__main__":
@@ -5,14 +5,20 @@ import os
 import subprocess
 from pathlib import Path
 
+from cancellation import run_process
 
-def extract_audio(video_path: str, output_dir: str = "downloads") -> str:
+
+def extract_audio(video_path: str, output_dir: str = "downloads", start: float = None,
+                  end: float = None, token=None) -> str:
     """
     Ekstrak audio dari video menjadi file WAV menggunakan ffmpeg
     
     Args:
         video_path: Path ke file video
         output_dir: Direktori untuk menyimpan audio
+        start: Detik awal potongan audio (opsional, default: dari awal)
+        end: Detik akhir potongan audio (opsional, default: sampai akhir)
+        token: CancellationToken (opsional); ffmpeg dimatikan saat token dibatalkan
         
     Returns:
         Path ke file audio yang diekstrak
@@ -22,16 +28,24 @@ def extract_audio(video_path: str, output_dir: str = "downloads") -> str:
     
     # Generate nama file audio
     video_name = os.path.splitext(os.path.basename(video_path))[0]
-    audio_path = os.path.join(output_dir, f"{video_name}_audio.wav")
+    if start is None and end is None:
+        audio_path = os.path.join(output_dir, f"{video_name}_audio.wav")
+    else:
+        end_label = f"{end:.0f}" if end is not None else "end"
+        audio_path = os.path.join(output_dir, f"{video_name}_audio_{start or 0:.0f}-{end_label}.wav")
     
     try:
         print(f"🎵 Mengekstrak audio dari video...")
         
         # Gunakan ffmpeg untuk ekstrak audio
         # Format: ffmpeg -i input.mp4 -vn -acodec pcm_s16le -ar 16000 -ac 1 output.wav
-        cmd = [
-            'ffmpeg',
-            '-i', video_path,
+        cmd = ['ffmpeg']
+        if start:
+            cmd += ['-ss', f"{start:.3f}"]  # Seek sebelum -i agar cepat
+        cmd += ['-i', video_path]
+        if end is not None:
+            cmd += ['-t', f"{end - (start or 0):.3f}"]
+        cmd += [
             '-vn',  # No video
             '-acodec', 'pcm_s16le',  # Audio codec
             '-ar', '16000',  # Sample rate 16kHz (optimal untuk Whisper)
@@ -40,12 +54,7 @@ def extract_audio(video_path: str, output_dir: str = "downloads") -> str:
             audio_path
         ]
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        result = run_process(cmd, token)
         
         if os.path.exists(audio_path):
             print(f"✅ Audio berhasil diekstrak: {audio_path}")
@@ -0,0 +1,134 @@
+"""
+Modul mode batch: analisis banyak video dengan worker pool. Model Whisper dan pool OCR
+dipakai bersama oleh semua worker, hasil per video disimpan di direktori masing-masing
+"""
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from checkpoint import job_id_for
+from main import analyze_video
+
+
+def read_urls(stream) -> list:
+    """
+    Baca daftar URL (satu per baris) dari file atau stdin
+
+    Baris kosong dan baris yang diawali '#' dilewati, URL duplikat hanya diambil sekali.
+    """
+    urls = []
+    seen = set()
+    for line in stream:
+        url = line.strip()
+        if not url or url.startswith("#") or url in seen:
+            continue
+        seen.add(url)
+        urls.append(url)
+    return urls
+
+
+def run_batch(urls: list, output_format: str = "all", workers: int = None,
+              output_dir: str = None, resume: bool = True) -> dict:
+    """
+    Analisis banyak video secara paralel
+
+    Args:
+        urls: Daftar URL video
+        output_format: Format output ('txt', 'pdf', 'json', 'all')
+        workers: Jumlah video yang diproses bersamaan (default: BATCH_WORKERS atau 2)
+        output_dir: Direktori induk hasil (default: OUTPUT_DIR atau output). Tiap video
+                    disimpan di <output_dir>/<id_job>/
+        resume: Teruskan ke analyze_video (pakai checkpoint stage yang masih valid)
+
+    Returns:
+        Dict ringkasan: total, succeeded, failed, elapsed, videos_per_hour, summary_path
+    """
+    workers = max(1, workers or int(os.getenv("BATCH_WORKERS", "2")))
+    output_dir = output_dir or os.getenv("OUTPUT_DIR", "output")
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    # Budget CPU dibagi rata antar worker; Tesseract memakai satu pool bersama
+    total_cpus = int(os.getenv("PIPELINE_CPUS", str(os.cpu_count() or 1)))
+    cpus_per_job = max(1, total_cpus // workers)
+    ocr_workers = int(os.getenv("OCR_WORKERS", str(max(1, total_cpus // 3))))
+    ocr_executor = ThreadPoolExecutor(max_workers=ocr_workers, thread_name_prefix="ocr")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    summary_path = os.path.join(output_dir, f"batch_{timestamp}.ndjson")
+    summary_lock = threading.Lock()
+
+    print(f"📦 Mode batch: {len(urls)} video, {workers} worker, "
+          f"{cpus_per_job} core per video, {ocr_workers} worker OCR bersama")
+
+    def process(url: str) -> dict:
+        job_id = job_id_for(url)
+        record = {"url": url, "job_id": job_id, "output_dir": os.path.join(output_dir, job_id)}
+        started = time.time()
+        try:
+            result = analyze_video(url, output_format, resume=resume, output_dir=record["output_dir"],
+                                   cpu_budget=cpus_per_job, ocr_executor=ocr_executor)
+            record.update({
+                "status": "ok",
+                "error": None,
+                "title": result["video_info"].get("title"),
+                "files": result["files"],
+                "speech_segments": result["speech_segments"],
+                "ocr_frames": result["ocr_frames"],
+            })
+        except Exception as e:
+            # Satu video gagal tidak menghentikan batch
+            record.update({"status": "failed", "error": str(e)[:500]})
+        record["elapsed"] = round(time.time() - started, 3)
+
+        # Hasil ditulis segera setelah video selesai, agar ringkasan tetap ada jika batch terhenti
+        with summary_lock:
+            with open(summary_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    started = time.time()
+    records = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job") as executor:
+            futures = [executor.submit(process, url) for url in urls]
+            for future in as_completed(futures):
+                record = future.result()
+                records.append(record)
+                icon = "✅" if record["status"] == "ok" else "❌"
+                print(f"{icon} [{len(records)}/{len(urls)}] {record['url']} "
+                      f"({record['elapsed']:.0f} detik){' - ' + record['error'][:100] if record['error'] else ''}")
+    finally:
+        ocr_executor.shutdown()
+
+    elapsed = time.time() - started
+    succeeded = sum(1 for record in records if record["status"] == "ok")
+    videos_per_hour = succeeded / elapsed * 3600 if elapsed > 0 else 0.0
+
+    print("\n" + "="*60)
+    print("📦 BATCH SELESAI")
+    print("="*60)
+    print(f"   - Berhasil: {succeeded}/{len(urls)}")
+    print(f"   - Gagal: {len(records) - succeeded}")
+    print(f"   - Total waktu: {elapsed:.0f} detik")
+    print(f"   - Throughput: {videos_per_hour:.1f} video/jam")
+    print(f"   - Ringkasan: {summary_path}")
+
+    return {
+        "total": len(urls),
+        "succeeded": succeeded,
+        "failed": len(records) - succeeded,
+        "elapsed": round(elapsed, 3),
+        "videos_per_hour": round(videos_per_hour, 2),
+        "summary_path": summary_path,
+    }
+
+
+if __name__ == "__main__":
+    # Test
+    path = input("Masukkan path file daftar URL: ")
+    with open(path, "r", encoding="utf-8") as f:
+        run_batch(read_urls(f))
@@ -0,0 +1,96 @@
+"""
+Benchmark stage laporan secara offline: setiap skenario (normal, latency tinggi, 429, error
+server, timeout, model utama decommissioned) dijalankan terhadap server mock lokal dengan
+registry kesehatan model dan limiter baru, lalu throughput, latency, retry, dan kegagalan
+dibandingkan. Dengan --transcript dan --replay, laporan memakai transkrip asli dan respons
+Groq asli yang tercatat di cache LLM
+"""
+import os
+import sys
+import json
+import asyncio
+
+from load_test_groq import run_load_test
+
+
+def scenarios(primary_model: str) -> dict:
+    """Skenario benchmark: nama -> opsi MockGroqServer"""
+    return {
+        "normal": {},
+        "latency": {"latency": 1.2, "latency_jitter": 0.5},
+        "rate_limit": {"errors": {"429": 0.2}},
+        "server_error": {"errors": {"500": 0.1}},
+        "timeout": {"errors": {"timeout": 0.05}, "hang_seconds": 1.0},
+        "decommissioned": {"decommissioned": [primary_model]},
+    }
+
+
+def run_benchmark(names: list = None, reports: int = 10, rpm: float = 600, tpm: float = 10 ** 6,
+                  latency: float = 0.2, segments: int = 300, transcript: dict = None,
+                  replay_dir: str = None, seed: int = 0) -> dict:
+    """
+    Jalankan skenario benchmark berurutan
+
+    Args:
+        names: Skenario yang dijalankan (default: semua)
+        reports: Jumlah laporan bersamaan per skenario
+        rpm, tpm, latency: Kuota dan latency dasar server mock
+        segments: Jumlah segmen transkrip dummy (jika transcript tidak diisi)
+        transcript: Data asli {"speech_data", "ocr_data", "video_info"}
+        replay_dir: Direktori cache LLM berisi respons asli untuk diputar ulang
+        seed: Seed injeksi error (hasil bisa diulang)
+
+    Returns:
+        Dict {skenario: hasil run_load_test}
+    """
+    table = scenarios(os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"))
+    results = {}
+    for name in names or list(table):
+        options = dict(table[name], seed=seed, replay_dir=replay_dir)
+        scenario_latency = options.pop("latency", latency)
+        print(f"\n▶️  Skenario {name}...")
+        results[name] = asyncio.run(run_load_test(reports, rpm, tpm, latency=scenario_latency,
+                                                  segments=segments, mock_options=options,
+                                                  transcript=transcript))
+    return results
+
+
+def print_results(results: dict):
+    """Tabel ringkas hasil semua skenario"""
+    print(f"\n{'Skenario':<16}{'Laporan/mnt':>12}{'Rata2 (s)':>11}{'p95 (s)':>9}{'Request':>9}"
+          f"{'429':>6}{'Error':>7}{'Replay':>8}{'Gagal':>7}")
+    for name, result in results.items():
+        server = result["server"]
+        per_minute = (result["reports"] - result["failed"]) / result["elapsed"] * 60
+        injected = server["injected_500"] + server["timeouts"] + server["decommissioned"]
+        print(f"{name:<16}{per_minute:>12.1f}{result['latency_mean'] or 0:>11.2f}{result['latency_p95'] or 0:>9.2f}"
+              f"{server['requests']:>9}{server['rate_limited'] + server['injected_429']:>6}{injected:>7}"
+              f"{server['replayed']:>8}{result['failed']:>7}")
+
+
+if __name__ == "__main__":
+    # Usage: python benchmark_report.py [skenario,...] [--reports N] [--transcript output/report_x.json]
+    #        [--replay downloads/cache/llm] [--json hasil.json]
+    options = {}
+    args = []
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        if arg.startswith("--"):
+            options[arg[2:]] = next(argv, "")
+        else:
+            args.append(arg)
+
+    transcript = None
+    if options.get("transcript"):
+        with open(options["transcript"], "r", encoding="utf-8") as f:
+            transcript = json.load(f)
+    names = args[0].split(",") if args else None
+    reports = int(options.get("reports", 10))
+
+    print(f"🧪 Benchmark laporan: {reports} laporan bersamaan per skenario")
+    results = run_benchmark(names, reports=reports, transcript=transcript, replay_dir=options.get("replay"))
+    print_results(results)
+    if options.get("json"):
+        with open(options["json"], "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Hasil disimpan: {options['json']}")
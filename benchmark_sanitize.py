@@ -0,0 +1,90 @@
+"""
+Micro-benchmark PDFGenerator.sanitize_text atas transkrip 10.000 segmen: implementasi lama
+(per karakter, string concatenation + encode latin-1) dibandingkan dengan versi tabel
+translate, dan hasil keduanya harus identik
+"""
+import sys
+import time
+import random
+import unicodedata
+
+from pdf_generator import PDFGenerator, FULLWIDTH_REPLACEMENTS
+
+
+def legacy_sanitize_text(text: str) -> str:
+    """Implementasi sanitize_text sebelumnya, sebagai acuan hasil dan kecepatan"""
+    if not text:
+        return ""
+    for fullwidth, ascii_char in FULLWIDTH_REPLACEMENTS.items():
+        text = text.replace(fullwidth, ascii_char)
+    text = unicodedata.normalize('NFKD', text)
+    cleaned = ''
+    for char in text:
+        try:
+            char.encode('latin-1')
+            cleaned += char
+        except UnicodeEncodeError:
+            ascii_equiv = unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii')
+            if ascii_equiv:
+                cleaned += ascii_equiv
+            else:
+                if not unicodedata.category(char).startswith('C'):
+                    cleaned += ' '
+    return cleaned
+
+
+# Potongan teks khas transkrip/OCR: bahasa Indonesia, aksen, emoji, fullwidth, CJK, control char
+SAMPLES = [
+    "gue bilang juga apa, dasar goblok lo",
+    "selamat datang di channel kami, jangan lupa subscribe ya",
+    "café crème déjà vu naïve",
+    "wkwkwk 😂😂🔥 mantap jiwa",
+    "【LIVE】 ｜ berita terkini：banjir di jakarta！",
+    "「tolong」 『jangan』 （serius） ～ ＃viral",
+    "ｆｕｌｌｗｉｄｔｈ ｔｅｘｔ １２３",
+    "こんにちは 世界",
+    "ﬁnal ﬂag ½ ² ™ …",
+    "tab\tdan zero​width‍gabung",
+]
+
+
+def make_transcript(segments: int = 10000, seed: int = 0) -> list:
+    """Transkrip dummy: setiap segmen gabungan beberapa potongan SAMPLES"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLES) for _ in range(rng.randint(1, 4))) for _ in range(segments)]
+
+
+def run(segments: int = 10000, repeat: int = 3) -> dict:
+    """
+    Jalankan benchmark
+
+    Returns:
+        Dict waktu terbaik (detik) implementasi lama dan baru, dan rasio percepatan
+    """
+    texts = make_transcript(segments)
+    generator = PDFGenerator()
+
+    def best(func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outputs = func(texts)
+            timings.append(time.perf_counter() - started)
+        return min(timings), outputs
+
+    legacy_seconds, expected = best(lambda items: [legacy_sanitize_text(text) for text in items])
+    table_seconds, actual = best(lambda items: [generator.sanitize_text(text) for text in items])
+    if actual != expected:
+        mismatch = next(idx for idx, (a, b) in enumerate(zip(actual, expected)) if a != b)
+        raise AssertionError(f"Hasil berbeda di segmen {mismatch}: {actual[mismatch]!r} != {expected[mismatch]!r}")
+    return {"segments": segments, "legacy": legacy_seconds, "table": table_seconds,
+            "speedup": legacy_seconds / table_seconds}
+
+
+if __name__ == "__main__":
+    # Usage: python benchmark_sanitize.py [jumlah_segmen]
+    segments = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    result = run(segments)
+    print(f"🧪 sanitize_text atas {result['segments']} segmen (hasil identik)")
+    print(f"   Lama : {result['legacy'] * 1000:.1f} ms")
+    print(f"   Tabel: {result['table'] * 1000:.1f} ms ({result['speedup']:.1f}x lebih cepat)")
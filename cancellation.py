@@ -0,0 +1,180 @@
+"""
+Modul token pembatalan dan deadline: analyze_video membuat satu token per job dan setiap stage
+mendapat token turunan dengan deadline sendiri. Stage mengecek token secara kooperatif, dan
+subprocess (ffmpeg, tesseract) yang terdaftar di token langsung dimatikan saat token dibatalkan
+"""
+import time
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class JobCancelled(Exception):
+    """Job dibatalkan (mis. dari UI) sebelum selesai"""
+    pass
+
+
+class DeadlineExceeded(JobCancelled):
+    """Deadline job atau stage terlewati"""
+    pass
+
+
+class CancellationToken:
+    def __init__(self, timeout: float = None, parent: "CancellationToken" = None, name: str = "job"):
+        """
+        Inisialisasi token
+
+        Args:
+            timeout: Deadline relatif (detik) sejak token dibuat (None = tanpa deadline sendiri)
+            parent: Token induk; pembatalan induk ikut membatalkan token ini dan deadline
+                    token ini tidak pernah melewati deadline induk
+            name: Nama job/stage untuk pesan error
+        """
+        self.name = name
+        self.deadline = time.monotonic() + timeout if timeout else None
+        if parent is not None and parent.deadline is not None:
+            self.deadline = min(self.deadline or parent.deadline, parent.deadline)
+        self.error = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._parent = parent
+        self._timer = None
+
+        if parent is not None:
+            parent.on_cancel(self._cancel_from_parent)
+        if self.deadline is not None and self.error is None:
+            self._timer = threading.Timer(max(0.0, self.deadline - time.monotonic()), self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def child(self, name: str, timeout: float = None) -> "CancellationToken":
+        """Token turunan (mis. per stage) dengan deadline sendiri"""
+        return CancellationToken(timeout=timeout, parent=self, name=name)
+
+    def _expire(self):
+        self.cancel(error=DeadlineExceeded(f"Deadline {self.name} terlewati"))
+
+    def _cancel_from_parent(self):
+        self.cancel(error=self._parent.error)
+
+    def cancel(self, reason: str = "Dibatalkan", error: JobCancelled = None):
+        """Batalkan token: semua callback (mis. kill subprocess) dan token turunan ikut dipanggil"""
+        with self._lock:
+            if self.error is not None:
+                return
+            self.error = error or JobCancelled(f"{reason} ({self.name})")
+            callbacks, self._callbacks = self._callbacks, []
+            self._event.set()
+        if self._timer is not None:
+            self._timer.cancel()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Raise JobCancelled/DeadlineExceeded jika token sudah dibatalkan"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self._expire()
+        if self.error is not None:
+            raise self.error
+
+    def remaining(self) -> float:
+        """Sisa waktu sampai deadline (detik), None jika tanpa deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def sleep(self, seconds: float):
+        """time.sleep yang langsung berhenti (raise) saat token dibatalkan"""
+        self._event.wait(seconds)
+        self.check()
+
+    def result(self, future, poll_interval: float = 0.5):
+        """Tunggu hasil Future sambil tetap mengecek token"""
+        while True:
+            self.check()
+            try:
+                return future.result(timeout=poll_interval)
+            except FutureTimeoutError:
+                continue
+
+    def on_cancel(self, callback):
+        """
+        Daftarkan callback yang dipanggil saat token dibatalkan (langsung dipanggil jika sudah)
+
+        Returns:
+            Callback yang sama, untuk remove_callback()
+        """
+        with self._lock:
+            if self.error is None:
+                self._callbacks.append(callback)
+                return callback
+        callback()
+        return callback
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def close(self):
+        """Lepas token dari induknya dan hentikan timer deadline (token selesai dipakai)"""
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._parent is not None:
+            self._parent.remove_callback(self._cancel_from_parent)
+
+
+@contextlib.contextmanager
+def kill_on_cancel(token: CancellationToken, process: subprocess.Popen):
+    """Matikan subprocess jika token dibatalkan selama blok berjalan"""
+    if token is None:
+        yield process
+        return
+
+    def kill():
+        if process.poll() is None:
+            process.kill()
+
+    token.on_cancel(kill)
+    try:
+        yield process
+    finally:
+        token.remove_callback(kill)
+
+
+def run_process(cmd: list, token: CancellationToken = None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Seperti subprocess.run(cmd, capture_output=True, text=True, check=True), tapi proses
+    dimatikan begitu token dibatalkan
+
+    Raises:
+        JobCancelled: Jika token dibatalkan sebelum proses selesai
+        subprocess.CalledProcessError: Jika proses keluar dengan kode bukan 0
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **kwargs)
+    with kill_on_cancel(token, process):
+        stdout, stderr = process.communicate()
+    if token is not None:
+        token.check()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+if __name__ == "__main__":
+    # Test: proses sleep dimatikan oleh deadline token
+    token = CancellationToken(timeout=1, name="test")
+    started = time.time()
+    try:
+        run_process(["sleep", "30"], token)
+    except DeadlineExceeded as e:
+        print(f"✅ {e} setelah {time.time() - started:.1f} detik")
@@ -0,0 +1,106 @@
+"""
+Modul checkpoint per stage: hasil setiap stage pipeline disimpan di direktori job,
+sehingga analisis yang gagal bisa dilanjutkan dari stage pertama yang belum valid
+"""
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+from download_cache import resolve_video_key
+
+
+def config_hash(config) -> str:
+    """Hash stabil dari konfigurasi stage (dict/list/str yang bisa di-serialize ke JSON)"""
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def job_id_for(video_url: str) -> str:
+    """
+    ID job dari input: extractor-id video jika URL dikenali yt-dlp,
+    jika tidak hash dari URL (atau path file lokal)
+    """
+    resolved = resolve_video_key(video_url)
+    if resolved:
+        extractor, video_id = resolved
+        return f"{extractor}-{video_id}"
+    return f"url-{hashlib.sha1(video_url.strip().encode('utf-8')).hexdigest()[:16]}"
+
+
+class JobCheckpoint:
+    def __init__(self, video_url: str, checkpoint_dir: str = None):
+        """
+        Inisialisasi direktori checkpoint untuk satu input
+
+        Args:
+            video_url: URL video (menentukan ID job)
+            checkpoint_dir: Direktori induk semua job
+                            (default: CHECKPOINT_DIR atau downloads/jobs)
+        """
+        if checkpoint_dir is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            checkpoint_dir = os.getenv("CHECKPOINT_DIR", os.path.join(downloads_dir, "jobs"))
+        self.job_id = job_id_for(video_url)
+        self.job_dir = os.path.join(checkpoint_dir, self.job_id)
+        self._lock = threading.Lock()
+        Path(self.job_dir).mkdir(parents=True, exist_ok=True)
+
+    def _stage_path(self, stage: str) -> str:
+        return os.path.join(self.job_dir, f"{stage}.json")
+
+    def _write_json(self, path: str, data):
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, stage: str, key: str):
+        """
+        Ambil hasil stage jika checkpoint ada dan key-nya cocok
+
+        Returns:
+            Tuple (True, hasil) jika valid, (False, None) jika tidak ada / key berbeda
+        """
+        record = self._read_json(self._stage_path(stage))
+        if not record or record.get("key") != key:
+            return False, None
+        return True, record.get("result")
+
+    def save(self, stage: str, key: str, result):
+        """Simpan hasil stage beserta key (hash input + konfigurasi stage)"""
+        self._write_json(self._stage_path(stage), {"stage": stage, "key": key, "result": result})
+
+    def invalidate(self, stage: str):
+        """Hapus checkpoint satu stage"""
+        try:
+            os.remove(self._stage_path(stage))
+        except OSError:
+            pass
+
+    def load_info(self) -> dict:
+        """Info video yang terkumpul dari run sebelumnya (judul, durasi, path, dll)"""
+        return self._read_json(os.path.join(self.job_dir, "video_info.json")) or {}
+
+    def save_info(self, video_info: dict):
+        """Simpan info video (field yang diawali '_' tidak disimpan)"""
+        with self._lock:
+            data = {key: value for key, value in video_info.items() if not key.startswith("_")}
+            self._write_json(os.path.join(self.job_dir, "video_info.json"), data)
+
+
+if __name__ == "__main__":
+    # Test
+    url = input("Masukkan URL video: ")
+    checkpoint = JobCheckpoint(url)
+    print(f"📁 Direktori job: {checkpoint.job_dir}")
+    for name in sorted(os.listdir(checkpoint.job_dir)):
+        print(f"   - {name}")
@@ -0,0 +1,35 @@
+"""
+Fixture bersama untuk test: env Groq yang terisolasi di tmp_path dan jam palsu
+"""
+import pytest
+
+import model_health
+
+
+class FakeClock:
+    """Jam palsu untuk parameter clock: waktu hanya maju jika test mengubah atribut now"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def groq_env(monkeypatch, tmp_path):
+    """
+    API key dummy, file model health/usage dan cache LLM di tmp_path (bukan downloads/), dan
+    thread probe model dimatikan. Mengembalikan monkeypatch untuk env tambahan per test
+    """
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("GROQ_MODEL_HEALTH_FILE", str(tmp_path / "health.json"))
+    monkeypatch.setenv("LLM_USAGE_FILE", str(tmp_path / "usage.json"))
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "llm"))
+    monkeypatch.setattr(model_health, "PROBE_INTERVAL", 0)
+    return monkeypatch
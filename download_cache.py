@@ -0,0 +1,273 @@
+"""
+Modul cache download video yang dikunci berdasarkan extractor + ID video (bukan judul)
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from functools import lru_cache
+
+
+# Kuota default cache: 10 GB (bisa diubah lewat DOWNLOAD_CACHE_MAX_GB)
+DEFAULT_MAX_GB = 10.0
+
+# Lock bersama untuk semua instance cache dalam satu proses
+_CACHE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _extractor_classes() -> list:
+    """Daftar extractor yt-dlp (tanpa Generic) untuk resolusi ID secara offline"""
+    from yt_dlp.extractor import gen_extractor_classes
+    return [ie for ie in gen_extractor_classes() if ie.ie_key() != "Generic"]
+
+
+def resolve_video_key(video_url: str):
+    """
+    Resolusi URL menjadi (extractor_key, video_id) tanpa request jaringan.
+    Varian URL (watch, shorts, youtu.be, m.youtube) menghasilkan key yang sama.
+
+    Returns:
+        Tuple (extractor_key, video_id) atau None jika tidak bisa diresolusi offline
+    """
+    for ie in _extractor_classes():
+        try:
+            if ie.suitable(video_url):
+                video_id = ie.get_temp_id(video_url)
+                if video_id:
+                    return ie.ie_key(), str(video_id)
+                return None
+        except Exception:
+            continue
+    return None
+
+
+def _safe(value: str) -> str:
+    """Bersihkan string agar aman dipakai sebagai nama file"""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', value)
+
+
+def _normalize_url(video_url: str) -> str:
+    """Normalisasi URL sederhana untuk tabel alias"""
+    return video_url.strip().rstrip('/')
+
+
+def _format_hash(format_selector: str) -> str:
+    """Hash pendek dari format selector yt-dlp"""
+    return hashlib.sha1(format_selector.encode("utf-8")).hexdigest()[:8]
+
+
+def make_cache_key(extractor_key: str, video_id: str, format_selector: str) -> str:
+    """Buat key cache: <extractor>-<id>-<hash format>"""
+    return f"{_safe(extractor_key.lower())}-{_safe(video_id)}-{_format_hash(format_selector)}"
+
+
+def read_sidecar(video_path: str) -> dict:
+    """
+    Baca metadata sidecar untuk file video yang ada di cache
+
+    Returns:
+        Dict metadata (title, url, extractor, id, format, dll) atau dict kosong
+    """
+    sidecar = os.path.splitext(video_path)[0] + ".json"
+    if os.path.exists(sidecar):
+        try:
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+class DownloadCache:
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """
+        Inisialisasi cache download
+
+        Args:
+            cache_dir: Direktori cache (default: DOWNLOAD_CACHE_DIR atau downloads/cache)
+            max_bytes: Kuota disk maksimal dalam byte, entry paling lama tidak dipakai
+                       (LRU) akan dihapus jika kuota terlampaui
+        """
+        if cache_dir is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            cache_dir = os.getenv("DOWNLOAD_CACHE_DIR", os.path.join(downloads_dir, "cache"))
+        if max_bytes is None:
+            max_gb = float(os.getenv("DOWNLOAD_CACHE_MAX_GB", DEFAULT_MAX_GB))
+            max_bytes = int(max_gb * 1024 ** 3)
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._aliases_path = os.path.join(cache_dir, "aliases.json")
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+
+    def _sidecar_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_aliases(self) -> dict:
+        if os.path.exists(self._aliases_path):
+            try:
+                with open(self._aliases_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _write_json(self, path: str, data: dict):
+        """Tulis JSON secara atomik (tmp file lalu rename)"""
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _resolve(self, video_url: str):
+        """Resolusi URL ke (extractor, id): offline dulu, lalu tabel alias"""
+        resolved = resolve_video_key(video_url)
+        if resolved:
+            return resolved
+        alias = self._load_aliases().get(_normalize_url(video_url))
+        if alias:
+            return alias["extractor"], alias["id"]
+        return None
+
+    def output_template(self, format_selector: str) -> str:
+        """Template output yt-dlp yang menyimpan file berdasarkan extractor + ID"""
+        format_hash = _format_hash(format_selector)
+        return os.path.join(self.cache_dir, f"%(extractor_key)s-%(id)s-{format_hash}.%(ext)s")
+
+    def lookup(self, video_url: str, format_selectors: list) -> str:
+        """
+        Cari file video di cache untuk URL dan daftar format (urutan prioritas)
+
+        Returns:
+            Path file video jika ada di cache, atau None
+        """
+        resolved = self._resolve(video_url)
+        if not resolved:
+            return None
+
+        extractor_key, video_id = resolved
+        for format_selector in format_selectors:
+            key = make_cache_key(extractor_key, video_id, format_selector)
+            sidecar_path = self._sidecar_path(key)
+            if not os.path.exists(sidecar_path):
+                continue
+
+            with _CACHE_LOCK:
+                try:
+                    with open(sidecar_path, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+
+                video_path = os.path.join(self.cache_dir, meta.get("file", ""))
+                if not os.path.isfile(video_path) or os.path.getsize(video_path) == 0:
+                    # Sidecar tanpa file (file terhapus manual), bersihkan
+                    os.remove(sidecar_path)
+                    continue
+
+                meta["last_access"] = time.time()
+                self._write_json(sidecar_path, meta)
+            return video_path
+        return None
+
+    def store(self, video_url: str, info: dict, video_path: str, format_selector: str) -> str:
+        """
+        Daftarkan file hasil download ke cache (tulis sidecar, alias URL, dan evict LRU)
+
+        Args:
+            video_url: URL asli yang diminta user
+            info: Info dict dari yt-dlp
+            video_path: Path file yang sudah didownload
+            format_selector: Format yt-dlp yang berhasil dipakai
+
+        Returns:
+            Path file video di cache
+        """
+        extractor_key = info.get("extractor_key") or info.get("extractor") or "generic"
+        video_id = str(info.get("id") or hashlib.sha1(video_url.encode("utf-8")).hexdigest()[:16])
+        key = make_cache_key(extractor_key, video_id, format_selector)
+
+        # Pindahkan file ke direktori cache jika belum di sana
+        ext = os.path.splitext(video_path)[1]
+        cached_path = os.path.join(self.cache_dir, f"{key}{ext}")
+        if os.path.abspath(video_path) != os.path.abspath(cached_path):
+            os.replace(video_path, cached_path)
+
+        now = time.time()
+        meta = {
+            "key": key,
+            "file": os.path.basename(cached_path),
+            "url": video_url,
+            "webpage_url": info.get("webpage_url"),
+            "extractor": extractor_key,
+            "id": video_id,
+            "format": format_selector,
+            "format_id": info.get("format_id"),
+            "title": info.get("title"),
+            "duration": info.get("duration"),
+            "size": os.path.getsize(cached_path),
+            "created_at": now,
+            "last_access": now,
+        }
+
+        with _CACHE_LOCK:
+            self._write_json(self._sidecar_path(key), meta)
+
+            # Simpan alias untuk URL yang tidak bisa diresolusi offline (mis. Generic)
+            if resolve_video_key(video_url) is None:
+                aliases = self._load_aliases()
+                aliases[_normalize_url(video_url)] = {"extractor": extractor_key, "id": video_id}
+                self._write_json(self._aliases_path, aliases)
+
+            self._evict(keep_key=key)
+
+        return cached_path
+
+    def entries(self) -> list:
+        """Daftar semua metadata entry di cache"""
+        entries = []
+        for sidecar in Path(self.cache_dir).glob("*.json"):
+            if sidecar.name == "aliases.json":
+                continue
+            try:
+                with open(sidecar, "r", encoding="utf-8") as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def total_size(self) -> int:
+        """Total ukuran file media di cache (byte)"""
+        return sum(entry.get("size", 0) for entry in self.entries())
+
+    def _evict(self, keep_key: str = None):
+        """Hapus entry paling lama tidak dipakai sampai total ukuran di bawah kuota"""
+        entries = sorted(self.entries(), key=lambda e: e.get("last_access", 0))
+        total = sum(entry.get("size", 0) for entry in entries)
+
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.get("key") == keep_key:
+                continue
+
+            media_path = os.path.join(self.cache_dir, entry.get("file", ""))
+            for path in (media_path, self._sidecar_path(entry["key"])):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= entry.get("size", 0)
+            print(f"🧹 Cache penuh, menghapus: {entry.get('title') or entry['key']}")
+
+
+if __name__ == "__main__":
+    # Test
+    test_url = input("Masukkan URL video: ")
+    print(f"Key offline: {resolve_video_key(test_url)}")
+    cache = DownloadCache()
+    print(f"Total cache: {cache.total_size() / 1024 ** 2:.1f} MB dari {len(cache.entries())} video")
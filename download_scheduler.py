@@ -0,0 +1,182 @@
+"""
+Modul scheduler untuk download banyak URL sekaligus dengan batas konkurensi dan rate per host
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import yt_dlp
+
+from video_downloader import download_video
+from strategy_memory import host_key
+
+
+class SessionPool:
+    """
+    Pool instance YoutubeDL per thread dan per player client.
+    Instance dipakai ulang antar download sehingga extractor (termasuk cache player
+    YouTube) dan koneksi HTTP tidak dibuat ulang setiap kali.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def get(self, ydl_opts: dict):
+        """Ambil YoutubeDL untuk thread ini yang dikonfigurasi sesuai ydl_opts"""
+        sessions = getattr(self._local, "sessions", None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+
+        client_list = ydl_opts.get('extractor_args', {}).get('youtube', {}).get('player_client', [])
+        key = tuple(client_list)
+        ydl = sessions.get(key)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(ydl_opts)
+            sessions[key] = ydl
+            with self._lock:
+                self._all.append(ydl)
+            return ydl
+
+        # Opsi yang berbeda per download: format dan template nama file
+        if ydl_opts.get('format'):
+            ydl.params['format'] = ydl_opts['format']
+            ydl.format_selector = ydl.build_format_selector(ydl_opts['format'])
+        if ydl_opts.get('outtmpl'):
+            ydl.params['outtmpl'] = {'default': ydl_opts['outtmpl']}
+        # Progress hook terikat ke download ini (mis. cek token pembatalan job)
+        ydl._progress_hooks = list(ydl_opts.get('progress_hooks', []))
+        return ydl
+
+    def close(self):
+        """Tutup semua instance YoutubeDL (melepas koneksi HTTP)"""
+        with self._lock:
+            sessions, self._all = self._all, []
+        for ydl in sessions:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+
+
+class HostLimiter:
+    """Batas konkurensi dan rate request untuk satu host"""
+
+    def __init__(self, max_concurrent: int = 2, rate_per_sec: float = 1.0):
+        self._semaphore = threading.Semaphore(max_concurrent)
+        self._interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        # Jadwalkan waktu mulai agar jarak antar request minimal 1/rate detik
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self._interval
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+
+class DownloadScheduler:
+    def __init__(self, output_dir: str = "downloads", max_workers: int = None,
+                 per_host_concurrency: int = None, per_host_rate: float = None,
+                 download_kwargs: dict = None):
+        """
+        Inisialisasi scheduler download batch
+
+        Args:
+            output_dir: Direktori untuk menyimpan video
+            max_workers: Jumlah download paralel total (default: DOWNLOAD_WORKERS atau 8)
+            per_host_concurrency: Maksimal download paralel per host (default: DOWNLOAD_HOST_CONCURRENCY atau 2)
+            per_host_rate: Maksimal download baru per detik per host (default: DOWNLOAD_HOST_RATE atau 1.0)
+            download_kwargs: Argumen tambahan untuk download_video (mis. formats)
+        """
+        self.output_dir = output_dir
+        self.max_workers = max_workers or int(os.getenv("DOWNLOAD_WORKERS", "8"))
+        self.per_host_concurrency = per_host_concurrency or int(os.getenv("DOWNLOAD_HOST_CONCURRENCY", "2"))
+        self.per_host_rate = per_host_rate or float(os.getenv("DOWNLOAD_HOST_RATE", "1.0"))
+        self.download_kwargs = download_kwargs or {}
+
+        self.sessions = SessionPool()
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download")
+
+    def _limiter(self, host: str) -> HostLimiter:
+        with self._limiters_lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(self.per_host_concurrency, self.per_host_rate)
+            return self._limiters[host]
+
+    def _download(self, video_url: str) -> dict:
+        host = host_key(video_url)
+        with self._limiter(host):
+            started_at = time.time()
+            try:
+                path = download_video(video_url, self.output_dir,
+                                      session_pool=self.sessions, **self.download_kwargs)
+                return {"url": video_url, "host": host, "path": path, "error": None,
+                        "elapsed": time.time() - started_at}
+            except Exception as e:
+                return {"url": video_url, "host": host, "path": None, "error": str(e),
+                        "elapsed": time.time() - started_at}
+
+    def submit(self, video_url: str):
+        """
+        Jadwalkan satu URL
+
+        Returns:
+            Future yang menghasilkan dict {"url", "host", "path", "error", "elapsed"}
+        """
+        return self._executor.submit(self._download, video_url)
+
+    def download_all(self, video_urls: list) -> list:
+        """
+        Download banyak URL secara paralel (gagal satu tidak menghentikan yang lain)
+
+        Returns:
+            List hasil dengan urutan sama seperti video_urls
+        """
+        print(f"📥 Menjadwalkan {len(video_urls)} download "
+              f"(workers={self.max_workers}, per host={self.per_host_concurrency}, "
+              f"rate={self.per_host_rate}/detik)")
+        futures = {self.submit(url): idx for idx, url in enumerate(video_urls)}
+        results = [None] * len(video_urls)
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = "✅" if result["error"] is None else "❌"
+            print(f"   {status} [{result['elapsed']:.1f}s] {result['url']}")
+        return results
+
+    def close(self):
+        """Tunggu semua download selesai lalu tutup session"""
+        self._executor.shutdown(wait=True)
+        self.sessions.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    # Test: python download_scheduler.py urls.txt
+    import sys
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    with DownloadScheduler() as scheduler:
+        results = scheduler.download_all(urls)
+    failed = [r for r in results if r["error"]]
+    print(f"\n📊 {len(results) - len(failed)} berhasil, {len(failed)} gagal")
@@ -0,0 +1,387 @@
+"""
+Modul antrian job analisis berbasis SQLite lokal: UI hanya memasukkan job dan membaca status,
+analisis dijalankan oleh proses worker terpisah (worker.py). Urutan pengambilan job mengikuti
+job_scheduler (job pendek dan interaktif lebih dulu, dengan aging)
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+from pathlib import Path
+
+from job_scheduler import (probe_duration, estimate_service_seconds, order_jobs,
+                           PRIORITY_INTERACTIVE)
+
+
+# Status job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Worker dianggap mati jika tidak mengirim heartbeat selama ini (detik)
+HEARTBEAT_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_id TEXT,
+    log_path TEXT,
+    result TEXT,
+    error TEXT,
+    duration REAL,
+    expected_seconds REAL,
+    priority_class TEXT NOT NULL DEFAULT 'interactive',
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    started_at REAL,
+    last_seen REAL,
+    current_job TEXT
+);
+"""
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class JobQueue:
+    def __init__(self, db_path: str = None):
+        """
+        Inisialisasi antrian job
+
+        Args:
+            db_path: Path database SQLite (default: JOB_QUEUE_DB atau downloads/jobs.db)
+        """
+        if db_path is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            db_path = os.getenv("JOB_QUEUE_DB", os.path.join(downloads_dir, "jobs.db"))
+        self.db_path = db_path
+        Path(os.path.dirname(db_path) or ".").mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        # Database lama (sebelum penjadwalan berbasis durasi dan pembatalan) belum punya kolom ini
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in (("duration", "REAL"), ("expected_seconds", "REAL"),
+                                   ("priority_class", "TEXT NOT NULL DEFAULT 'interactive'"),
+                                   ("cancel_requested", "INTEGER NOT NULL DEFAULT 0")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Koneksi baru per operasi: aman dipakai dari thread Streamlit maupun proses worker
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, url: str, options: dict = None, priority: str = PRIORITY_INTERACTIVE,
+                duration: float = None, probe: bool = True) -> str:
+        """
+        Masukkan job ke antrian
+
+        Args:
+            url: URL video
+            options: Argumen tambahan untuk analyze_video (mis. {"output_format": "pdf"})
+            priority: 'interactive' (request UI) atau 'batch' (didahulukan job interaktif)
+            duration: Durasi video (detik) jika sudah diketahui
+            probe: Jika True dan durasi belum diketahui, durasi di-probe dari metadata
+
+        Returns:
+            ID job
+        """
+        if duration is None and probe:
+            duration = probe_duration(url)
+        expected = estimate_service_seconds(duration, self.service_history())
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, url, options, status, created_at, duration, expected_seconds, "
+                "priority_class) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, url, json.dumps(options or {}), QUEUED, time.time(), duration, expected, priority)
+            )
+        return job_id
+
+    def _queued_in_order(self, conn: sqlite3.Connection) -> list:
+        rows = conn.execute(
+            "SELECT id, created_at, expected_seconds, priority_class FROM jobs WHERE status = ?",
+            (QUEUED,)
+        ).fetchall()
+        return order_jobs([dict(row) for row in rows], time.time())
+
+    def claim(self, worker_id: str) -> dict:
+        """
+        Ambil job antrian dengan skor terbaik (job_scheduler) secara atomik dan tandai sedang berjalan
+
+        Returns:
+            Dict job, atau None jika antrian kosong
+        """
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE mengunci database untuk tulis, jadi dua worker tidak bisa
+            # mengambil job yang sama
+            conn.execute("BEGIN IMMEDIATE")
+            queued = self._queued_in_order(conn)
+            if not queued:
+                conn.execute("COMMIT")
+                return None
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (queued[0]["id"],)).fetchone()
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, worker_id = ? WHERE id = ?",
+                (RUNNING, now, worker_id, row["id"])
+            )
+            conn.execute("UPDATE workers SET current_job = ?, last_seen = ? WHERE id = ?",
+                         (row["id"], now, worker_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        job = self._row_to_job(row)
+        job.update({"status": RUNNING, "started_at": now, "worker_id": worker_id})
+        return job
+
+    def set_log_path(self, job_id: str, log_path: str):
+        """Simpan path file log job (dibaca UI untuk log live)"""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET log_path = ? WHERE id = ?", (log_path, job_id))
+
+    def complete(self, job_id: str, result: dict):
+        """Tandai job selesai dengan hasil analisis"""
+        self._finish(job_id, DONE, result=json.dumps(result, ensure_ascii=False, default=str))
+
+    def fail(self, job_id: str, error: str):
+        """Tandai job gagal"""
+        self._finish(job_id, FAILED, error=error)
+
+    def cancel(self, job_id: str) -> str:
+        """
+        Batalkan job: job yang masih antri langsung dibatalkan, job yang sedang berjalan
+        ditandai agar worker-nya menghentikan analisis (dicek worker setiap detik)
+
+        Returns:
+            Status job setelah permintaan (cancelled, running, atau status akhir yang sudah ada)
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = row["status"]
+            if status == QUEUED:
+                conn.execute("UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                             (CANCELLED, time.time(), "Dibatalkan sebelum dijalankan", job_id))
+                status = CANCELLED
+            elif status == RUNNING:
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            conn.execute("COMMIT")
+            return status
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """True jika pembatalan job diminta (dicek worker selama job berjalan)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def mark_cancelled(self, job_id: str, reason: str):
+        """Tandai job berjalan yang sudah dihentikan worker sebagai dibatalkan"""
+        self._finish(job_id, CANCELLED, error=reason)
+
+    def _finish(self, job_id: str, status: str, result: str = None, error: str = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), result, error, job_id)
+            )
+            conn.execute("UPDATE workers SET current_job = NULL WHERE current_job = ?", (job_id,))
+
+    def get(self, job_id: str) -> dict:
+        """Ambil job berdasarkan ID (None jika tidak ada)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def list_jobs(self, limit: int = 20) -> list:
+        """Job terbaru, paling baru di depan"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def position(self, job_id: str) -> int:
+        """Posisi job di antrian (1 = berikutnya diambil worker), 0 jika tidak sedang antri"""
+        with self._connect() as conn:
+            queued = self._queued_in_order(conn)
+        for index, job in enumerate(queued):
+            if job["id"] == job_id:
+                return index + 1
+        return 0
+
+    def service_history(self, limit: int = 200) -> list:
+        """List (durasi video, waktu proses) job selesai terakhir, untuk kalibrasi perkiraan"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT duration, finished_at - started_at FROM jobs "
+                "WHERE status = ? AND duration IS NOT NULL AND started_at IS NOT NULL "
+                "ORDER BY finished_at DESC LIMIT ?",
+                (DONE, limit)
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def export_trace(self) -> list:
+        """Riwayat job selesai sebagai trace untuk job_scheduler.replay_report()"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT created_at, started_at, finished_at, duration, expected_seconds, priority_class "
+                "FROM jobs WHERE status IN (?, ?) AND started_at IS NOT NULL ORDER BY created_at",
+                (DONE, FAILED)
+            ).fetchall()
+        if not rows:
+            return []
+        origin = rows[0]["created_at"]
+        return [{
+            "arrival": row["created_at"] - origin,
+            "service": row["finished_at"] - row["started_at"],
+            "duration": row["duration"],
+            "expected": row["expected_seconds"],
+            "priority": row["priority_class"],
+        } for row in rows]
+
+    def register_worker(self, worker_id: str):
+        """Daftarkan proses worker"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (id, host, pid, started_at, last_seen) VALUES (?, ?, ?, ?, ?)",
+                (worker_id, socket.gethostname(), os.getpid(), now, now)
+            )
+
+    def heartbeat(self, worker_id: str):
+        """Tandai worker masih hidup"""
+        with self._connect() as conn:
+            conn.execute("UPDATE workers SET last_seen = ? WHERE id = ?", (time.time(), worker_id))
+
+    def unregister_worker(self, worker_id: str):
+        """Hapus worker yang berhenti normal"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def active_workers(self) -> list:
+        """Worker yang heartbeat-nya masih baru"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM workers WHERE last_seen >= ?",
+                                (time.time() - HEARTBEAT_TIMEOUT,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def requeue_stale(self) -> int:
+        """
+        Kembalikan job milik worker yang mati (tanpa heartbeat) ke antrian.
+        Checkpoint stage membuat job tersebut dilanjutkan, bukan diulang dari awal
+
+        Returns:
+            Jumlah job yang dikembalikan ke antrian
+        """
+        cutoff = time.time() - HEARTBEAT_TIMEOUT
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stale_workers = "(worker_id IS NULL OR worker_id NOT IN (SELECT id FROM workers WHERE last_seen >= ?))"
+            # Job yang diminta batal tidak perlu dijalankan ulang
+            conn.execute(
+                f"UPDATE jobs SET status = ?, finished_at = ?, error = ? "
+                f"WHERE status = ? AND cancel_requested = 1 AND {stale_workers}",
+                (CANCELLED, time.time(), "Dibatalkan", RUNNING, cutoff)
+            )
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = ?, started_at = NULL, worker_id = NULL "
+                f"WHERE status = ? AND {stale_workers}",
+                (QUEUED, RUNNING, cutoff)
+            )
+            conn.execute("DELETE FROM workers WHERE last_seen < ?", (cutoff,))
+            conn.execute("COMMIT")
+            return cursor.rowcount
+
+    def metrics(self, window: int = 100) -> dict:
+        """
+        Metrik antrian
+
+        Args:
+            window: Jumlah job selesai terakhir untuk statistik waktu tunggu/layanan
+
+        Returns:
+            Dict: queue_depth, running, workers, wait/service time rata-rata dan p95 (detik),
+            serta umur job tertua yang masih antri
+        """
+        now = time.time()
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            finished = conn.execute(
+                "SELECT created_at, started_at, finished_at FROM jobs "
+                "WHERE status IN (?, ?) AND started_at IS NOT NULL "
+                "ORDER BY finished_at DESC LIMIT ?",
+                (DONE, FAILED, window)
+            ).fetchall()
+        waits = [row["started_at"] - row["created_at"] for row in finished]
+        services = [row["finished_at"] - row["started_at"] for row in finished]
+        return {
+            "queue_depth": counts.get(QUEUED, 0),
+            "running": counts.get(RUNNING, 0),
+            "done": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "cancelled": counts.get(CANCELLED, 0),
+            "workers": len(self.active_workers()),
+            "oldest_queued_age": now - oldest if oldest else 0.0,
+            "wait_time_avg": sum(waits) / len(waits) if waits else None,
+            "wait_time_p95": _percentile(waits, 95),
+            "service_time_avg": sum(services) / len(services) if services else None,
+            "service_time_p95": _percentile(services, 95),
+        }
+
+
+if __name__ == "__main__":
+    # Usage: python job_queue.py [--batch <file_url>]
+    # --batch memasukkan URL (satu per baris) sebagai job prioritas rendah
+    import sys
+    queue = JobQueue()
+    if "--batch" in sys.argv:
+        with open(sys.argv[sys.argv.index("--batch") + 1], "r", encoding="utf-8") as f:
+            for line in f:
+                url = line.strip()
+                if url and not url.startswith("#"):
+                    print(f"📥 {queue.enqueue(url, priority='batch')}: {url}")
+    print(json.dumps(queue.metrics(), indent=2))
+    for job in queue.list_jobs(10):
+        print(f"   {job['id']} {job['status']:<8} {job['url']}")
@@ -0,0 +1,184 @@
+"""
+Modul penjadwalan antrian job: shortest-expected-job-first dengan aging, dan prioritas
+interaktif vs batch. Berisi juga simulasi replay trace untuk membandingkan turnaround
+"""
+import os
+import json
+import heapq
+import statistics
+
+from media_reader import probe_media
+
+
+# Perkiraan waktu proses jika belum ada riwayat
+DEFAULT_OVERHEAD = 30.0      # Detik tetap per job (metadata, load model, laporan Groq)
+DEFAULT_RATIO = 0.5          # Detik proses per detik durasi video
+UNKNOWN_DURATION = 600.0     # Durasi yang diasumsikan jika probe gagal
+
+# Bobot kelas prioritas: job batch terlihat N kali lebih panjang dari job interaktif
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+CLASS_WEIGHTS = {
+    PRIORITY_INTERACTIVE: 1.0,
+    PRIORITY_BATCH: float(os.getenv("BATCH_PRIORITY_WEIGHT", "4")),
+}
+
+# Aging: setiap detik menunggu mengurangi skor sebanyak ini, agar job panjang tidak starvasi
+AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", "1.0"))
+
+
+def probe_duration(video_url: str) -> float:
+    """
+    Durasi video (detik) dengan cara murah: ffprobe untuk file lokal, metadata yt-dlp
+    (tanpa download, di-cache dan dipakai ulang oleh pipeline) untuk URL
+
+    Returns:
+        Durasi detik, atau None jika tidak diketahui
+    """
+    try:
+        if os.path.isfile(video_url):
+            return probe_media(video_url)["duration"]
+        from pipeline_plan import fetch_metadata
+        return fetch_metadata(video_url).get("duration")
+    except Exception as e:
+        print(f"   ⚠️  Gagal probe durasi: {str(e)[:100]}")
+        return None
+
+
+def estimate_service_seconds(duration: float, history: list = None) -> float:
+    """
+    Perkiraan waktu proses job dari durasi video
+
+    Args:
+        duration: Durasi video (detik), None jika tidak diketahui
+        history: List (durasi, waktu_proses) job yang sudah selesai untuk kalibrasi rasio
+
+    Returns:
+        Perkiraan detik
+    """
+    ratio = DEFAULT_RATIO
+    ratios = [(service - DEFAULT_OVERHEAD) / dur for dur, service in (history or [])
+              if dur and service and dur > 0]
+    if len(ratios) >= 5:
+        ratio = max(0.01, statistics.median(ratios))
+    if not duration:
+        duration = UNKNOWN_DURATION
+    return DEFAULT_OVERHEAD + ratio * duration
+
+
+def job_score(expected_seconds: float, priority_class: str, waited_seconds: float) -> float:
+    """Skor penjadwalan (lebih kecil = dijalankan lebih dulu)"""
+    weight = CLASS_WEIGHTS.get(priority_class, 1.0)
+    expected = expected_seconds if expected_seconds is not None else estimate_service_seconds(None)
+    return expected * weight - AGING_RATE * waited_seconds
+
+
+def order_jobs(jobs: list, now: float) -> list:
+    """
+    Urutkan job antrian sesuai skor
+
+    Args:
+        jobs: List dict dengan key expected_seconds, priority_class, created_at
+        now: Waktu sekarang (epoch detik)
+    """
+    return sorted(jobs, key=lambda job: (
+        job_score(job.get("expected_seconds"), job.get("priority_class"), now - job["created_at"]),
+        job["created_at"],
+    ))
+
+
+def simulate(trace: list, policy: str = "sjf", workers: int = 1) -> list:
+    """
+    Replay trace job pada sejumlah worker
+
+    Args:
+        trace: List dict {"arrival": detik, "service": detik aktual, "duration": detik video
+               (opsional), "expected": perkiraan (opsional), "priority": kelas (opsional)}
+        policy: 'fifo' atau 'sjf' (shortest-expected-job-first dengan aging dan kelas prioritas)
+        workers: Jumlah worker paralel
+
+    Returns:
+        List dict per job dengan tambahan key start, finish, turnaround
+    """
+    jobs = sorted(({**job, "created_at": job["arrival"]} for job in trace), key=lambda job: job["arrival"])
+    for job in jobs:
+        job.setdefault("priority_class", job.get("priority", PRIORITY_INTERACTIVE))
+        if job.get("expected") is None:
+            job["expected"] = estimate_service_seconds(job.get("duration"))
+        job["expected_seconds"] = job["expected"]
+
+    free_at = [0.0] * max(1, workers)  # Min-heap waktu worker kosong
+    heapq.heapify(free_at)
+    waiting = []
+    finished = []
+    next_arrival = 0
+
+    while next_arrival < len(jobs) or waiting:
+        now = heapq.heappop(free_at)
+        if not waiting and next_arrival < len(jobs):
+            now = max(now, jobs[next_arrival]["arrival"])
+        while next_arrival < len(jobs) and jobs[next_arrival]["arrival"] <= now:
+            waiting.append(jobs[next_arrival])
+            next_arrival += 1
+
+        if policy == "fifo":
+            job = min(waiting, key=lambda item: item["arrival"])
+        else:
+            job = order_jobs(waiting, now)[0]
+        waiting.remove(job)
+
+        job["start"] = now
+        job["finish"] = now + job["service"]
+        job["turnaround"] = job["finish"] - job["arrival"]
+        finished.append(job)
+        heapq.heappush(free_at, job["finish"])
+    return finished
+
+
+def _p95(values: list) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+
+
+def turnaround_stats(finished: list) -> dict:
+    """Mean dan p95 turnaround, total dan per kelas prioritas"""
+    stats = {}
+    groups = {"all": finished}
+    for job in finished:
+        groups.setdefault(job["priority_class"], []).append(job)
+    for name, group in groups.items():
+        turnarounds = [job["turnaround"] for job in group]
+        stats[name] = {
+            "jobs": len(group),
+            "mean": statistics.mean(turnarounds) if turnarounds else 0.0,
+            "p95": _p95(turnarounds) if turnarounds else 0.0,
+        }
+    return stats
+
+
+def replay_report(trace: list, workers: int = 1) -> dict:
+    """Bandingkan FIFO vs SJF+aging pada trace yang sama dan tampilkan turnaround"""
+    report = {policy: turnaround_stats(simulate(trace, policy, workers)) for policy in ("fifo", "sjf")}
+    print(f"\n📊 Replay {len(trace)} job, {workers} worker (turnaround dalam detik):")
+    for policy, stats in report.items():
+        for group, values in stats.items():
+            print(f"   {policy:<5} {group:<12} n={values['jobs']:<4} "
+                  f"mean={values['mean']:>9.1f}  p95={values['p95']:>9.1f}")
+    return report
+
+
+if __name__ == "__main__":
+    # Usage: python job_scheduler.py <trace.jsonl> [workers]
+    # Tanpa file trace, riwayat job dari antrian SQLite yang dipakai
+    import sys
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8") as f:
+            trace = [json.loads(line) for line in f if line.strip()]
+    else:
+        from job_queue import JobQueue
+        trace = JobQueue().export_trace()
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    if not trace:
+        print("⚠️  Trace kosong")
+    else:
+        replay_report(trace, workers)
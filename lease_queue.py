@@ -0,0 +1,353 @@
+"""
+Modul koordinasi worker multi-node lewat direktori bersama (mis. volume NFS), tanpa message broker.
+
+Struktur direktori:
+    <root>/pending/<job>.json           job yang menunggu
+    <root>/claimed/<job>.<token>.json   job yang sedang dikerjakan satu node (token lease)
+    <root>/leases/<job>.<token>.json    lease pemilik job (diperbarui lewat heartbeat)
+    <root>/done/<job>.json              job selesai (berisi hasil)
+    <root>/failed/<job>.json            job gagal
+
+Job diklaim dengan rename atomik pending -> claimed/<job>.<token>: hanya satu node yang berhasil.
+Token ada di nama file, jadi node yang tertinggal (heartbeat terlambat) hanya bisa menulis file
+miliknya sendiri dan tidak pernah menimpa lease pemilik baru; kepemilikan job ditentukan oleh
+keberadaan file claimed dengan token tersebut. Lease yang kedaluwarsa (node mati) dikembalikan
+ke pending, lalu node lain melanjutkan dari checkpoint stage.
+Catatan: kedaluwarsa lease memakai jam masing-masing node, jadi jam antar node harus sinkron (NTP).
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from pathlib import Path
+
+from cancellation import CancellationToken
+from job_scheduler import estimate_service_seconds, order_jobs, PRIORITY_INTERACTIVE
+
+
+PENDING = "pending"
+CLAIMED = "claimed"
+LEASES = "leases"
+DONE = "done"
+FAILED = "failed"
+
+# Job yang sudah di-rename ke claimed tapi lease-nya belum tertulis (node mati di antara keduanya)
+# dianggap kedaluwarsa setelah jeda ini
+CLAIM_GRACE_SECONDS = 30
+
+
+def default_node_id() -> str:
+    """ID node: hostname + pid + suffix acak"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class LeaseLost(Exception):
+    """Lease job sudah diambil alih node lain (dianggap mati karena heartbeat terlambat)"""
+    pass
+
+
+class LeaseQueue:
+    def __init__(self, root: str = None, lease_seconds: float = None):
+        """
+        Inisialisasi antrian berbasis direktori bersama
+
+        Args:
+            root: Direktori bersama (default: SHARED_QUEUE_DIR atau downloads/shared_queue)
+            lease_seconds: Lama lease tanpa heartbeat sebelum dianggap kedaluwarsa
+                           (default: LEASE_SECONDS atau 120)
+        """
+        if root is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            root = os.getenv("SHARED_QUEUE_DIR", os.path.join(downloads_dir, "shared_queue"))
+        self.root = root
+        self.lease_seconds = lease_seconds or float(os.getenv("LEASE_SECONDS", "120"))
+        for name in (PENDING, CLAIMED, LEASES, DONE, FAILED):
+            Path(os.path.join(root, name)).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state: str, job_id: str, token: str = None) -> str:
+        # File claimed dan lease memakai token lease di namanya (None = format lama tanpa token)
+        name = f"{job_id}.{token}" if token else job_id
+        return os.path.join(self.root, state, f"{name}.json")
+
+    def _write_json(self, path: str, data: dict):
+        # Tulis ke file sementara unik lalu rename, agar pembaca tidak melihat file setengah jadi
+        tmp_path = f"{path}.tmp.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str) -> dict:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _list(self, state: str) -> list:
+        directory = os.path.join(self.root, state)
+        return sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+
+    def _claimed(self) -> list:
+        """Job yang sedang diklaim: list tuple (job_id, token lease atau None)"""
+        entries = []
+        for name in self._list(CLAIMED):
+            job_id, _, token = name.rpartition(".")
+            if len(token) == 32 and job_id:
+                entries.append((job_id, token))
+            else:
+                entries.append((name, None))
+        return entries
+
+    def submit(self, url: str, options: dict = None, job_id: str = None,
+               priority: str = PRIORITY_INTERACTIVE, duration: float = None) -> str:
+        """
+        Tambah job ke antrian
+
+        Args:
+            url: URL video
+            options: Argumen tambahan untuk analyze_video
+            job_id: ID job (default: waktu + suffix acak)
+            priority: 'interactive' atau 'batch' (didahulukan job interaktif)
+            duration: Durasi video (detik) untuk penjadwalan job pendek lebih dulu
+
+        Returns:
+            ID job
+        """
+        # ID diawali waktu agar urutan nama file = urutan masuk
+        job_id = job_id or f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+        now = time.time()
+        job = {"id": job_id, "url": url, "options": options or {}, "submitted_at": now,
+               "created_at": now, "attempts": 0, "duration": duration, "priority_class": priority,
+               "expected_seconds": estimate_service_seconds(duration)}
+        # Ditulis di luar pending dulu, agar node lain tidak mengklaim file yang belum lengkap
+        staging_path = self._path(LEASES, f"submit-{job_id}")
+        self._write_json(staging_path, job)
+        os.replace(staging_path, self._path(PENDING, job_id))
+        return job_id
+
+    def claim(self, node_id: str) -> dict:
+        """
+        Klaim job pending dengan skor penjadwalan terbaik (job pendek/interaktif dulu, dengan aging)
+
+        Returns:
+            Dict job (dengan field 'lease_token'), atau None jika tidak ada job
+        """
+        pending = []
+        for job_id in self._list(PENDING):
+            job = self._read_json(self._path(PENDING, job_id))
+            if job is not None:
+                job.setdefault("created_at", job.get("submitted_at", 0))
+                pending.append(job)
+
+        for job_id in [job["id"] for job in order_jobs(pending, time.time())]:
+            token = uuid.uuid4().hex
+            claimed_path = self._path(CLAIMED, job_id, token)
+            try:
+                # Rename atomik: jika node lain lebih dulu, file sudah tidak ada
+                os.rename(self._path(PENDING, job_id), claimed_path)
+            except FileNotFoundError:
+                continue
+
+            now = time.time()
+            self._write_json(self._path(LEASES, job_id, token), {
+                "job_id": job_id,
+                "owner": node_id,
+                "token": token,
+                "acquired_at": now,
+                "renewed_at": now,
+                "expires_at": now + self.lease_seconds,
+            })
+            job = self._read_json(claimed_path) or {"id": job_id}
+            job["attempts"] = job.get("attempts", 0) + 1
+            job["claimed_by"] = node_id
+            self._write_json(claimed_path, job)
+            job["lease_token"] = token
+            return job
+        return None
+
+    def heartbeat(self, job_id: str, token: str) -> bool:
+        """
+        Perpanjang lease job. Hanya file lease dengan token pemanggil yang ditulis, jadi
+        heartbeat yang terlambat tidak bisa menimpa lease pemilik baru
+
+        Returns:
+            True jika lease masih milik pemanggil, False jika sudah diambil alih
+        """
+        claimed_path = self._path(CLAIMED, job_id, token)
+        lease_path = self._path(LEASES, job_id, token)
+        lease = self._read_json(lease_path)
+        if lease is None or not os.path.exists(claimed_path):
+            return False
+        now = time.time()
+        lease.update({"renewed_at": now, "expires_at": now + self.lease_seconds})
+        self._write_json(lease_path, lease)
+        if not os.path.exists(claimed_path):
+            # Job di-reclaim di antara pengecekan dan penulisan: lease yang baru ditulis dibuang
+            self._remove(lease_path)
+            return False
+        return True
+
+    def complete(self, job_id: str, token: str, result: dict):
+        """Tandai job selesai (raise LeaseLost jika lease bukan milik pemanggil lagi)"""
+        self._finish(job_id, token, DONE, {"result": result})
+
+    def fail(self, job_id: str, token: str, error: str):
+        """Tandai job gagal (raise LeaseLost jika lease bukan milik pemanggil lagi)"""
+        self._finish(job_id, token, FAILED, {"error": error})
+
+    def _finish(self, job_id: str, token: str, state: str, fields: dict):
+        final_path = self._path(state, job_id)
+        try:
+            # Rename atomik file claimed milik token ini: gagal jika job sudah di-reclaim
+            os.rename(self._path(CLAIMED, job_id, token), final_path)
+        except FileNotFoundError:
+            raise LeaseLost(f"Lease job {job_id} sudah diambil alih node lain")
+        self._remove(self._path(LEASES, job_id, token))
+        job = self._read_json(final_path) or {"id": job_id}
+        job.update(fields)
+        job["finished_at"] = time.time()
+        self._write_json(final_path, job)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def reclaim_expired(self) -> list:
+        """
+        Kembalikan job dengan lease kedaluwarsa ke pending
+
+        Returns:
+            List ID job yang dikembalikan
+        """
+        reclaimed = []
+        now = time.time()
+        for job_id, token in self._claimed():
+            claimed_path = self._path(CLAIMED, job_id, token)
+            lease = self._read_json(self._path(LEASES, job_id, token))
+            if lease:
+                expired = lease.get("expires_at", 0) < now
+            else:
+                try:
+                    # ctime berubah saat rename (mtime tidak), jadi ini waktu klaim
+                    expired = os.stat(claimed_path).st_ctime < now - CLAIM_GRACE_SECONDS
+                except FileNotFoundError:
+                    continue  # Baru saja selesai atau di-reclaim node lain
+            if not expired:
+                continue
+
+            try:
+                # Hanya satu node yang berhasil rename; pemilik lama gagal di heartbeat/complete
+                # berikutnya karena file claimed dengan tokennya sudah tidak ada
+                os.rename(claimed_path, self._path(PENDING, job_id))
+            except FileNotFoundError:
+                continue
+            # Lease lama bisa dihapus tanpa pengecekan: klaim ulang memakai token (file) baru
+            self._remove(self._path(LEASES, job_id, token))
+            reclaimed.append(job_id)
+        return reclaimed
+
+    def get(self, job_id: str) -> dict:
+        """Ambil job beserta statusnya (None jika tidak ada)"""
+        tokens = [token for claimed_id, token in self._claimed() if claimed_id == job_id]
+        paths = [(DONE, self._path(DONE, job_id)), (FAILED, self._path(FAILED, job_id))]
+        paths += [(CLAIMED, self._path(CLAIMED, job_id, token)) for token in tokens]
+        paths.append((PENDING, self._path(PENDING, job_id)))
+        for state, path in paths:
+            job = self._read_json(path)
+            if job is not None:
+                job["status"] = state
+                return job
+        return None
+
+    def counts(self) -> dict:
+        """Jumlah job per status"""
+        return {state: len(self._list(state)) for state in (PENDING, CLAIMED, DONE, FAILED)}
+
+
+def lease_worker_loop(queue: LeaseQueue, handler, node_id: str = None, poll_interval: float = 2.0,
+                      max_jobs: int = None, exit_when_idle: bool = False) -> int:
+    """
+    Loop worker: reclaim lease kedaluwarsa, klaim job, jalankan handler sambil heartbeat
+
+    Args:
+        queue: LeaseQueue pada direktori bersama
+        handler: Fungsi handler(job, token) -> dict hasil; exception = job gagal. token
+                 (CancellationToken) dibatalkan jika lease hilang (diambil alih node lain),
+                 agar job tidak terus berjalan di dua node
+        node_id: ID node (default: hostname-pid-acak)
+        poll_interval: Jeda cek antrian saat kosong (detik)
+        max_jobs: Berhenti setelah sekian job (None = jalan terus)
+        exit_when_idle: Berhenti jika tidak ada job pending maupun yang bisa di-reclaim
+
+    Returns:
+        Jumlah job yang dikerjakan node ini
+    """
+    node_id = node_id or default_node_id()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        reclaimed = queue.reclaim_expired()
+        if reclaimed:
+            print(f"♻️  [{node_id}] Lease kedaluwarsa, job dikembalikan ke antrian: {', '.join(reclaimed)}")
+
+        job = queue.claim(node_id)
+        if job is None:
+            if exit_when_idle and not queue._list(CLAIMED):
+                break
+            time.sleep(poll_interval)
+            continue
+
+        job_id, token = job["id"], job["lease_token"]
+        print(f"▶️  [{node_id}] Job {job_id} (percobaan ke-{job['attempts']}): {job.get('url')}")
+
+        # Heartbeat di thread terpisah selama handler berjalan (3x per periode lease)
+        stop = threading.Event()
+        job_token = CancellationToken(name=f"job {job_id}")
+
+        def beat():
+            while not stop.wait(queue.lease_seconds / 3):
+                if not queue.heartbeat(job_id, token):
+                    print(f"⚠️  [{node_id}] Lease job {job_id} hilang, analisis dihentikan")
+                    job_token.cancel("Lease diambil alih node lain")
+                    return
+
+        heartbeat_thread = threading.Thread(target=beat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            result = handler(job, job_token)
+            error = None
+        except Exception as e:
+            result, error = None, str(e)
+        finally:
+            stop.set()
+            heartbeat_thread.join()
+            job_token.close()
+
+        try:
+            if error is None:
+                queue.complete(job_id, token, result)
+                print(f"✅ [{node_id}] Job {job_id} selesai")
+            else:
+                queue.fail(job_id, token, error)
+                print(f"❌ [{node_id}] Job {job_id} gagal: {error[:100]}")
+        except LeaseLost:
+            # Node lain sudah mengambil alih; hasil stage tetap ada di checkpoint bersama
+            print(f"⚠️  [{node_id}] Lease job {job_id} hilang, hasil diserahkan ke node pengambil alih")
+        processed += 1
+    return processed
+
+
+if __name__ == "__main__":
+    # Usage: python lease_queue.py [submit <url> ...]
+    import sys
+    queue = LeaseQueue()
+    if len(sys.argv) > 2 and sys.argv[1] == "submit":
+        for url in sys.argv[2:]:
+            print(f"📥 {queue.submit(url)}: {url}")
+    print(f"📁 {queue.root}")
+    print(json.dumps(queue.counts(), indent=2))
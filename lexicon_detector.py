@@ -0,0 +1,254 @@
+"""
+Modul deteksi leksikon lokal: semua teks speech dan OCR di-scan sekali dengan automaton
+Aho-Corasick atas daftar kata kasar/vulgar/ancaman (Indonesia + Inggris), setelah normalisasi
+leetspeak ("4nj1ng") dan huruf berulang 3x atau lebih ("anjiiing"). Hasilnya diprioritaskan di
+prompt laporan
+"""
+import os
+import re
+import json
+import hashlib
+from bisect import bisect_right
+from collections import deque, Counter
+
+
+# Leksikon default per kategori. Bisa diganti/ditambah lewat file JSON {kategori: [kata, ...]}
+# di LEXICON_FILE (kategori yang sama menggantikan daftar default)
+DEFAULT_LEXICON = {
+    "vulgar": [
+        "ngewe", "ngentot", "entot", "memek", "kontol", "titit", "jembut", "pepek", "coli",
+        "bokep", "lonte", "perek", "pelacur", "sange", "toket", "pentil",
+        "fuck", "fucking", "motherfucker", "dick", "pussy", "cock", "porn", "slut", "whore",
+    ],
+    "kasar": [
+        "anjing", "anjir", "anjay", "bangsat", "bajingan", "babi", "kampret", "keparat", "tai",
+        "taik", "asu", "jancok", "jancuk", "cok", "kimak", "brengsek", "setan", "sialan",
+        "shit", "bitch", "bastard", "asshole", "damn",
+    ],
+    "hinaan": [
+        "goblok", "goblog", "tolol", "bego", "bodoh", "idiot", "dungu", "autis", "cacat",
+        "jelek", "gendut", "kampungan", "norak", "sampah", "pecundang",
+        "stupid", "loser", "ugly", "retard", "moron",
+    ],
+    "ancaman": [
+        "bunuh", "mati aja", "mampus", "gua bunuh", "gue bunuh", "bakar", "hajar", "gebukin",
+        "awas lo", "awas kau", "habisi",
+        "kill", "kill yourself", "kys", "die",
+    ],
+    "kebencian": [
+        "kafir", "cina", "aseng", "pribumi", "bencong", "banci", "homo", "kadrun", "cebong",
+        "nigger", "faggot",
+    ],
+}
+
+# Kata dicocokkan sebagai kata utuh, boleh dengan imbuhan umum ("dianjing", "ngentotin",
+# "membunuh"), agar "perek" tidak cocok di "perekonomian". Kata sependek ini (setelah
+# normalisasi) harus berdiri sendiri tanpa imbuhan, agar "tai" tidak cocok di "pantai"
+WHOLE_WORD_MAX_LEN = 4
+PREFIXES = {"di", "ke", "se", "me", "mem", "men", "meng", "ber", "ter", "ng", "nge", "pe", "pem", "pen"}
+SUFFIXES = {"nya", "in", "an", "i", "lah", "kan", "mu", "ku", "lo", "lu", "ing", "s", "ed", "er"}
+
+# Karakter leetspeak yang diubah ke huruf
+LEET_MAP = str.maketrans({
+    "4": "a", "@": "a", "3": "e", "1": "i", "0": "o", "5": "s", "$": "s", "7": "t",
+    "8": "b", "9": "g",
+})
+
+# Huruf yang berulang 3x atau lebih ("iii" di "anjiiing")
+LETTER_RUN = re.compile(r"([^\W\d_])\1{2,}")
+
+
+def normalize(text: str) -> str:
+    """
+    Normalisasi teks untuk pencocokan: huruf kecil, leetspeak ke huruf, huruf yang berulang
+    3x atau lebih diringkas menjadi satu ("anjiiiing" -> "anjing"), selain huruf menjadi spasi.
+    Huruf dobel dibiarkan, agar kata biasa seperti "cook"/"good" tidak menjadi "cok"/"god"
+    """
+    text = LETTER_RUN.sub(r"\1", text.lower().translate(LEET_MAP))
+    chars = []
+    for char in text:
+        if not char.isalpha():
+            char = " "
+        if char == " " and chars and chars[-1] == " ":
+            continue
+        chars.append(char)
+    return "".join(chars)
+
+
+def _collapse_doubles(pattern: str) -> str:
+    """Varian pola dengan huruf dobel diringkas ("kill" -> "kil"), agar "killll" tetap cocok"""
+    return "".join(char for i, char in enumerate(pattern) if not i or pattern[i - 1] != char)
+
+
+class LexiconMatcher:
+    def __init__(self, lexicon: dict):
+        """
+        Bangun automaton Aho-Corasick dari leksikon
+
+        Args:
+            lexicon: Dict {kategori: [kata/frasa, ...]}
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for category, terms in lexicon.items():
+            for term in terms:
+                pattern = normalize(term).strip()
+                for variant in {pattern, _collapse_doubles(pattern)} - {""}:
+                    self._add(variant, term, category)
+        self._build_fail_links()
+
+    def _add(self, pattern: str, term: str, category: str):
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append((pattern, term, category))
+
+    def _build_fail_links(self):
+        """BFS: fail link tiap state ke sufiks terpanjang yang juga prefix pola"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str):
+        """
+        Cari semua kata leksikon dalam teks yang sudah dinormalisasi (satu pass)
+
+        Yields:
+            Tuple (posisi awal, posisi akhir, kata asli, kategori)
+        """
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern, term, category in self._output[state]:
+                start = pos - len(pattern) + 1
+                if self._is_word(text, start, pos + 1, affixes=len(pattern) > WHOLE_WORD_MAX_LEN):
+                    yield start, pos + 1, term, category
+
+    @staticmethod
+    def _is_word(text: str, start: int, end: int, affixes: bool) -> bool:
+        """Cek batas kata di kiri/kanan kecocokan (opsional diizinkan imbuhan)"""
+        word_start = text.rfind(" ", 0, start) + 1
+        word_end = text.find(" ", end)
+        word_end = len(text) if word_end < 0 else word_end
+        prefix, suffix = text[word_start:start], text[end:word_end]
+        if not affixes:
+            return not prefix and not suffix
+        return (not prefix or prefix in PREFIXES) and (not suffix or suffix in SUFFIXES)
+
+
+def load_lexicon(path: str = None) -> dict:
+    """Leksikon default digabung dengan file JSON LEXICON_FILE (jika ada)"""
+    lexicon = {category: list(terms) for category, terms in DEFAULT_LEXICON.items()}
+    path = path or os.getenv("LEXICON_FILE")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            lexicon.update(json.load(f))
+    return lexicon
+
+
+def lexicon_hash(lexicon: dict = None) -> str:
+    """Hash leksikon, untuk key checkpoint laporan"""
+    payload = json.dumps(lexicon or load_lexicon(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+_matcher_cache = {}
+
+
+def get_matcher(lexicon: dict = None) -> LexiconMatcher:
+    """Automaton untuk leksikon (dibangun sekali per isi leksikon)"""
+    lexicon = lexicon or load_lexicon()
+    key = lexicon_hash(lexicon)
+    if key not in _matcher_cache:
+        _matcher_cache[key] = LexiconMatcher(lexicon)
+    return _matcher_cache[key]
+
+
+def scan(items: list, lexicon: dict = None) -> list:
+    """
+    Scan semua teks sekaligus: teks dinormalisasi lalu digabung dengan pemisah, automaton
+    dijalankan sekali atas gabungannya, dan setiap hit dipetakan kembali ke item asalnya
+
+    Args:
+        items: List dict dengan key "text" (segmen speech dan/atau OCR)
+        lexicon: Leksikon (default: load_lexicon())
+
+    Returns:
+        List hit {"index", "term", "category", "match"} berurutan sesuai posisi
+    """
+    starts = []
+    parts = []
+    offset = 0
+    for item in items:
+        starts.append(offset)
+        part = " " + normalize(item.get("text", "")) + " "
+        parts.append(part)
+        offset += len(part)
+    corpus = "".join(parts)
+
+    hits = []
+    seen = set()
+    last_span = (-1, -1)
+    for start, end, term, category in get_matcher(lexicon).find(corpus):
+        # Pola yang lebih panjang keluar lebih dulu di posisi yang sama; kata di dalamnya
+        # ("entot" di "ngentot") tidak dihitung lagi
+        if last_span[0] <= start and end <= last_span[1]:
+            continue
+        last_span = (start, end)
+        index = bisect_right(starts, start) - 1
+        if (index, term) in seen:
+            continue
+        seen.add((index, term))
+        hits.append({"index": index, "term": term, "category": category, "match": corpus[start:end]})
+    return hits
+
+
+def summarize_hits(hits: list) -> dict:
+    """Jumlah hit per kategori"""
+    return dict(Counter(hit["category"] for hit in hits))
+
+
+def context_windows(hits: list, total: int, radius: int = 2) -> list:
+    """
+    Rentang item di sekitar hit (radius item sebelum/sesudah), rentang yang bertumpuk digabung
+
+    Returns:
+        List tuple (awal, akhir inklusif) berurutan
+    """
+    windows = []
+    for index in sorted({hit["index"] for hit in hits}):
+        start, end = max(0, index - radius), min(total - 1, index + radius)
+        if windows and start <= windows[-1][1] + 1:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+if __name__ == "__main__":
+    # Test dengan teks dummy
+    samples = [
+        {"text": "halo semua, selamat datang di pantai"},
+        {"text": "dasar 4nj1iiing lo, g0bl0k banget"},
+        {"text": "mati aja sana"},
+    ]
+    for hit in scan(samples):
+        print(f"⚠️  [{hit['category']}] {hit['term']!r} di teks #{hit['index']}: {samples[hit['index']]['text']}")
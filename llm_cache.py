@@ -0,0 +1,155 @@
+"""
+Modul cache respons LLM di disk: key dari hash model, messages, dan parameter sampling, sehingga
+prompt yang sama persis (transkrip, OCR, model, temperature tidak berubah) tidak dikirim ulang ke Groq
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+import metrics
+
+
+# Umur maksimal entry (default 30 hari) dan kuota disk cache (default 200 MB)
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_MB = 200.0
+
+
+def make_key(model: str, messages: list, params: dict) -> str:
+    """Hash stabil dari model, messages, dan parameter sampling (temperature, max_tokens, ...)"""
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_enabled() -> bool:
+    """LLM_CACHE=0 mematikan cache untuk semua request"""
+    return os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+class LLMCache:
+    def __init__(self, cache_dir: str = None, ttl_seconds: float = None, max_bytes: int = None):
+        """
+        Inisialisasi cache respons LLM
+
+        Args:
+            cache_dir: Direktori cache (default: LLM_CACHE_DIR atau downloads/cache/llm)
+            ttl_seconds: Umur maksimal entry (default: LLM_CACHE_TTL_SECONDS atau 30 hari)
+            max_bytes: Kuota disk; entry paling lama tidak dipakai (LRU) dihapus jika terlampaui
+                       (default: LLM_CACHE_MAX_MB atau 200 MB)
+        """
+        if cache_dir is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            cache_dir = os.getenv("LLM_CACHE_DIR", os.path.join(downloads_dir, "cache", "llm"))
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 ** 2)
+
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str):
+        """
+        Ambil respons dari cache
+
+        Returns:
+            Isi respons (str) atau None jika tidak ada / kedaluwarsa
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            metrics.increment("llm_cache_miss")
+            return None
+
+        if self._expired(entry.get("created_at", 0)):
+            self._remove(path)
+            metrics.increment("llm_cache_expired")
+            metrics.increment("llm_cache_miss")
+            return None
+
+        # mtime file dipakai sebagai waktu akses terakhir untuk eviction LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        metrics.increment("llm_cache_hit")
+        return entry.get("response")
+
+    def put(self, key: str, response: str, model: str = None):
+        """Simpan respons (atomik), lalu evict entry lama jika kuota disk terlampaui"""
+        path = self._path(key)
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "model": model, "created_at": time.time(), "response": response},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        metrics.increment("llm_cache_store")
+        self._evict(keep_key=key)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self) -> list:
+        """Daftar (path, ukuran byte, waktu akses terakhir) semua entry"""
+        entries = []
+        for path in Path(self.cache_dir).glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((str(path), stat.st_size, stat.st_mtime))
+        return entries
+
+    def total_size(self) -> int:
+        """Total ukuran cache (byte)"""
+        return sum(size for _, size, _ in self.entries())
+
+    def _evict(self, keep_key: str = None):
+        """Hapus entry kedaluwarsa, lalu entry paling lama tidak dipakai sampai di bawah kuota"""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            now = time.time()
+
+            for path, size, last_access in entries:
+                if os.path.basename(path) == f"{keep_key}.json":
+                    continue
+                # Entry yang tidak diakses lebih lama dari TTL pasti sudah kedaluwarsa
+                stale = bool(self.ttl_seconds) and now - last_access > self.ttl_seconds
+                if not stale and total <= self.max_bytes:
+                    continue
+                self._remove(path)
+                total -= size
+                metrics.increment("llm_cache_evicted")
+
+    def clear(self):
+        """Hapus semua entry"""
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+
+if __name__ == "__main__":
+    # Test: simpan lalu ambil respons dummy
+    cache = LLMCache()
+    key = make_key("test-model", [{"role": "user", "content": "halo"}], {"temperature": 0.5})
+    cache.put(key, "respons dummy", model="test-model")
+    started = time.perf_counter()
+    print(f"✅ Hit: {cache.get(key)!r} dalam {(time.perf_counter() - started) * 1000:.2f} ms")
+    print(f"   Total cache: {cache.total_size() / 1024:.1f} KB, metrik: {metrics.snapshot('llm_cache')}")
@@ -0,0 +1,107 @@
+"""
+Load test laporan Groq terhadap server mock lokal: banyak laporan dijalankan bersamaan dalam
+satu event loop lewat ReportGenerator.agenerate_report dan rate limiter bersama, lalu dicatat
+berapa request yang kena 429 dan throughput yang tercapai dibanding kuota
+"""
+import os
+import sys
+import time
+import tempfile
+import asyncio
+import statistics
+
+from mock_groq_server import MockGroqServer
+from rate_limiter import RateLimiter
+
+
+def fake_transcript(segments: int, seed: int) -> list:
+    """Transkrip dummy (segmen per detik) untuk load test"""
+    return [{"text": f"video {seed} kalimat {idx} tentang topik sehari-hari yang dibahas panjang",
+             "timestamp": f"{idx // 3600:02d}:{idx // 60 % 60:02d}:{idx % 60:02d}"}
+            for idx in range(segments)]
+
+
+async def run_load_test(reports: int = 20, rpm: float = 120, tpm: float = 60000, latency: float = 0.2,
+                        segments: int = 300, limiter: bool = True, mock_options: dict = None,
+                        transcript: dict = None) -> dict:
+    """
+    Jalankan load test
+
+    Args:
+        reports: Jumlah laporan yang dijalankan bersamaan
+        rpm, tpm: Kuota server mock (limiter memakai nilai yang sama)
+        latency: Waktu proses server mock per request
+        segments: Jumlah segmen transkrip tiap laporan (transkrip panjang memakai map-reduce)
+        limiter: Jika False, limiter diberi kuota sangat besar (mensimulasikan tanpa limiter)
+        mock_options: Opsi tambahan MockGroqServer (injeksi error, replay, jitter, ...)
+        transcript: Data asli {"speech_data", "ocr_data", "video_info"} (mis. output JSON
+                    analisis) yang dipakai semua laporan, menggantikan transkrip dummy
+
+    Returns:
+        Dict hasil: durasi, latency per laporan, statistik server mock
+    """
+    mock = MockGroqServer(rpm=rpm, tpm=tpm, latency=latency, **(mock_options or {})).start()
+    os.environ.setdefault("GROQ_API_KEY", "mock")
+    os.environ["LLM_CACHE"] = "0"
+    # Hasil dari server mock tidak boleh mengubah registry kesehatan model dan riwayat usage asli
+    scratch_dir = tempfile.mkdtemp()
+    os.environ["GROQ_MODEL_HEALTH_FILE"] = os.path.join(scratch_dir, "model_health.json")
+    os.environ["LLM_USAGE_FILE"] = os.path.join(scratch_dir, "llm_usage.json")
+
+    from report_generator import ReportGenerator
+    shared = RateLimiter(rpm=rpm, tpm=tpm) if limiter else RateLimiter(rpm=10 ** 6, tpm=10 ** 9)
+    generator = ReportGenerator(limiter=shared, base_url=mock.url)
+    latencies = []
+
+    async def one(idx: int):
+        started = time.monotonic()
+        if transcript:
+            await generator.agenerate_report(transcript.get("speech_data", []), transcript.get("ocr_data", []),
+                                             transcript.get("video_info"))
+        else:
+            await generator.agenerate_report(fake_transcript(segments, idx), [], {"title": f"video {idx}"})
+        latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(one(idx) for idx in range(reports)), return_exceptions=True)
+    elapsed = time.monotonic() - started
+    mock.stop()
+
+    failed = [result for result in results if isinstance(result, Exception)]
+    return {
+        "reports": reports,
+        "failed": len(failed),
+        "elapsed": elapsed,
+        "latency_mean": statistics.mean(latencies) if latencies else None,
+        "latency_max": max(latencies) if latencies else None,
+        "latency_p95": sorted(latencies)[int(0.95 * (len(latencies) - 1))] if latencies else None,
+        "server": dict(mock.stats),
+        "achieved_rpm": mock.stats["accepted"] / elapsed * 60,
+        "achieved_tpm": mock.stats["tokens"] / elapsed * 60,
+    }
+
+
+def print_result(result: dict, rpm: float, tpm: float):
+    server = result["server"]
+    print(f"\n📊 {result['reports']} laporan dalam {result['elapsed']:.1f} detik "
+          f"({result['failed']} gagal)")
+    print(f"   Latency laporan: rata-rata {result['latency_mean'] or 0:.1f} s, "
+          f"maks {result['latency_max'] or 0:.1f} s")
+    print(f"   Request: {server['accepted']} diterima, {server['rate_limited']} kena 429 "
+          f"({server['rate_limited'] / max(1, server['requests']):.0%})")
+    print(f"   Throughput: {result['achieved_rpm']:.0f}/{rpm:g} RPM, "
+          f"{result['achieved_tpm']:.0f}/{tpm:g} TPM")
+
+
+if __name__ == "__main__":
+    # Usage: python load_test_groq.py [jumlah_laporan] [rpm] [tpm] [--no-limiter]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    reports = int(args[0]) if len(args) > 0 else 20
+    rpm = float(args[1]) if len(args) > 1 else 120
+    tpm = float(args[2]) if len(args) > 2 else 60000
+    use_limiter = "--no-limiter" not in sys.argv
+
+    print(f"🧪 Load test: {reports} laporan bersamaan, kuota {rpm:g} RPM / {tpm:g} TPM, "
+          f"limiter {'aktif' if use_limiter else 'nonaktif'}")
+    result = asyncio.run(run_load_test(reports, rpm, tpm, limiter=use_limiter))
+    print_result(result, rpm, tpm)
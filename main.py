@@ -5,29 +5,173 @@ Menggabungkan semua modul: download, audio extract, speech-to-text, OCR, dan rep
 import os
 import sys
 import json
+import threading
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Import modul-modul kita
-from video_downloader import download_video
-from audio_extractor import extract_audio
-from speech_to_text import SpeechToText
+from video_downloader import download_video, download_streams
+from download_cache import read_sidecar
+from pipeline_plan import plan_pipeline, fetch_metadata
+from progressive import ProgressiveTranscriber
+from pipeline_dag import PipelineDAG
+from checkpoint import JobCheckpoint
+from cancellation import CancellationToken, JobCancelled
+from media_reader import SharedMediaReader, probe_media
+from resource_planner import WHISPER_MODELS, plan_resources, print_plan, record_run
+from speech_to_text import SpeechToText, WINDOW_SECONDS
 from ocr_extractor import extract_text_from_frames
-from report_generator import ReportGenerator
+from report_generator import ReportGenerator, report_config
 from pdf_generator import create_pdf_report
 
 # Load environment variables
 load_dotenv()
 
+# Deadline seluruh analisis satu video (detik, 0 = tanpa batas)
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "14400"))
 
-def analyze_video(video_url: str, output_format: str = "all"):
+# Deadline per stage: (detik dasar, detik tambahan per detik durasi video).
+# Bisa diganti per stage dengan STAGE_TIMEOUT_<NAMA>, mis. STAGE_TIMEOUT_TRANSCRIBE=7200
+STAGE_TIMEOUTS = {
+    "plan": (120, 0),
+    "download_audio": (1800, 0),
+    "download_video": (1800, 0),
+    "demux": (300, 0),
+    "transcribe": (600, 4.0),
+    "ocr": (600, 2.0),
+    "report": (600, 0.1),
+}
+
+# Akhiran file laporan sementara yang ditulis bertahap saat streaming (dibaca live oleh UI,
+# dihapus setelah laporan selesai atau gagal)
+LIVE_REPORT_SUFFIX = ".live.txt"
+
+
+def stage_timeout(name: str, duration: float = None) -> float:
+    """
+    Deadline stage (detik) dari konfigurasi dan durasi video
+
+    Returns:
+        Detik, atau None jika stage tidak punya deadline sendiri (tetap dibatasi deadline job)
+    """
+    override = os.getenv(f"STAGE_TIMEOUT_{name.upper()}")
+    if override:
+        return float(override) or None
+    base, per_second = STAGE_TIMEOUTS.get(name, (None, 0))
+    if base is None or (per_second and not duration):
+        return None  # Durasi tidak diketahui: hanya deadline job yang berlaku
+    return base + per_second * (duration or 0)
+
+
+def lookup_duration(video_url: str) -> tuple:
+    """
+    Durasi video sebelum download, untuk perencanaan resource
+
+    Returns:
+        Tuple (durasi detik atau None, metadata yt-dlp atau None). Metadata diteruskan ke
+        plan_pipeline agar info lengkap yt-dlp tetap dipakai ulang oleh download
+    """
+    try:
+        if os.path.isfile(video_url):
+            return probe_media(video_url)["duration"], None
+        metadata = fetch_metadata(video_url)
+        return metadata.get("duration"), metadata
+    except Exception as e:
+        print(f"   ⚠️  Durasi video tidak diketahui: {str(e)[:100]}")
+        return None, None
+
+
+def transcribe_with_fallback(transcribe_fn, models_to_try: list = None, num_threads: int = None,
+                             result_info: dict = None) -> list:
+    """
+    Jalankan transkripsi dengan fallback model Whisper dari yang paling akurat ke yang paling kecil
+    
+    Args:
+        transcribe_fn: Fungsi yang menerima instance SpeechToText dan mengembalikan list segmen
+        models_to_try: Urutan ukuran model (default: medium, small, base, tiny)
+        num_threads: Jumlah thread torch untuk Whisper (opsional)
+        result_info: Dict opsional yang diisi {"model": ukuran model yang berhasil}
+        
+    Returns:
+        List segmen transkripsi
+    """
+    # Coba model dari yang paling akurat ke yang paling kecil
+    models_to_try = models_to_try or WHISPER_MODELS
+    
+    for model_size in models_to_try:
+        try:
+            print(f"   Mencoba model: {model_size}")
+            stt = SpeechToText.shared(model_size=model_size, num_threads=num_threads)
+            speech_data = transcribe_fn(stt)
+            print(f"   ✅ Berhasil dengan model: {model_size}")
+            if result_info is not None:
+                result_info["model"] = model_size
+            if model_size in ["tiny", "base"]:
+                print(f"   ⚠️  Model '{model_size}' kurang akurat untuk kata slang/vulgar")
+                print(f"   💡 Rekomendasi: download model 'medium' untuk akurasi maksimal")
+                print(f"      Jalankan: python -c \"import whisper; whisper.load_model('medium')\"")
+            return speech_data
+        except JobCancelled:
+            raise  # Dibatalkan/deadline: jangan coba model lain
+        except Exception as e:
+            error_msg = str(e)
+            if "out of memory" in error_msg.lower() or "oom" in error_msg.lower():
+                print(f"   ⚠️  Model {model_size} terlalu besar untuk RAM, coba model lebih kecil...")
+                continue
+            elif model_size == models_to_try[-1]:
+                # Model terakhir juga gagal
+                print(f"\n❌ Semua model gagal. Error: {error_msg}")
+                print("\n📝 Solusi:")
+                print("   1. Download model secara manual:")
+                print("      python -c \"import whisper; whisper.load_model('base')\"")
+                print("   2. Cek koneksi internet")
+                print("   3. Restart terminal dan coba lagi")
+                raise
+            else:
+                print(f"   ⚠️  Error dengan model {model_size}: {error_msg[:100]}...")
+                print(f"   Mencoba model yang lebih kecil...")
+                continue
+    
+    raise Exception("Gagal melakukan transcribe dengan semua model")
+
+
+def analyze_video(video_url: str, output_format: str = "all", enable_ocr: bool = True,
+                  ocr_interval: int = None, split_streams: bool = True, progressive: bool = False,
+                  resume: bool = True, output_dir: str = None, cpu_budget: int = None,
+                  ocr_executor=None, token: CancellationToken = None, timeout: float = None,
+                  target_seconds: float = None, llm_cache: bool = True) -> dict:
     """
     Analisis video lengkap dari URL hingga menghasilkan laporan
     
     Args:
         video_url: URL video (YouTube, dll)
         output_format: Format output ('txt', 'pdf', 'json', 'all')
+        enable_ocr: Jika False, OCR dilewati dan hanya stream audio yang didownload
+        ocr_interval: Interval pengambilan frame untuk OCR (detik). None = dipilih oleh
+                      resource_planner dari durasi video dan target waktu
+        split_streams: Jika True, stream audio dan video resolusi rendah didownload
+                       paralel dan transkripsi dimulai begitu audio selesai
+        progressive: Jika True, audio ditranskripsi per potongan selagi masih didownload
+                     (butuh durasi dari metadata)
+        resume: Jika True, stage yang checkpoint-nya masih valid (input dan konfigurasi
+                sama) tidak dijalankan ulang. Jika False, semua stage dijalankan dari awal
+        output_dir: Direktori laporan (default: OUTPUT_DIR atau output)
+        cpu_budget: Total core untuk pipeline video ini (default: PIPELINE_CPUS)
+        ocr_executor: ThreadPoolExecutor OCR bersama antar job (opsional, mode batch)
+        token: CancellationToken dari pemanggil (opsional), mis. worker yang menerima
+               pembatalan dari UI. Stage berhenti dan subprocess dimatikan saat dibatalkan
+        timeout: Deadline seluruh analisis (detik, default: JOB_TIMEOUT_SECONDS)
+        target_seconds: Target waktu selesai (detik). Ukuran model Whisper, interval OCR, dan
+                        pembagian core dipilih agar perkiraan waktu proses masuk target
+        llm_cache: Jika False, respons Groq tidak diambil dari cache LLM di disk
+    
+    Returns:
+        Dict ringkasan: {"video_info", "files", "speech_segments", "ocr_frames"}
+    
+    Raises:
+        JobCancelled: Jika token dibatalkan (DeadlineExceeded jika deadline job/stage lewat)
+        Exception: Jika salah satu stage gagal (hasil stage yang selesai tetap di-checkpoint)
     """
     print("="*60)
     print("🎬 VIDEO AI ANALYZER - Sistem Analisis Video dengan AI")
@@ -36,7 +180,7 @@ def analyze_video(video_url: str, output_format: str = "all"):
     
     # Setup direktori
     downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
-    output_dir = os.getenv("OUTPUT_DIR", "output")
+    output_dir = output_dir or os.getenv("OUTPUT_DIR", "output")
     Path(downloads_dir).mkdir(parents=True, exist_ok=True)
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
@@ -45,81 +189,251 @@ def analyze_video(video_url: str, output_format: str = "all"):
         "analyzed_at": datetime.now().isoformat()
     }
     
+    # Checkpoint hasil stage per input, agar run yang gagal bisa dilanjutkan
+    checkpoint = JobCheckpoint(video_url)
+    if resume:
+        video_info.update({key: value for key, value in checkpoint.load_info().items()
+                           if key not in video_info})
+    
+    # Stage yang berjalan paralel (download audio dan video di mode split) sama-sama mengubah
+    # video_info: setiap perubahan dan snapshot ke checkpoint lewat satu lock
+    info_lock = threading.Lock()
+    
+    def update_info(change):
+        """Jalankan change(video_info) di bawah lock lalu simpan snapshot-nya ke checkpoint"""
+        with info_lock:
+            change(video_info)
+            checkpoint.save_info(dict(video_info))
+    
+    # Token job: turunan token pemanggil dengan deadline job. Ditutup di akhir agar download
+    # atau ffmpeg yang masih berjalan di background ikut berhenti
+    if timeout is None:
+        timeout = JOB_TIMEOUT_SECONDS
+    job_token = (token or CancellationToken()).child("analisis", timeout or None)
+    
     try:
-        # Step 1: Download video
-        print("\n[1/5] 📥 Download Video...")
-        video_path = download_video(video_url, downloads_dir)
-        video_info["video_path"] = video_path
-        video_info["title"] = os.path.basename(video_path)
-        
-        # Step 2: Ekstrak audio
-        print("\n[2/5] 🎵 Ekstrak Audio...")
-        audio_path = extract_audio(video_path, downloads_dir)
+        # Pipeline sebagai DAG stage: STT dan OCR berjalan paralel karena sama-sama
+        # hanya butuh hasil download. Budget CPU dibagi agar thread torch (Whisper)
+        # dan worker Tesseract tidak berebut core.
+        dag = PipelineDAG(cpu_budget=cpu_budget, checkpoint=checkpoint, token=job_token)
+        use_split = split_streams and (enable_ocr or progressive)
         
-        # Step 3: Speech-to-text dengan Whisper
-        print("\n[3/5] 🎤 Speech-to-Text (Whisper)...")
+        # Rencana resource (model Whisper, interval OCR, pembagian core) dari durasi video,
+        # core, RAM, dan target waktu. Job yang dilanjutkan memakai rencana sebelumnya agar
+        # key checkpoint stage tidak berubah
+        resource_plan = video_info.get("resource_plan") if resume else None
+        metadata = None
+        if not (resource_plan and resource_plan.get("target_seconds") == target_seconds
+                and bool(resource_plan.get("ocr_interval")) == enable_ocr
+                and ocr_interval in (None, resource_plan.get("ocr_interval"))):
+            duration = video_info.get("duration")
+            if not duration:
+                duration, metadata = lookup_duration(video_url)
+            resource_plan = plan_resources(duration, dag.budget.total, target_seconds=target_seconds,
+                                           enable_ocr=enable_ocr, ocr_interval=ocr_interval,
+                                           loaded_models=SpeechToText.loaded_models())
+            update_info(lambda info: info.update(resource_plan=resource_plan))
+        print_plan(resource_plan)
+        ocr_interval = resource_plan["ocr_interval"]
+        whisper_models = resource_plan["whisper_models"]
+        stt_cpus = resource_plan["stt_cpus"]
+        ocr_cpus = resource_plan["ocr_cpus"]
+        whisper_used = {}
         
-        # Coba model dari yang paling akurat ke yang paling kecil
-        models_to_try = ["medium", "small", "base", "tiny"]
-        speech_data = None
-        
-        for model_size in models_to_try:
+        def stage_plan(results, cpus, token):
+            # Step 1: Rencanakan pipeline dari metadata, lalu mulai download stream yang dibutuhkan
+            print("\n[1/5] 📥 Download Video...")
             try:
-                print(f"   Mencoba model: {model_size}")
-                stt = SpeechToText(model_size=model_size)
-                speech_data = stt.transcribe(audio_path, language="id", no_filter=True)
-                print(f"   ✅ Berhasil dengan model: {model_size}")
-                if model_size in ["tiny", "base"]:
-                    print(f"   ⚠️  Model '{model_size}' kurang akurat untuk kata slang/vulgar")
-                    print(f"   💡 Rekomendasi: download model 'medium' untuk akurasi maksimal")
-                    print(f"      Jalankan: python -c \"import whisper; whisper.load_model('medium')\"")
-                break
+                planned = plan_pipeline(video_url, enable_ocr=enable_ocr, ocr_interval=ocr_interval,
+                                        metadata=metadata)
+                with info_lock:
+                    video_info.update(planned)
             except Exception as e:
-                error_msg = str(e)
-                if "out of memory" in error_msg.lower() or "oom" in error_msg.lower():
-                    print(f"   ⚠️  Model {model_size} terlalu besar untuk RAM, coba model lebih kecil...")
-                    continue
-                elif model_size == models_to_try[-1]:
-                    # Model terakhir juga gagal
-                    print(f"\n❌ Semua model gagal. Error: {error_msg}")
-                    print("\n📝 Solusi:")
-                    print("   1. Download model secara manual:")
-                    print("      python -c \"import whisper; whisper.load_model('base')\"")
-                    print("   2. Cek koneksi internet")
-                    print("   3. Restart terminal dan coba lagi")
-                    raise
-                else:
-                    print(f"   ⚠️  Error dengan model {model_size}: {error_msg[:100]}...")
-                    print(f"   Mencoba model yang lebih kecil...")
-                    continue
-        
-        if speech_data is None:
-            raise Exception("Gagal melakukan transcribe dengan semua model")
-        
-        # Step 4: OCR dari frame video
-        print("\n[4/5] 📸 OCR dari Frame Video...")
-        ocr_data = extract_text_from_frames(video_path, interval=5, output_dir=downloads_dir)
-        
-        # Step 5: Generate laporan dengan Groq
-        print("\n[5/5] 🤖 Generate Laporan dengan Groq AI...")
-        report_gen = ReportGenerator()
-        report_text = report_gen.generate_report(speech_data, ocr_data, video_info)
+                # Metadata gagal diambil, lanjut download dengan format default
+                print(f"   ⚠️  Gagal mengambil metadata: {str(e)[:100]}...")
+            if use_split:
+                # Audio dan video didownload paralel, stage berikutnya hanya menunggu stream yang dibutuhkan
+                # Download berjalan di background melewati stage ini, jadi memakai token job
+                return download_streams(video_url, downloads_dir, video_info=video_info,
+                                        progressive=progressive, token=job_token)
+            return None
         
-        # Simpan hasil
+        def stage_download_audio(results, cpus, token):
+            streams = results["plan"]
+            if streams is not None:
+                media_path = token.result(streams["audio"])
+            else:
+                media_path = download_video(video_url, downloads_dir, video_info=video_info, token=token)
+            sidecar = read_sidecar(media_path)
+            
+            def change(info):
+                info.pop("_info", None)  # Info mentah yt-dlp tidak perlu dibawa ke stage berikutnya
+                if not info.get("title"):
+                    info["title"] = sidecar.get("title") or os.path.basename(media_path)
+                if not info.get("duration"):
+                    info["duration"] = sidecar.get("duration")
+                if streams is None:
+                    # Satu file berisi audio dan video; di mode split path video diisi stage download_video
+                    info["video_path"] = media_path
+            update_info(change)
+            return media_path
+        
+        def stage_demux(results, cpus, token):
+            # Step 2: Decode audio (dan frame OCR jika satu file) dengan satu proses ffmpeg
+            print("\n[2/5] 🎵 Decode Audio...")
+            # Jika audio dan video satu file, frame OCR ikut diambil dari decode yang sama
+            frame_interval = ocr_interval if enable_ocr and not use_split else None
+            # Audio tidak perlu didecode jika transkripsi diambil dari checkpoint
+            # ffmpeg tetap berjalan setelah stage ini selesai (dibaca transcribe dan OCR), jadi memakai token job
+            return SharedMediaReader(results["download_audio"], want_audio=not dag.is_cached("transcribe"),
+                                     frame_interval=frame_interval, token=job_token).start()
+        
+        def stage_transcribe(results, cpus, token):
+            # Step 3: Speech-to-text dengan Whisper
+            if progressive:
+                # Ekstrak audio dan transkripsi per potongan selagi download berjalan
+                print("\n[2-3/5] 🎤 Ekstrak Audio + Speech-to-Text (Whisper, progresif)...")
+                streams = results["plan"]
+                return transcribe_with_fallback(
+                    lambda stt: ProgressiveTranscriber(stt, downloads_dir, token=token).run(
+                        streams["audio"], streams["audio_progress"], video_info.get("duration")
+                    ),
+                    models_to_try=whisper_models, num_threads=cpus, result_info=whisper_used
+                )
+            print("\n[3/5] 🎤 Speech-to-Text (Whisper)...")
+            audio = results["demux"].audio()
+            return transcribe_with_fallback(
+                lambda stt: stt.transcribe(audio, language="id", no_filter=True, token=token),
+                models_to_try=whisper_models, num_threads=cpus, result_info=whisper_used
+            )
+        
+        def stage_download_video(results, cpus, token):
+            video_path = token.result(results["plan"]["video"])
+            update_info(lambda info: info.update(video_path=video_path))
+            return video_path
+        
+        def stage_ocr(results, cpus, token):
+            # Step 4: OCR dari frame video
+            print("\n[4/5] 📸 OCR dari Frame Video...")
+            if use_split:
+                return extract_text_from_frames(results["download_video"], interval=ocr_interval,
+                                                output_dir=downloads_dir, workers=max(1, cpus),
+                                                executor=ocr_executor, token=token)
+            # Frame dari decode bersama dengan audio, file tidak dibuka ulang
+            return extract_text_from_frames(results["download_audio"], interval=ocr_interval,
+                                            output_dir=downloads_dir, workers=max(1, cpus),
+                                            frames=results["demux"].frames(), executor=ocr_executor,
+                                            token=token)
+        
+        # Nama file laporan ditentukan di awal agar laporan bisa ditulis bertahap selama streaming
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         base_name = f"report_{timestamp}"
+        stream_path = os.path.join(output_dir, f"{base_name}{LIVE_REPORT_SUFFIX}")
+        
+        def stage_report(results, cpus, token):
+            # Step 5: Generate laporan dengan Groq
+            print("\n[5/5] 🤖 Generate Laporan dengan Groq AI...")
+            report_gen = ReportGenerator(use_cache=llm_cache)
+            # Teks laporan ditambahkan ke file begitu diterima (dibaca live oleh UI)
+            try:
+                with open(stream_path, "w", encoding="utf-8") as stream_file:
+                    def write_chunk(piece):
+                        stream_file.write(piece)
+                        stream_file.flush()
+                    
+                    report = report_gen.generate_report(results["transcribe"], results.get("ocr", []),
+                                                        video_info, token=token, on_chunk=write_chunk)
+                    # Token dan latency Groq ikut tersimpan di output JSON
+                    update_info(lambda info: info.update(llm_usage=report_gen.last_usage))
+                    return report
+            except BaseException:
+                # Laporan yang terpotong tidak disimpan
+                if os.path.exists(stream_path):
+                    os.remove(stream_path)
+                raise
+        
+        # Konfigurasi tiap stage masuk ke key checkpoint; file download divalidasi masih ada
+        file_exists = lambda path: bool(path) and os.path.exists(path)
+        transcribe_config = {"models": whisper_models, "language": "id",
+                             "no_filter": True, "window": WINDOW_SECONDS}
+        # Deadline dihitung saat stage dimulai, setelah durasi diketahui dari metadata
+        timeout_for = lambda name: lambda: stage_timeout(name, video_info.get("duration"))
+        ocr_config = {"interval": ocr_interval, "lang": "ind+eng"}
+        
+        dag.add("plan", stage_plan, cpus=0, timeout=timeout_for("plan"))
+        dag.add("download_audio", stage_download_audio, deps=["plan"], cpus=0,
+                checkpoint_config={"split": use_split, "progressive": progressive}, validate=file_exists,
+                timeout=timeout_for("download_audio"))
+        if progressive and use_split:
+            def progressive_timeout():
+                # Transkripsi progresif ikut menunggu download, jadi deadline download ditambahkan
+                transcribe_timeout = stage_timeout("transcribe", video_info.get("duration"))
+                return transcribe_timeout and transcribe_timeout + (stage_timeout("download_audio") or 0)
+            
+            dag.add("transcribe", stage_transcribe, deps=["plan"], cpus=stt_cpus,
+                    checkpoint_config=transcribe_config, timeout=progressive_timeout)
+            # Judul/durasi dari sidecar download dibutuhkan laporan
+            report_deps = ["download_audio", "transcribe"]
+        else:
+            progressive = False
+            dag.add("demux", stage_demux, deps=["download_audio"], cpus=0, timeout=timeout_for("demux"))
+            dag.add("transcribe", stage_transcribe, deps=["demux"], cpus=stt_cpus,
+                    checkpoint_config=transcribe_config, timeout=timeout_for("transcribe"))
+            report_deps = ["transcribe"]
+        if enable_ocr:
+            if use_split:
+                dag.add("download_video", stage_download_video, deps=["plan"], cpus=0,
+                        checkpoint_config={"split": True}, validate=file_exists,
+                        timeout=timeout_for("download_video"))
+                dag.add("ocr", stage_ocr, deps=["download_video"], cpus=ocr_cpus,
+                        checkpoint_config=ocr_config, timeout=timeout_for("ocr"))
+            else:
+                dag.add("ocr", stage_ocr, deps=["download_audio", "demux"], cpus=ocr_cpus,
+                        checkpoint_config=ocr_config, timeout=timeout_for("ocr"))
+            report_deps.append("ocr")
+        else:
+            print("   ⏭️  OCR dinonaktifkan, dilewati")
+        dag.add("report", stage_report, deps=report_deps, cpus=0, checkpoint_config=report_config(),
+                timeout=timeout_for("report"))
+        
+        if not resume:
+            for name in dag.stages:
+                checkpoint.invalidate(name)
+        
+        results = dag.run(targets=["transcribe", "ocr", "report"] if enable_ocr else ["transcribe", "report"])
+        speech_data = results["transcribe"]
+        ocr_data = results.get("ocr", [])
+        report_text = results["report"]
+        if results.get("download_video"):
+            # Juga saat stage download_video diambil dari checkpoint (tidak dijalankan)
+            video_info["video_path"] = results["download_video"]
+        video_info["pipeline"] = dag.report()
+        dag.print_report()
+        
+        # Throughput terukur untuk kalibrasi rencana berikutnya (transkripsi progresif ikut
+        # menunggu download, jadi waktunya tidak dipakai)
+        resource_plan["actual_seconds"] = video_info["pipeline"]["total_seconds"]
+        record_run(resource_plan, video_info["pipeline"]["stages"], video_info.get("duration"),
+                   whisper_used.get("model"), skip=["transcribe"] if progressive else [])
+        
+        # Simpan hasil
+        files = {}
+        if os.path.exists(stream_path):
+            os.remove(stream_path)
         
         # Simpan sebagai teks
         if output_format in ["txt", "all"]:
             txt_path = os.path.join(output_dir, f"{base_name}.txt")
             with open(txt_path, "w", encoding="utf-8") as f:
                 f.write(report_text)
+            files["txt"] = txt_path
             print(f"✅ Laporan teks disimpan: {txt_path}")
         
         # Simpan sebagai PDF
         if output_format in ["pdf", "all"]:
             pdf_path = os.path.join(output_dir, f"{base_name}.pdf")
             create_pdf_report(report_text, pdf_path, video_info, speech_data, ocr_data)
+            files["pdf"] = pdf_path
         
         # Simpan sebagai JSON
         if output_format in ["json", "all"]:
@@ -132,6 +446,7 @@ def analyze_video(video_url: str, output_format: str = "all"):
             }
             with open(json_path, "w", encoding="utf-8") as f:
                 json.dump(json_data, f, indent=2, ensure_ascii=False)
+            files["json"] = json_path
             print(f"✅ Data JSON disimpan: {json_path}")
         
         print("\n" + "="*60)
@@ -152,32 +467,90 @@ def analyze_video(video_url: str, output_format: str = "all"):
             print("...")
         print("-" * 60)
         
+        return {
+            "video_info": video_info,
+            "files": files,
+            "speech_segments": len(speech_data),
+            "ocr_frames": len(ocr_data),
+        }
+        
+    except JobCancelled as e:
+        print(f"\n⏹️  Analisis dihentikan: {str(e)}")
+        print(f"   💡 Hasil stage yang selesai tersimpan di {checkpoint.job_dir}, "
+              f"jalankan ulang untuk melanjutkan")
+        raise
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
+        print(f"   💡 Hasil stage yang selesai tersimpan di {checkpoint.job_dir}, "
+              f"jalankan ulang untuk melanjutkan")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
+        raise
+    finally:
+        job_token.cancel("Analisis selesai")
+        job_token.close()
 
 
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <video_url> [output_format]")
+    args = []
+    options = {"resume": True, "llm_cache": True, "batch": None, "workers": None, "target": None}
+    argv = sys.argv[1:]
+    while argv:
+        arg = argv.pop(0)
+        if arg == "--no-resume":
+            options["resume"] = False
+        elif arg == "--no-llm-cache":
+            options["llm_cache"] = False
+        elif arg in ("--batch", "--workers", "--target") and argv:
+            options[arg[2:]] = argv.pop(0)
+        else:
+            args.append(arg)
+    
+    if len(args) < 1 and options["batch"] is None:
+        print("Usage: python main.py <video_url> [output_format] [--no-resume] [--no-llm-cache] [--target DETIK]")
+        print("       python main.py --batch <file_url|-> [output_format] [--workers N] [--no-resume]")
         print("\nContoh:")
         print("  python main.py https://www.youtube.com/watch?v=xxx")
         print("  python main.py https://www.youtube.com/watch?v=xxx pdf")
+        print("  python main.py --batch urls.txt json --workers 4")
+        print("  cat urls.txt | python main.py --batch -")
         print("\nOutput format: txt, pdf, json, all (default: all)")
+        print("--no-resume: abaikan checkpoint dan jalankan semua stage dari awal")
+        print("--no-llm-cache: kirim ulang prompt laporan ke Groq walau responsnya ada di cache")
+        print("--batch: proses banyak URL (satu per baris) dari file atau stdin ('-')")
+        print("--workers: jumlah video yang diproses paralel (default: BATCH_WORKERS atau 2)")
+        print("--target: target waktu selesai (detik); model Whisper dan interval OCR disesuaikan")
         sys.exit(1)
     
-    video_url = sys.argv[1]
-    output_format = sys.argv[2] if len(sys.argv) > 2 else "all"
+    if options["batch"] is not None:
+        output_format = args[0] if args else "all"
+    else:
+        video_url = args[0]
+        output_format = args[1] if len(args) > 1 else "all"
     
     if output_format not in ["txt", "pdf", "json", "all"]:
         print(f"❌ Format output tidak valid: {output_format}")
         print("   Pilih: txt, pdf, json, atau all")
         sys.exit(1)
     
-    analyze_video(video_url, output_format)
+    if options["batch"] is not None:
+        from batch_runner import read_urls, run_batch
+        if options["batch"] == "-":
+            urls = read_urls(sys.stdin)
+        else:
+            with open(options["batch"], "r", encoding="utf-8") as f:
+                urls = read_urls(f)
+        workers = int(options["workers"]) if options["workers"] else None
+        summary = run_batch(urls, output_format, workers=workers, resume=options["resume"])
+        sys.exit(0 if summary["failed"] == 0 else 1)
+    
+    try:
+        target = float(options["target"]) if options["target"] else None
+        analyze_video(video_url, output_format, resume=options["resume"], target_seconds=target,
+                      llm_cache=options["llm_cache"])
+    except Exception:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,292 @@
+"""
+Modul pembaca media bersama: file video di-demux dan didecode SEKALI oleh satu proses ffmpeg,
+lalu audio PCM dan frame sampel dibagikan ke konsumen (Whisper dan OCR)
+"""
+import os
+import json
+import struct
+import tempfile
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+
+
+# Sample rate yang dipakai Whisper
+SAMPLE_RATE = 16000
+
+# Frame sampel yang ditahan di memori; frame berikutnya ditulis ke file sementara sampai OCR
+# menyusul, jadi ffmpeg (dan audio untuk Whisper) tidak pernah tertahan oleh OCR yang lambat
+FRAME_BUFFER_SIZE = 64
+
+
+def probe_media(path: str) -> dict:
+    """
+    Ambil info stream dengan ffprobe
+
+    Returns:
+        Dict dengan format:
+        {"duration": 12.3, "has_audio": True, "has_video": True, "width": 854, "height": 480, "fps": 30.0}
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration:stream=codec_type,width,height,avg_frame_rate:stream_tags=rotate:stream_side_data=rotation',
+        '-of', 'json',
+        path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    data = json.loads(result.stdout or "{}")
+
+    info = {"duration": None, "has_audio": False, "has_video": False, "width": None, "height": None, "fps": None}
+    try:
+        info["duration"] = float(data.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        pass
+
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "audio":
+            info["has_audio"] = True
+        elif stream.get("codec_type") == "video" and not info["has_video"]:
+            info["has_video"] = True
+            width, height = stream.get("width"), stream.get("height")
+            # ffmpeg memutar frame otomatis sesuai metadata rotasi, jadi ukuran output tertukar
+            rotation = stream.get("tags", {}).get("rotate")
+            for side_data in stream.get("side_data_list", []):
+                rotation = side_data.get("rotation", rotation)
+            if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+                width, height = height, width
+            info["width"], info["height"] = width, height
+            num, _, den = (stream.get("avg_frame_rate") or "0/0").partition("/")
+            if den and float(den) > 0:
+                info["fps"] = float(num) / float(den)
+    return info
+
+
+class FrameBuffer:
+    def __init__(self, capacity: int = FRAME_BUFFER_SIZE):
+        """
+        Antrian FIFO frame (timestamp, frame uint8) tanpa batas tapi dengan memori terbatas:
+        sampai capacity frame disimpan di memori, sisanya di file sementara (dihapus otomatis)
+        """
+        self.capacity = capacity
+        self._memory = deque()
+        self._cond = threading.Condition()
+        self._spill = None
+        self._shape = None
+        self._written = 0  # Frame di file sementara
+        self._read = 0
+        self._finished = False
+
+    def put(self, timestamp: float, frame: np.ndarray):
+        with self._cond:
+            # Selama masih ada frame di file, frame baru ikut ke file agar urutan tetap
+            if self._read == self._written and len(self._memory) < self.capacity:
+                self._memory.append((timestamp, frame))
+            else:
+                if self._spill is None:
+                    self._spill = tempfile.TemporaryFile()
+                self._shape = frame.shape
+                self._spill.seek(self._written * self._record_size())
+                self._spill.write(struct.pack("d", timestamp) + frame.tobytes())
+                self._written += 1
+            self._cond.notify()
+
+    def finish(self):
+        """Tandai tidak ada frame lagi"""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def get(self):
+        """Frame berikutnya (menunggu jika belum ada), atau None setelah finish()"""
+        with self._cond:
+            while not self._memory and self._read == self._written and not self._finished:
+                self._cond.wait()
+            if self._memory:
+                return self._memory.popleft()
+            if self._read == self._written:
+                return None
+            self._spill.seek(self._read * self._record_size())
+            record = self._spill.read(self._record_size())
+            self._read += 1
+            if self._read == self._written:
+                # File sudah terbaca semua: dipakai lagi dari awal
+                self._read = self._written = 0
+                self._spill.truncate(0)
+            timestamp = struct.unpack("d", record[:8])[0]
+            return timestamp, np.frombuffer(record[8:], dtype=np.uint8).reshape(self._shape)
+
+    def _record_size(self) -> int:
+        return 8 + int(np.prod(self._shape))
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+
+
+class SharedMediaReader:
+    def __init__(self, path: str, want_audio: bool = True, frame_interval: float = None, token=None):
+        """
+        Inisialisasi pembaca media bersama
+
+        Args:
+            path: Path file media (video, audio saja, atau video saja)
+            want_audio: Jika True, audio didecode ke PCM mono 16kHz untuk Whisper
+            frame_interval: Interval detik antar frame sampel untuk OCR (None = tanpa frame)
+            token: CancellationToken (opsional); ffmpeg dimatikan saat token dibatalkan
+        """
+        self.path = path
+        self.token = token
+        self.info = probe_media(path)
+        self.want_audio = want_audio and self.info["has_audio"]
+        self.frame_interval = frame_interval if self.info["has_video"] else None
+
+        # PCM ditulis ke file sementara, bukan ditumpuk di memori (video panjang)
+        self._audio_file = None
+        self._audio_done = threading.Event()
+        self._frames = FrameBuffer()
+        self._errors = []
+        self._process = None
+        self._threads = []
+
+    def start(self):
+        """Jalankan satu proses ffmpeg untuk semua output yang diminta"""
+        cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-i', self.path]
+        pass_fds = ()
+        audio_read_fd = None
+
+        if self.want_audio:
+            # Audio ke file descriptor terpisah (pipe:3), frame video ke stdout
+            audio_read_fd, audio_write_fd = os.pipe()
+            pass_fds = (audio_write_fd,)
+            cmd += ['-map', '0:a:0', '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE),
+                    '-f', 's16le', f'pipe:{audio_write_fd}']
+        if self.frame_interval:
+            cmd += ['-map', '0:v:0', '-an', '-vf', f'fps=1/{self.frame_interval},format=gray',
+                    '-f', 'rawvideo', 'pipe:1']
+
+        if not self.want_audio and not self.frame_interval:
+            self._audio_done.set()
+            self._frames.finish()
+            return self
+
+        self._process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE if self.frame_interval else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            pass_fds=pass_fds,
+        )
+        if self.token is not None:
+            self.token.on_cancel(self.close)
+        if self.want_audio:
+            os.close(audio_write_fd)  # Hanya ffmpeg yang memegang sisi tulis
+            self._audio_file = tempfile.TemporaryFile()
+            self._threads.append(threading.Thread(target=self._read_audio, args=(audio_read_fd,), daemon=True))
+        else:
+            self._audio_done.set()
+        if self.frame_interval:
+            self._threads.append(threading.Thread(target=self._read_frames, daemon=True))
+        else:
+            self._frames.finish()
+
+        for thread in self._threads:
+            thread.start()
+        threading.Thread(target=self._wait_process, daemon=True).start()
+        return self
+
+    def _read_audio(self, fd: int):
+        try:
+            with os.fdopen(fd, 'rb') as pipe:
+                while True:
+                    chunk = pipe.read(1 << 20)
+                    if not chunk:
+                        break
+                    self._audio_file.write(chunk)
+            self._audio_file.flush()
+        except Exception as e:
+            self._errors.append(e)
+        finally:
+            self._audio_done.set()
+
+    def _read_frames(self):
+        width, height = self.info["width"], self.info["height"]
+        frame_size = width * height
+        index = 0
+        try:
+            while True:
+                data = self._process.stdout.read(frame_size)
+                if not data or len(data) < frame_size:
+                    break
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width)
+                self._frames.put(index * self.frame_interval, frame)
+                index += 1
+        except Exception as e:
+            self._errors.append(e)
+        finally:
+            self._frames.finish()
+
+    def _wait_process(self):
+        # Baca stderr sampai ffmpeg selesai (dibaca terus agar pipe stderr tidak penuh)
+        stderr = self._process.stderr.read().decode("utf-8", "replace")
+        for thread in self._threads:
+            thread.join()
+        if self.token is not None:
+            self.token.remove_callback(self.close)
+        if self._process.wait() != 0:
+            self._errors.append(Exception(f"ffmpeg gagal decode {self.path}: {stderr[-500:]}"))
+
+    def audio(self) -> np.ndarray:
+        """
+        Tunggu sampai audio selesai didecode
+
+        Returns:
+            Array float32 mono 16kHz (format yang diterima langsung oleh Whisper)
+        """
+        self._audio_done.wait()
+        if self.token is not None:
+            self.token.check()  # Audio terpotong karena ffmpeg dimatikan
+        audio_file, self._audio_file = self._audio_file, None
+        samples = audio_file.seek(0, os.SEEK_END) // 2 if audio_file is not None else 0
+        if self._errors and not samples:
+            raise self._errors[0]
+        audio = np.empty(samples, dtype=np.float32)
+        if samples:
+            # PCM int16 dibaca lewat memmap: hanya array float32 hasil yang ada di memori
+            pcm = np.memmap(audio_file, dtype=np.int16, mode="r", shape=(samples,))
+            np.multiply(pcm, np.float32(1 / 32768.0), out=audio)
+            del pcm
+        if audio_file is not None:
+            audio_file.close()
+        return audio
+
+    def frames(self):
+        """
+        Iterator frame sampel grayscale
+
+        Yields:
+            Tuple (timestamp_detik, frame numpy uint8 [height, width])
+        """
+        while True:
+            item = self._frames.get()
+            if item is None:
+                break
+            yield item
+        self._frames.close()
+        if self.token is not None:
+            self.token.check()
+        if self._errors and self._process and self._process.poll() not in (None, 0):
+            raise self._errors[-1]
+
+    def close(self):
+        """Hentikan ffmpeg jika masih berjalan"""
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+
+
+if __name__ == "__main__":
+    # Test
+    video_file = input("Masukkan path video: ")
+    reader = SharedMediaReader(video_file, want_audio=True, frame_interval=5).start()
+    frame_count = sum(1 for _ in reader.frames())
+    audio = reader.audio()
+    print(f"✅ {len(audio) / SAMPLE_RATE:.1f} detik audio, {frame_count} frame sampel")
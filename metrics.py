@@ -0,0 +1,40 @@
+"""
+Modul counter metrik sederhana dalam proses (mis. hit/miss cache LLM), aman dipakai dari banyak thread
+"""
+import threading
+from collections import Counter
+
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def increment(name: str, value: int = 1):
+    """Tambah counter"""
+    with _lock:
+        _counters[name] += value
+
+
+def get(name: str) -> int:
+    """Nilai counter saat ini (0 jika belum pernah dicatat)"""
+    with _lock:
+        return _counters[name]
+
+
+def snapshot(prefix: str = "") -> dict:
+    """Salinan semua counter (opsional hanya yang namanya diawali prefix)"""
+    with _lock:
+        return {name: value for name, value in _counters.items() if name.startswith(prefix)}
+
+
+def reset():
+    """Kosongkan semua counter"""
+    with _lock:
+        _counters.clear()
+
+
+if __name__ == "__main__":
+    # Test
+    increment("contoh_hit")
+    increment("contoh_hit", 2)
+    print(f"✅ Counter: {snapshot()}")
@@ -0,0 +1,322 @@
+"""
+Server mock lokal yang kompatibel dengan endpoint chat completions Groq/OpenAI
+(/openai/v1/chat/completions, biasa maupun streaming), untuk load test dan benchmark tanpa
+memakai kuota Groq asli. Batas request dan token per menit ditegakkan dengan token bucket
+seperti Groq: request di luar kuota dibalas 429 dengan header retry-after dan x-ratelimit-*.
+Latency dan error (model decommissioned, 429, 500, timeout) bisa disuntikkan, dan respons asli
+yang tercatat di cache LLM bisa diputar ulang (replay)
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+
+from llm_cache import make_key
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+CHARS_PER_TOKEN = 3.5
+
+
+class _Bucket:
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.level = limit
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.limit, self.level + (now - self.updated) * self.limit / 60.0)
+        self.updated = now
+
+    def reset_seconds(self) -> float:
+        """Waktu sampai bucket penuh lagi"""
+        return max(0.0, (self.limit - self.level) * 60.0 / self.limit)
+
+
+class MockGroqServer:
+    def __init__(self, rpm: float = 30, tpm: float = 6000, latency: float = 0.2, port: int = 0,
+                 reply="TEMUAN: tidak ada", stream_delay: float = 0.0, latency_jitter: float = 0.0,
+                 errors: dict = None, decommissioned=(), hang_seconds: float = 2.0,
+                 replay_dir: str = None, seed: int = None):
+        """
+        Inisialisasi server mock
+
+        Args:
+            rpm: Batas request per menit
+            tpm: Batas token per menit (prompt + jawaban)
+            latency: Waktu proses tiap request yang diterima (detik)
+            port: Port HTTP (0 = port bebas acak)
+            reply: Isi jawaban untuk semua request, atau fungsi reply(request) -> str
+            stream_delay: Jeda antar kata untuk request streaming (detik)
+            latency_jitter: Variasi acak latency (+/- detik)
+            errors: Peluang error per request yang diterima, mis. {"429": 0.1, "500": 0.05,
+                    "timeout": 0.02}. "timeout" menahan request hang_seconds lalu memutus koneksi
+            decommissioned: Model yang selalu dibalas error model_decommissioned
+            hang_seconds: Lama request "timeout" ditahan sebelum koneksi diputus
+            replay_dir: Direktori cache LLM (format llm_cache) berisi respons asli yang
+                        tercatat; request dengan key yang sama dijawab dengan respons itu
+            seed: Seed random untuk injeksi error dan jitter (hasil benchmark bisa diulang)
+        """
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.reply = reply
+        self.stream_delay = stream_delay
+        self.errors = dict(errors or {})
+        self.decommissioned = set(decommissioned)
+        self.hang_seconds = hang_seconds
+        self.replay_dir = replay_dir
+        self.stats = {"requests": 0, "accepted": 0, "rate_limited": 0, "tokens": 0,
+                      "injected_429": 0, "injected_500": 0, "timeouts": 0, "decommissioned": 0,
+                      "replayed": 0, "replay_miss": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL untuk GROQ_BASE_URL / AsyncGroq(base_url=...)"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _inject(self) -> str:
+        """Pilih error yang disuntikkan untuk satu request ("429", "500", "timeout" atau None)"""
+        with self._lock:
+            roll = self._random.random()
+        for kind in ("429", "500", "timeout"):
+            chance = self.errors.get(kind, 0)
+            if roll < chance:
+                return kind
+            roll -= chance
+        return None
+
+    def _latency(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.latency_jitter, self.latency_jitter))
+
+    def _reply_for(self, request: dict) -> str:
+        """Isi jawaban: respons tercatat (replay) jika ada, selain itu reply"""
+        if self.replay_dir:
+            params = {name: request[name] for name in ("temperature", "max_tokens") if name in request}
+            key = make_key(request.get("model"), request.get("messages", []), params)
+            try:
+                with open(os.path.join(self.replay_dir, f"{key}.json"), "r", encoding="utf-8") as f:
+                    response = json.load(f)["response"]
+                self._count("replayed")
+                return response
+            except (OSError, ValueError, KeyError):
+                self._count("replay_miss")
+        return self.reply(request) if callable(self.reply) else self.reply
+
+    def _admit(self, prompt_tokens: int, completion_tokens: int):
+        """
+        Cek kuota untuk satu request
+
+        Returns:
+            Tuple (diterima, headers rate limit)
+        """
+        total = prompt_tokens + completion_tokens
+        with self._lock:
+            self.stats["requests"] += 1
+            self.requests.refill()
+            self.tokens.refill()
+            accepted = self.requests.level >= 1 and self.tokens.level >= total
+            if accepted:
+                self.requests.level -= 1
+                self.tokens.level -= total
+                self.stats["accepted"] += 1
+                self.stats["tokens"] += total
+            else:
+                self.stats["rate_limited"] += 1
+
+            headers = {
+                "x-ratelimit-limit-requests": str(int(self.requests.limit)),
+                "x-ratelimit-limit-tokens": str(int(self.tokens.limit)),
+                "x-ratelimit-remaining-requests": str(int(self.requests.level)),
+                "x-ratelimit-remaining-tokens": str(int(self.tokens.level)),
+                "x-ratelimit-reset-requests": f"{self.requests.reset_seconds():.2f}s",
+                "x-ratelimit-reset-tokens": f"{self.tokens.reset_seconds():.2f}s",
+            }
+            if not accepted:
+                # Waktu sampai kuota cukup untuk request ini
+                wait_requests = max(0.0, (1 - self.requests.level) * 60.0 / self.requests.limit)
+                wait_tokens = max(0.0, (min(total, self.tokens.limit) - self.tokens.level) * 60.0 / self.tokens.limit)
+                headers["retry-after"] = f"{max(wait_requests, wait_tokens):.2f}"
+        return accepted, headers
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: dict, headers: dict = None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                model = request.get("model", "mock")
+                if model in server.decommissioned:
+                    server._count("requests")
+                    server._count("decommissioned")
+                    self._send(400, {"error": {
+                        "message": f"The model `{model}` has been decommissioned and is no longer supported.",
+                        "type": "invalid_request_error", "code": "model_decommissioned",
+                    }})
+                    return
+
+                # Error yang disuntikkan tidak memakai kuota
+                injected = server._inject()
+                if injected:
+                    server._count("requests")
+                if injected == "429":
+                    server._count("injected_429")
+                    self._send(429, {"error": {
+                        "message": "Rate limit reached, please try again later",
+                        "type": "requests", "code": "rate_limit_exceeded",
+                    }}, {"retry-after": "1"})
+                    return
+                if injected == "500":
+                    server._count("injected_500")
+                    self._send(500, {"error": {"message": "Internal Server Error", "type": "internal_server_error"}})
+                    return
+                if injected == "timeout":
+                    # Request ditahan lalu koneksi diputus tanpa respons
+                    server._count("timeouts")
+                    time.sleep(server.hang_seconds)
+                    self.close_connection = True
+                    return
+
+                prompt = "".join(message.get("content", "") for message in request.get("messages", []))
+                reply = server._reply_for(request)
+                prompt_tokens = int(len(prompt) / CHARS_PER_TOKEN) + 1
+                completion_tokens = int(len(reply) / CHARS_PER_TOKEN) + 1
+
+                accepted, headers = server._admit(prompt_tokens, completion_tokens)
+                if not accepted:
+                    self._send(429, {"error": {
+                        "message": "Rate limit reached, please try again later",
+                        "type": "tokens", "code": "rate_limit_exceeded",
+                    }}, headers)
+                    return
+
+                time.sleep(server._latency())
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }
+                if request.get("stream"):
+                    self._send_stream(request, reply, usage, headers)
+                    return
+                self._send(200, {
+                    "id": f"chatcmpl-mock-{server.stats['accepted']}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": reply},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                }, headers)
+
+            def _send_stream(self, request: dict, reply: str, usage: dict, headers: dict):
+                """Jawaban streaming (server-sent events) per kata, usage di chunk terakhir (x_groq)"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                base = {
+                    "id": f"chatcmpl-mock-{server.stats['accepted']}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                }
+                words = reply.split(" ")
+                for idx, word in enumerate(words):
+                    piece = word if idx == 0 else " " + word
+                    chunk = dict(base, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(server.stream_delay)
+                last = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                            x_groq={"id": base["id"], "usage": usage})
+                self.wfile.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self) -> "MockGroqServer":
+        """Jalankan server di background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def parse_errors(value: str) -> dict:
+    """Parse "429=0.1,500=0.05,timeout=0.02" menjadi dict peluang error"""
+    errors = {}
+    for part in filter(None, (value or "").split(",")):
+        kind, _, chance = part.partition("=")
+        errors[kind.strip()] = float(chance)
+    return errors
+
+
+if __name__ == "__main__":
+    # Usage: python mock_groq_server.py [port] [rpm] [tpm] [latency]
+    #        [--errors 429=0.1,500=0.05,timeout=0.02] [--decommissioned model1,model2] [--replay DIR]
+    options = {}
+    args = []
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        if arg.startswith("--"):
+            options[arg[2:]] = next(argv, "")
+        else:
+            args.append(arg)
+    port = int(args[0]) if len(args) > 0 else 8001
+    rpm = float(args[1]) if len(args) > 1 else 30
+    tpm = float(args[2]) if len(args) > 2 else 6000
+    latency = float(args[3]) if len(args) > 3 else 0.2
+    mock = MockGroqServer(rpm=rpm, tpm=tpm, latency=latency, port=port,
+                          errors=parse_errors(options.get("errors")),
+                          decommissioned=[model for model in options.get("decommissioned", "").split(",") if model],
+                          replay_dir=options.get("replay")).start()
+    print(f"🧪 Mock Groq di {mock.url} ({rpm:g} RPM, {tpm:g} TPM, latency {latency}s)")
+    if mock.errors or mock.decommissioned:
+        print(f"   Injeksi error: {mock.errors or '-'}, decommissioned: {sorted(mock.decommissioned) or '-'}")
+    if mock.replay_dir:
+        print(f"   Replay respons dari: {mock.replay_dir}")
+    print(f"   Pakai dengan: GROQ_BASE_URL={mock.url}")
+    try:
+        mock._thread.join()
+    except KeyboardInterrupt:
+        mock.stop()
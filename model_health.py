@@ -0,0 +1,265 @@
+"""
+Modul registry kesehatan model Groq: model yang sudah decommissioned atau berulang kali gagal
+diingat di file JSON (lintas proses dan run), circuit breaker-nya dibuka sehingga request
+laporan langsung ke model yang sehat, dan model yang dilewati dicek ulang di background
+"""
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+from cancellation import JobCancelled
+
+
+# Kegagalan berturut-turut sebelum circuit dibuka
+FAILURE_THRESHOLD = int(os.getenv("MODEL_FAILURE_THRESHOLD", "3"))
+
+# Lama circuit terbuka sebelum model dicek ulang (berlipat dua setiap probe gagal)
+OPEN_SECONDS = float(os.getenv("MODEL_OPEN_SECONDS", "300"))
+OPEN_SECONDS_MAX = 6 * 3600
+
+# Model decommissioned dicek ulang jauh lebih jarang (nama model bisa dipakai lagi)
+DECOMMISSIONED_RECHECK_SECONDS = 7 * 24 * 3600
+
+# Model yang circuit-nya jatuh tempo menjadi half-open: satu request biasa boleh mencobanya,
+# request lain menunggu selama ini sebelum mencoba lagi (jika percobaan tidak tercatat)
+HALF_OPEN_SECONDS = 60
+
+# Interval thread probe background mengecek model yang jatuh tempo
+PROBE_INTERVAL = float(os.getenv("MODEL_PROBE_INTERVAL", "60"))
+
+HEALTHY = "healthy"
+OPEN = "open"
+DECOMMISSIONED = "decommissioned"
+
+# Error yang bukan kesalahan model (rate limit, API key/izin): tidak menghitung kegagalan.
+# Dicocokkan dengan status HTTP dan field "code" body error Groq, bukan teks pesannya
+NEUTRAL_STATUS_CODES = {401, 403, 429}
+NEUTRAL_ERROR_CODES = {"rate_limit_exceeded", "invalid_api_key"}
+DECOMMISSIONED_ERROR_CODES = {"model_decommissioned", "model_not_found"}
+
+
+def error_code(error):
+    """Field "code" dari body error API Groq ({"error": {"code": ...}}), atau None"""
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        body = body.get("error", body)
+    return body.get("code") if isinstance(body, dict) else None
+
+
+def classify_error(error) -> str:
+    """
+    Klasifikasi error request model dari tipe exception, status HTTP, dan code error Groq
+
+    Returns:
+        'decommissioned' (model tidak ada lagi), 'neutral' (rate limit/auth/pembatalan,
+        bukan salah model), atau 'failure' (error model/server/koneksi, dihitung circuit breaker)
+    """
+    if isinstance(error, JobCancelled):
+        return "neutral"
+    code = error_code(error)
+    if code in DECOMMISSIONED_ERROR_CODES:
+        return "decommissioned"
+    if getattr(error, "status_code", None) in NEUTRAL_STATUS_CODES or code in NEUTRAL_ERROR_CODES:
+        return "neutral"
+    return "failure"
+
+
+# Lock bersama untuk semua instance dalam satu proses (read-modify-write file JSON)
+_STORE_LOCK = threading.Lock()
+
+# Thread probe background per file registry, dipakai bersama semua instance dalam satu proses
+_PROBE_THREADS = {}
+_PROBE_LOCK = threading.Lock()
+
+
+class ModelHealth:
+    def __init__(self, path: str = None, clock=time.time):
+        """
+        Inisialisasi registry kesehatan model (file JSON kecil)
+
+        Args:
+            path: Path file JSON (default: GROQ_MODEL_HEALTH_FILE atau
+                  downloads/cache/groq_model_health.json)
+            clock: Fungsi waktu (diganti di test)
+        """
+        if path is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            path = os.getenv("GROQ_MODEL_HEALTH_FILE",
+                             os.path.join(downloads_dir, "cache", "groq_model_health.json"))
+        self.path = path
+        self._clock = clock
+
+    def _load(self) -> dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save(self, data: dict):
+        Path(os.path.dirname(self.path) or ".").mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _update(self, model: str, func):
+        with _STORE_LOCK:
+            data = self._load()
+            stats = data.setdefault(model, {"state": HEALTHY, "failures": 0, "open_seconds": 0})
+            func(stats)
+            self._save(data)
+            return stats
+
+    def record_success(self, model: str, latency: float = None):
+        """Catat request yang berhasil: circuit ditutup dan hitungan kegagalan direset"""
+        def apply(stats):
+            stats.update({"state": HEALTHY, "failures": 0, "open_seconds": 0, "retry_at": None,
+                          "last_success": self._clock()})
+            if latency is not None:
+                previous = stats.get("latency")
+                stats["latency"] = latency if previous is None else 0.7 * previous + 0.3 * latency
+        self._update(model, apply)
+
+    def record_failure(self, model: str, error) -> str:
+        """
+        Catat request yang gagal. Model decommissioned langsung dilewati; error lain membuka
+        circuit setelah FAILURE_THRESHOLD kegagalan berturut-turut
+
+        Returns:
+            Jenis error dari classify_error()
+        """
+        kind = classify_error(error)
+        if kind == "neutral":
+            return kind
+        now = self._clock()
+
+        def apply(stats):
+            stats["last_failure"] = now
+            stats["last_error"] = str(error)[:200]
+            if kind == "decommissioned":
+                stats.update({"state": DECOMMISSIONED, "retry_at": now + DECOMMISSIONED_RECHECK_SECONDS})
+                return
+            stats["failures"] = stats.get("failures", 0) + 1
+            if stats["state"] != HEALTHY or stats["failures"] >= FAILURE_THRESHOLD:
+                # Probe yang gagal menggandakan lama circuit terbuka
+                open_seconds = min(OPEN_SECONDS_MAX, max(OPEN_SECONDS, stats.get("open_seconds", 0) * 2))
+                stats.update({"state": OPEN, "open_seconds": open_seconds, "retry_at": now + open_seconds})
+        stats = self._update(model, apply)
+        if stats["state"] != HEALTHY:
+            print(f"   🔌 Model {model} dilewati sampai dicek ulang ({stats['state']})")
+        return kind
+
+    def available(self, model: str, data: dict = None) -> bool:
+        """True jika model boleh dipakai request biasa (circuit tertutup atau sudah jatuh tempo)"""
+        stats = (data if data is not None else self._load()).get(model)
+        return (not stats or stats.get("state", HEALTHY) == HEALTHY
+                or (stats.get("retry_at") or 0) <= self._clock())
+
+    def order(self, models: list) -> list:
+        """
+        Urutan model untuk request: model dengan circuit tertutup sesuai urutan konfigurasi.
+        Model yang circuit-nya jatuh tempo (half-open) ikut dicoba sekali; hasil request itu
+        (record_success/record_failure) menutup atau membuka lagi circuit-nya. Jika semua
+        model sedang dilewati, model yang paling cepat jatuh tempo dicoba
+
+        Args:
+            models: Daftar model dalam urutan preferensi (utama lalu fallback)
+        """
+        now = self._clock()
+        trials = []
+        with _STORE_LOCK:
+            data = self._load()
+            for model in models:
+                stats = data.get(model)
+                if stats and stats.get("state", HEALTHY) != HEALTHY and (stats.get("retry_at") or 0) <= now:
+                    # Request lain tidak ikut mencoba selama percobaan ini berjalan
+                    stats["retry_at"] = now + HALF_OPEN_SECONDS
+                    trials.append(model)
+            if trials:
+                self._save(data)
+        usable = [model for model in models if model in trials or self.available(model, data)]
+        if usable:
+            return usable
+        return sorted(models, key=lambda model: data.get(model, {}).get("retry_at") or 0)[:1]
+
+    def skipped(self, models: list) -> dict:
+        """Model yang sedang dilewati beserta statusnya"""
+        data = self._load()
+        return {model: data[model]["state"] for model in models if not self.available(model, data)}
+
+    def due_for_probe(self) -> list:
+        """Model dengan circuit terbuka/decommissioned yang sudah waktunya dicek ulang"""
+        now = self._clock()
+        return [model for model, stats in self._load().items()
+                if stats.get("state", HEALTHY) != HEALTHY and (stats.get("retry_at") or 0) <= now]
+
+    def probe(self, probe_fn) -> dict:
+        """
+        Cek ulang model yang jatuh tempo dengan probe_fn(model) (request kecil)
+
+        Returns:
+            Dict {model: True jika sehat lagi}
+        """
+        results = {}
+        for model in self.due_for_probe():
+            started = self._clock()
+            try:
+                probe_fn(model)
+            except Exception as e:
+                self.record_failure(model, e)
+                results[model] = False
+                continue
+            self.record_success(model, self._clock() - started)
+            print(f"   🔌 Model {model} sehat lagi, dipakai kembali")
+            results[model] = True
+        return results
+
+    def ensure_probe(self, probe_fn, interval: float = None):
+        """
+        Jalankan thread probe background (satu per file registry dalam satu proses, dipakai
+        bersama semua instance) selama masih ada circuit yang terbuka. Model decommissioned
+        tidak menahan thread: model itu dicek saat jatuh tempo oleh probe berikutnya atau
+        dicoba sekali oleh request biasa (half-open)
+        """
+        interval = PROBE_INTERVAL if interval is None else interval
+        if interval <= 0:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.probe(probe_fn)
+                except Exception:
+                    pass
+                with _PROBE_LOCK:
+                    if not any(stats.get("state", HEALTHY) == OPEN for stats in self._load().values()):
+                        del _PROBE_THREADS[self.path]
+                        return
+
+        with _PROBE_LOCK:
+            if self.path not in _PROBE_THREADS:
+                thread = threading.Thread(target=loop, name="model-probe", daemon=True)
+                _PROBE_THREADS[self.path] = thread
+                thread.start()
+
+    def probe_running(self) -> bool:
+        """True jika thread probe untuk registry ini sedang berjalan"""
+        with _PROBE_LOCK:
+            return self.path in _PROBE_THREADS
+
+if __name__ == "__main__":
+    # Tampilkan status semua model yang tercatat
+    health = ModelHealth()
+    data = health._load()
+    if not data:
+        print("Belum ada riwayat model")
+    for model, stats in data.items():
+        retry = stats.get("retry_at")
+        retry_text = f", cek ulang {time.strftime('%Y-%m-%d %H:%M', time.localtime(retry))}" if retry else ""
+        print(f"{model}: {stats['state']} (gagal berturut-turut: {stats.get('failures', 0)}{retry_text})")
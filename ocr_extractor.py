@@ -1,13 +1,49 @@
 """
 Modul untuk ekstrak teks dari frame video menggunakan OCR (Tesseract)
 """
-import cv2
 import pytesseract
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import os
+from functools import lru_cache
 
+from media_reader import SharedMediaReader, probe_media
 
-def extract_text_from_frames(video_path: str, interval: int = 5, output_dir: str = "downloads") -> list:
+
+@lru_cache(maxsize=1)
+def _ocr_lang() -> str:
+    """Bahasa Tesseract yang dipakai, dicek sekali per proses"""
+    # Gunakan bahasa Indonesia jika tersedia
+    try:
+        if 'ind' in pytesseract.get_languages(config=''):
+            return 'ind+eng'  # Indonesia + English
+    except Exception:
+        pass
+    # Fallback ke English jika bahasa Indonesia tidak tersedia
+    return 'eng'
+
+
+def _ocr_image(gray, token=None) -> str:
+    """OCR satu frame grayscale dengan Tesseract (proses dimatikan saat deadline token lewat)"""
+    if token is not None:
+        token.check()  # Frame yang masih antri tidak diproses lagi setelah pembatalan
+    remaining = token.remaining() if token is not None else None
+    # pytesseract menganggap timeout 0 sebagai tanpa batas: deadline yang baru saja lewat
+    # tetap harus membatasi tesseract
+    timeout = 0 if remaining is None else max(0.001, remaining)
+    try:
+        text = pytesseract.image_to_string(gray, lang=_ocr_lang(), timeout=timeout)
+    except RuntimeError:
+        if token is not None:
+            token.check()  # pytesseract raise RuntimeError saat tesseract dimatikan karena timeout
+        raise
+    
+    # Bersihkan teks
+    return text.strip()
+
+
+def extract_text_from_frames(video_path: str, interval: int = 5, output_dir: str = "downloads",
+                             workers: int = 1, frames=None, executor=None, token=None) -> list:
     """
     Ekstrak teks dari frame video menggunakan OCR
     
@@ -15,6 +51,13 @@ def extract_text_from_frames(video_path: str, interval: int = 5, output_dir: str
         video_path: Path ke file video
         interval: Interval detik untuk mengambil frame (default: 5 detik)
         output_dir: Direktori untuk menyimpan frame sementara
+        workers: Jumlah proses Tesseract yang berjalan paralel (default: 1)
+        frames: Iterator (timestamp_detik, frame grayscale) dari SharedMediaReader yang
+                sudah berjalan (opsional). Jika None, video didecode sendiri
+        executor: ThreadPoolExecutor OCR bersama (opsional), mis. dipakai semua job
+                  dalam mode batch agar total proses Tesseract tetap terbatas
+        token: CancellationToken (opsional), dicek setiap frame; ffmpeg dan tesseract
+               dimatikan saat token dibatalkan
         
     Returns:
         List of dict dengan format:
@@ -30,65 +73,53 @@ def extract_text_from_frames(video_path: str, interval: int = 5, output_dir: str
     # Buat folder jika belum ada
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
+    reader = None
     try:
         print(f"📸 Mengekstrak teks dari frame video...")
         
-        # Buka video
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise Exception(f"Tidak bisa membuka video: {video_path}")
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = total_frames / fps if fps > 0 else 0
+        # Frame disampling dan dikonversi ke grayscale oleh ffmpeg (bukan decode semua frame)
+        if frames is None:
+            reader = SharedMediaReader(video_path, want_audio=False, frame_interval=interval,
+                                       token=token).start()
+            frames = reader.frames()
+            media_info = reader.info
+        else:
+            media_info = probe_media(video_path)
         
+        fps = media_info["fps"] or 0
+        duration = media_info["duration"] or 0
         print(f"   Video info: {duration:.2f} detik, {fps:.2f} fps")
         
         ocr_results = []
-        frame_interval = int(fps * interval)  # Frame setiap N detik
         
-        frame_count = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Ambil frame setiap interval detik
-            if frame_count % frame_interval == 0:
-                timestamp_seconds = frame_count / fps if fps > 0 else 0
-                timestamp = _format_timestamp(timestamp_seconds)
-                
-                # Lakukan OCR pada frame
-                # Konversi ke grayscale untuk OCR yang lebih baik
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                
-                # OCR dengan Tesseract
-                # Gunakan bahasa Indonesia jika tersedia
-                try:
-                    text = pytesseract.image_to_string(
-                        gray,
-                        lang='ind+eng'  # Indonesia + English
-                    )
-                except:
-                    # Fallback ke English jika bahasa Indonesia tidak tersedia
-                    text = pytesseract.image_to_string(gray, lang='eng')
-                
-                # Bersihkan teks
-                text = text.strip()
+        # Tesseract per proses dibatasi 1 thread, paralelisme diatur lewat jumlah worker
+        if workers > 1:
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ocr")
+        pending = []
+        
+        try:
+            for timestamp_seconds, gray in frames:
+                if token is not None:
+                    token.check()
+                frame_count = int(round(timestamp_seconds * fps))
+                pending.append((frame_count, timestamp_seconds, executor.submit(_ocr_image, gray, token)))
                 
-                # Hanya simpan jika ada teks yang ditemukan
-                if text:
-                    ocr_results.append({
-                        "text": text,
-                        "timestamp": timestamp,
-                        "frame_number": frame_count,
-                        "timestamp_seconds": timestamp_seconds
-                    })
-                    print(f"   [{timestamp}] Ditemukan teks: {text[:50]}...")
+                # Batasi frame yang menunggu OCR agar memori tidak membengkak
+                while len(pending) > workers * 4:
+                    _collect_ocr_result(pending.pop(0), ocr_results)
             
-            frame_count += 1
-        
-        cap.release()
+            # Kumpulkan sisa hasil sesuai urutan frame
+            while pending:
+                _collect_ocr_result(pending.pop(0), ocr_results)
+        finally:
+            # Saat dibatalkan, frame yang belum mulai di-OCR tidak perlu dijalankan
+            for _, _, future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown()
         
         print(f"✅ OCR selesai. Ditemukan {len(ocr_results)} frame dengan teks.")
         return ocr_results
@@ -96,6 +127,26 @@ def extract_text_from_frames(video_path: str, interval: int = 5, output_dir: str
     except Exception as e:
         print(f"❌ Error saat ekstrak OCR: {str(e)}")
         raise
+    finally:
+        if reader:
+            reader.close()
+
+
+def _collect_ocr_result(entry: tuple, ocr_results: list):
+    """Tunggu hasil OCR satu frame dan simpan jika ada teks"""
+    frame_number, timestamp_seconds, future = entry
+    text = future.result()
+    
+    # Hanya simpan jika ada teks yang ditemukan
+    if text:
+        timestamp = _format_timestamp(timestamp_seconds)
+        ocr_results.append({
+            "text": text,
+            "timestamp": timestamp,
+            "frame_number": frame_number,
+            "timestamp_seconds": timestamp_seconds
+        })
+        print(f"   [{timestamp}] Ditemukan teks: {text[:50]}...")
 
 
 def _format_timestamp(seconds: float) -> str:
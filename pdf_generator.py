@@ -8,8 +8,56 @@ except ImportError:
     from fpdf2 import FPDF
 from datetime import datetime
 import os
+import re
 import unicodedata
 
+from timeline import Timeline, format_timestamp
+
+
+# Mapping karakter fullwidth ke ASCII (diterapkan sebelum normalisasi Unicode)
+FULLWIDTH_REPLACEMENTS = {
+    '：': ':',  # Fullwidth colon
+    '｜': '|',  # Fullwidth vertical bar
+    '（': '(',  # Fullwidth left parenthesis
+    '）': ')',  # Fullwidth right parenthesis
+    '，': ',',  # Fullwidth comma
+    '。': '.',  # Fullwidth period
+    '！': '!',  # Fullwidth exclamation
+    '？': '?',  # Fullwidth question mark
+    '【': '[',  # Fullwidth left bracket
+    '】': ']',  # Fullwidth right bracket
+    '「': '"',  # Left corner bracket
+    '」': '"',  # Right corner bracket
+    '『': '"',  # Double left corner bracket
+    '』': '"',  # Double right corner bracket
+    '　': ' ',  # Fullwidth space
+    '－': '-',  # Fullwidth hyphen
+    '～': '~',  # Fullwidth tilde
+    '＃': '#',  # Fullwidth hash
+}
+_FULLWIDTH_PATTERN = re.compile("[" + "".join(FULLWIDTH_REPLACEMENTS) + "]")
+
+
+class _Latin1Table(dict):
+    """
+    Tabel str.translate untuk font Latin-1: karakter latin-1 tetap, karakter lain diganti ASCII
+    equivalent-nya, spasi (bukan control char), atau dihapus. Hasil tiap codepoint dihitung
+    sekali saat pertama kali ditemui lalu disimpan
+    """
+    def __missing__(self, codepoint: int):
+        if codepoint < 256:
+            value = codepoint
+        else:
+            char = chr(codepoint)
+            value = unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii')
+            if not value:
+                value = None if unicodedata.category(char).startswith('C') else ' '
+        self[codepoint] = value
+        return value
+
+
+_LATIN1_TABLE = _Latin1Table()
+
 
 class PDFGenerator:
     def __init__(self):
@@ -24,54 +72,20 @@ class PDFGenerator:
         """
         if not text:
             return ""
+        # Teks ASCII tidak berubah oleh semua langkah di bawah
+        if text.isascii():
+            return text
         
-        # Mapping karakter fullwidth ke ASCII
-        replacements = {
-            '：': ':',  # Fullwidth colon
-            '｜': '|',  # Fullwidth vertical bar
-            '（': '(',  # Fullwidth left parenthesis
-            '）': ')',  # Fullwidth right parenthesis
-            '，': ',',  # Fullwidth comma
-            '。': '.',  # Fullwidth period
-            '！': '!',  # Fullwidth exclamation
-            '？': '?',  # Fullwidth question mark
-            '【': '[',  # Fullwidth left bracket
-            '】': ']',  # Fullwidth right bracket
-            '「': '"',  # Left corner bracket
-            '」': '"',  # Right corner bracket
-            '『': '"',  # Double left corner bracket
-            '』': '"',  # Double right corner bracket
-            '　': ' ',  # Fullwidth space
-            '－': '-',  # Fullwidth hyphen
-            '～': '~',  # Fullwidth tilde
-            '＃': '#',  # Fullwidth hash
-        }
-        
-        # Terapkan replacements
-        for fullwidth, ascii_char in replacements.items():
-            text = text.replace(fullwidth, ascii_char)
+        # Terapkan replacements fullwidth ke ASCII
+        if _FULLWIDTH_PATTERN.search(text):
+            text = _FULLWIDTH_PATTERN.sub(lambda match: FULLWIDTH_REPLACEMENTS[match.group()], text)
         
         # Normalisasi Unicode (NFKD = compatibility decomposition)
-        text = unicodedata.normalize('NFKD', text)
-        
-        # Hilangkan karakter yang tidak bisa di-encode ke latin-1
-        # Coba encode ke latin-1, jika gagal ganti dengan '?'
-        cleaned = ''
-        for char in text:
-            try:
-                char.encode('latin-1')
-                cleaned += char
-            except UnicodeEncodeError:
-                # Coba dapatkan ASCII equivalent
-                ascii_equiv = unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii')
-                if ascii_equiv:
-                    cleaned += ascii_equiv
-                else:
-                    # Jika tidak ada equivalent, skip karakter (atau ganti dengan space jika bukan control char)
-                    if not unicodedata.category(char).startswith('C'):
-                        cleaned += ' '
-        
-        return cleaned
+        if not unicodedata.is_normalized('NFKD', text):
+            text = unicodedata.normalize('NFKD', text)
+        
+        # Karakter di luar latin-1 diganti lewat tabel (ASCII equivalent, spasi, atau dihapus)
+        return text.translate(_LATIN1_TABLE)
     
     def create_report_pdf(self, report_text: str, output_path: str, video_info: dict = None, 
                           speech_data: list = None, ocr_data: list = None):
@@ -182,15 +196,20 @@ class PDFGenerator:
             self.pdf.cell(0, 10, "TEKS DARI VIDEO (OCR)", ln=1, align="C")
             self.pdf.ln(5)
             
+            # Frame berurutan dengan teks yang sama ditampilkan sekali dengan rentang waktunya
+            ocr_spans = Timeline.from_sources([], ocr_data).items()
+            
             # Info jumlah frame
             self.pdf.set_font("Arial", "I", 10)
-            self.pdf.cell(0, 5, f"Total {len(ocr_data)} frame dengan teks", ln=1)
+            self.pdf.cell(0, 5, f"Total {len(ocr_data)} frame dengan teks ({len(ocr_spans)} teks berbeda)", ln=1)
             self.pdf.ln(5)
             
             # OCR data
             self.pdf.set_font("Arial", "", 10)
-            for item in ocr_data:
-                timestamp = item.get("timestamp", "00:00:00")
+            for item in ocr_spans:
+                timestamp = item["timestamp"]
+                if item["frames"] > 1:
+                    timestamp = f"{timestamp} - {format_timestamp(item['end'])}"
                 text = self.sanitize_text(item.get("text", ""))
                 
                 # Format: [timestamp] text
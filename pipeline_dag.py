@@ -0,0 +1,273 @@
+"""
+Modul eksekusi pipeline sebagai DAG stage: stage yang saling independen dijalankan paralel
+dengan budget CPU bersama, lalu dilaporkan waktu per stage dan critical path-nya.
+Hasil stage bisa di-checkpoint agar run berikutnya hanya menjalankan stage yang belum valid.
+Setiap stage mendapat token pembatalan turunan dari token job, dengan deadline stage sendiri
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from checkpoint import config_hash
+from cancellation import CancellationToken
+
+
+class CpuBudget:
+    """Counter jumlah core yang sedang dipakai stage, agar total tidak melebihi budget"""
+
+    def __init__(self, total: int):
+        self.total = max(1, total)
+        self._used = 0
+        self._cond = threading.Condition()
+
+    def available(self) -> int:
+        with self._cond:
+            return self.total - self._used
+
+    def try_acquire(self, cpus: int) -> bool:
+        with self._cond:
+            if self._used + cpus > self.total:
+                return False
+            self._used += cpus
+            return True
+
+    def release(self, cpus: int):
+        with self._cond:
+            self._used -= cpus
+            self._cond.notify_all()
+
+
+class PipelineDAG:
+    def __init__(self, cpu_budget: int = None, checkpoint=None, token: CancellationToken = None):
+        """
+        Inisialisasi DAG pipeline
+
+        Args:
+            cpu_budget: Total core yang boleh dipakai semua stage bersamaan
+                        (default: PIPELINE_CPUS atau jumlah core mesin)
+            checkpoint: JobCheckpoint untuk menyimpan/memuat hasil stage (opsional)
+            token: CancellationToken job (opsional). Jika dibatalkan, stage baru tidak
+                   dimulai dan stage yang berjalan ikut dibatalkan
+        """
+        if cpu_budget is None:
+            cpu_budget = int(os.getenv("PIPELINE_CPUS", str(os.cpu_count() or 1)))
+        self.budget = CpuBudget(cpu_budget)
+        self.checkpoint = checkpoint
+        self.token = token or CancellationToken()
+        self.stages = {}
+        self.timings = {}
+        self.cached = {}
+
+    def add(self, name: str, func, deps: list = None, cpus: int = 1, checkpoint_config=None,
+            validate=None, timeout=None):
+        """
+        Tambah stage ke DAG
+
+        Args:
+            name: Nama stage (unik)
+            func: Fungsi func(results, cpus, token) -> hasil. `results` berisi hasil stage
+                  dependensi, `cpus` adalah jumlah core yang dialokasikan, `token` adalah
+                  CancellationToken stage yang harus dicek selama stage berjalan
+            deps: Nama stage yang harus selesai lebih dulu
+            cpus: Jumlah core yang dipakai stage (0 untuk stage I/O seperti download)
+            checkpoint_config: Konfigurasi stage (dict yang bisa di-serialize ke JSON). Jika
+                               diisi, hasil stage di-checkpoint dengan key dari konfigurasi ini
+                               dan key stage dependensinya. Hasil harus bisa di-serialize ke JSON
+            validate: Fungsi validate(hasil) -> bool untuk checkpoint yang bergantung pada
+                      file di luar job (mis. file download yang bisa terhapus)
+            timeout: Deadline stage (detik), atau fungsi tanpa argumen yang dipanggil saat
+                     stage dimulai (mis. deadline dari durasi video hasil stage sebelumnya)
+        """
+        deps = list(deps or [])
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' bergantung pada stage yang belum ada: '{dep}'")
+        self.stages[name] = {"func": func, "deps": deps, "cpus": min(cpus, self.budget.total),
+                             "checkpoint": checkpoint_config, "validate": validate, "timeout": timeout}
+
+    def stage_keys(self) -> dict:
+        """
+        Key setiap stage: hash input (ID job), konfigurasi stage, dan key semua dependensinya.
+        Perubahan konfigurasi satu stage hanya membatalkan stage itu dan turunannya
+        """
+        job_id = self.checkpoint.job_id if self.checkpoint else None
+        keys = {}
+        for name, stage in self.stages.items():  # Stage ditambahkan dalam urutan topologis
+            keys[name] = config_hash({
+                "input": job_id,
+                "stage": name,
+                "config": stage["checkpoint"],
+                "deps": [keys[dep] for dep in stage["deps"]],
+            })
+        return keys
+
+    def _load_checkpoints(self, keys: dict) -> dict:
+        cached = {}
+        if not self.checkpoint:
+            return cached
+        for name, stage in self.stages.items():
+            if stage["checkpoint"] is None:
+                continue
+            ok, result = self.checkpoint.load(name, keys[name])
+            if ok and (stage["validate"] is None or stage["validate"](result)):
+                cached[name] = result
+        return cached
+
+    def _stages_to_run(self, targets: list) -> set:
+        """Stage yang harus dijalankan agar semua target tersedia, dengan memakai checkpoint"""
+        to_run = set()
+        stack = [name for name in targets if name not in self.cached]
+        while stack:
+            name = stack.pop()
+            if name in to_run:
+                continue
+            to_run.add(name)
+            stack.extend(dep for dep in self.stages[name]["deps"] if dep not in self.cached)
+        return to_run
+
+    def is_cached(self, name: str) -> bool:
+        """True jika hasil stage diambil dari checkpoint pada run ini"""
+        return name in self.cached
+
+    def run(self, targets: list = None) -> dict:
+        """
+        Jalankan stage sesuai dependensi; stage yang siap dan muat di budget CPU
+        dijalankan bersamaan. Stage dengan checkpoint valid tidak dijalankan ulang, dan
+        stage yang hanya dibutuhkan oleh stage ter-checkpoint dilewati. Jika token job
+        dibatalkan, run berhenti setelah stage yang berjalan berhenti dan raise JobCancelled.
+
+        Args:
+            targets: Stage yang hasilnya dibutuhkan (default: stage tanpa turunan)
+
+        Returns:
+            Dict {nama_stage: hasil} untuk stage yang dijalankan atau diambil dari checkpoint
+        """
+        if targets is None:
+            dependents = {dep for stage in self.stages.values() for dep in stage["deps"]}
+            targets = [name for name in self.stages if name not in dependents]
+        keys = self.stage_keys()
+        self.cached = self._load_checkpoints(keys)
+        to_run = self._stages_to_run(targets)
+        for name in self.cached:
+            self.timings[name] = {"cached": True, "cpus": 0}
+        if self.cached:
+            print(f"   ♻️  Memakai checkpoint: {', '.join(self.cached)}")
+
+        results = dict(self.cached)
+        pending = {name: stage for name, stage in self.stages.items() if name in to_run}
+        running = {}
+        tokens = {}
+        failure = None
+        started_at = time.time()
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self.stages)), thread_name_prefix="stage") as executor:
+            while pending or running:
+                if self.token.cancelled and failure is None:
+                    # Stage baru tidak dimulai; stage yang berjalan berhenti lewat token turunannya
+                    failure = self.token.error
+                    pending.clear()
+                # Jalankan semua stage yang dependensinya selesai dan CPU-nya tersedia
+                for name in list(pending):
+                    stage = pending[name]
+                    if not all(dep in results for dep in stage["deps"]):
+                        continue
+                    if not self.budget.try_acquire(stage["cpus"]):
+                        continue
+                    del pending[name]
+                    dep_results = {dep: results[dep] for dep in stage["deps"]}
+                    self.timings[name] = {"start": time.time() - started_at, "cpus": stage["cpus"]}
+                    timeout = stage["timeout"]() if callable(stage["timeout"]) else stage["timeout"]
+                    tokens[name] = self.token.child(name, timeout)
+                    running[executor.submit(stage["func"], dep_results, stage["cpus"], tokens[name])] = name
+
+                if not running and failure is None:
+                    raise RuntimeError(f"Stage tidak bisa dijalankan (dependensi siklik?): {list(pending)}")
+
+                # Timeout wait agar pembatalan job terdeteksi walau tidak ada stage yang selesai
+                done, _ = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    tokens.pop(name).close()
+                    self.budget.release(self.stages[name]["cpus"])
+                    timing = self.timings[name]
+                    timing["end"] = time.time() - started_at
+                    timing["wall"] = timing["end"] - timing["start"]
+
+                    error = future.exception()
+                    if error is not None:
+                        # Stage lain tidak dimulai lagi, yang sedang berjalan ditunggu selesai
+                        # agar hasilnya tetap masuk checkpoint untuk run berikutnya
+                        failure = failure or error
+                        pending.clear()
+                        continue
+                    results[name] = future.result()
+                    if self.checkpoint and self.stages[name]["checkpoint"] is not None:
+                        self.checkpoint.save(name, keys[name], results[name])
+
+                if failure is not None and not running:
+                    break
+
+        self.total_seconds = time.time() - started_at
+        if failure is not None:
+            raise failure
+        return results
+
+    def critical_path(self) -> tuple:
+        """
+        Hitung critical path: rantai dependensi dengan total wall time terpanjang
+
+        Returns:
+            Tuple (list nama stage, total detik)
+        """
+        cost = {}
+        previous = {}
+        for name in self.stages:  # Stage ditambahkan dalam urutan topologis
+            timing = self.timings.get(name)
+            if not timing or "wall" not in timing:
+                continue
+            best_dep = None
+            for dep in self.stages[name]["deps"]:
+                if dep in cost and (best_dep is None or cost[dep] > cost[best_dep]):
+                    best_dep = dep
+            cost[name] = timing["wall"] + (cost[best_dep] if best_dep else 0.0)
+            previous[name] = best_dep
+
+        if not cost:
+            return [], 0.0
+        node = max(cost, key=cost.get)
+        total = cost[node]
+        path = []
+        while node:
+            path.append(node)
+            node = previous[node]
+        return list(reversed(path)), total
+
+    def report(self) -> dict:
+        """Ringkasan waktu eksekusi untuk disimpan di output JSON"""
+        path, path_seconds = self.critical_path()
+        return {
+            "cpu_budget": self.budget.total,
+            "total_seconds": round(getattr(self, "total_seconds", 0.0), 3),
+            "critical_path": path,
+            "critical_path_seconds": round(path_seconds, 3),
+            "stages": {
+                name: {key: round(value, 3) if isinstance(value, float) else value
+                       for key, value in timing.items()}
+                for name, timing in self.timings.items()
+            },
+        }
+
+    def print_report(self):
+        """Tampilkan waktu per stage dan critical path"""
+        report = self.report()
+        print(f"\n⏱️  Waktu per stage (budget {report['cpu_budget']} core):")
+        for name, timing in report["stages"].items():
+            if timing.get("cached"):
+                print(f"     {name:<16} {'checkpoint':>14}")
+                continue
+            marker = "★" if name in report["critical_path"] else " "
+            print(f"   {marker} {name:<16} {timing.get('wall', 0):>8.1f} detik  "
+                  f"(mulai +{timing['start']:.1f}s, {timing['cpus']} core)")
+        print(f"   Critical path: {' → '.join(report['critical_path'])} "
+              f"({report['critical_path_seconds']:.1f} dari total {report['total_seconds']:.1f} detik)")
@@ -0,0 +1,201 @@
+"""
+Modul untuk prefetch metadata video dan perencanaan pipeline sebelum download dimulai
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+import yt_dlp
+
+from download_cache import resolve_video_key, make_cache_key
+from video_downloader import build_ydl_opts
+
+
+# Resolusi minimal agar teks di frame masih terbaca oleh OCR
+MIN_OCR_HEIGHT = int(os.getenv("OCR_MIN_HEIGHT", "480"))
+
+# Metadata disimpan maksimal 24 jam (judul/durasi jarang berubah)
+METADATA_TTL = int(os.getenv("METADATA_CACHE_TTL", str(24 * 3600)))
+
+# Field format yang disimpan di cache metadata (URL stream tidak disimpan karena cepat expired)
+_FORMAT_FIELDS = ("format_id", "ext", "width", "height", "fps", "vcodec", "acodec",
+                  "filesize", "filesize_approx", "tbr", "abr", "protocol")
+
+
+def _metadata_cache_dir() -> str:
+    downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+    cache_dir = os.getenv("DOWNLOAD_CACHE_DIR", os.path.join(downloads_dir, "cache"))
+    return os.path.join(cache_dir, "meta")
+
+
+def _metadata_cache_path(video_url: str) -> str:
+    resolved = resolve_video_key(video_url)
+    if resolved:
+        key = make_cache_key(resolved[0], resolved[1], "metadata")
+    else:
+        key = "url-" + hashlib.sha1(video_url.strip().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(_metadata_cache_dir(), f"{key}.json")
+
+
+def _slim_info(info: dict) -> dict:
+    """Ambil field penting dari info dict yt-dlp agar cache tetap kecil"""
+    return {
+        "id": info.get("id"),
+        "extractor_key": info.get("extractor_key") or info.get("extractor"),
+        "title": info.get("title"),
+        "duration": info.get("duration"),
+        "webpage_url": info.get("webpage_url"),
+        "uploader": info.get("uploader"),
+        "is_live": info.get("is_live"),
+        "formats": [
+            {field: fmt.get(field) for field in _FORMAT_FIELDS}
+            for fmt in info.get("formats") or []
+        ],
+        "subtitles": sorted((info.get("subtitles") or {}).keys()),
+        "automatic_captions": sorted((info.get("automatic_captions") or {}).keys()),
+    }
+
+
+def fetch_metadata(video_url: str, use_cache: bool = True) -> dict:
+    """
+    Ambil metadata video dengan extract_info(download=False), di-cache ke disk
+
+    Args:
+        video_url: URL video
+        use_cache: Jika True, pakai metadata dari cache jika masih berlaku
+
+    Returns:
+        Dict metadata ringkas (id, title, duration, formats, subtitles, ...).
+        Jika baru diambil dari jaringan, info lengkap yt-dlp disertakan di key "_info"
+        (tidak ikut disimpan ke disk) agar download tidak perlu ekstraksi ulang.
+    """
+    cache_path = _metadata_cache_path(video_url)
+    if use_cache and os.path.exists(cache_path):
+        if time.time() - os.path.getmtime(cache_path) < METADATA_TTL:
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+                print(f"⚡ Metadata ditemukan di cache: {metadata.get('title')}")
+                return metadata
+            except (OSError, ValueError):
+                pass
+
+    print(f"🔎 Mengambil metadata video: {video_url}")
+    ydl_opts = build_ydl_opts(['android'])
+    ydl_opts['quiet'] = True
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+
+    metadata = _slim_info(info)
+    Path(os.path.dirname(cache_path)).mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+    metadata["_info"] = info
+    return metadata
+
+
+def choose_ocr_height(formats: list, min_height: int = MIN_OCR_HEIGHT) -> int:
+    """
+    Pilih resolusi video terendah yang masih cukup untuk OCR
+
+    Returns:
+        Tinggi (pixel) yang dipilih, atau None jika tidak ada info resolusi
+    """
+    heights = sorted({
+        fmt["height"] for fmt in formats
+        if fmt.get("height") and fmt.get("vcodec") not in (None, "none")
+    })
+    if not heights:
+        return None
+    for height in heights:
+        if height >= min_height:
+            return height
+    # Tidak ada yang memenuhi minimal, pakai resolusi tertinggi yang tersedia
+    return heights[-1]
+
+
+def plan_pipeline(video_url: str, enable_ocr: bool = True, ocr_interval: int = 5,
+                  min_ocr_height: int = MIN_OCR_HEIGHT, use_cache: bool = True,
+                  metadata: dict = None) -> dict:
+    """
+    Rencanakan pipeline analisis berdasarkan metadata video (tanpa download)
+
+    Args:
+        video_url: URL video
+        enable_ocr: Jika False, cukup download audio saja
+        ocr_interval: Interval OCR dalam detik
+        min_ocr_height: Resolusi minimal untuk OCR
+        use_cache: Pakai metadata dari cache jika ada
+        metadata: Hasil fetch_metadata() yang sudah diambil sebelumnya (opsional), agar
+                  info lengkap yt-dlp di dalamnya tetap bisa dipakai ulang oleh download
+
+    Returns:
+        Dict metadata bersama yang dibawa ke setiap stage, dengan format:
+        {
+            "url": ..., "id": ..., "title": ..., "duration": 213.0,
+            "has_subtitles": False,
+            "plan": {
+                "streams": ["audio", "video"],
+                "video_height": 480,
+                "format": "bestvideo[height<=480]+bestaudio/...",
+                "enable_ocr": True,
+                "ocr_interval": 5
+            }
+        }
+    """
+    if metadata is None:
+        metadata = fetch_metadata(video_url, use_cache=use_cache)
+    formats = metadata.get("formats") or []
+
+    if enable_ocr:
+        height = choose_ocr_height(formats, min_ocr_height)
+        streams = ["audio", "video"]
+        if height:
+            format_selector = (
+                f"bestvideo[height<={height}]+bestaudio/"
+                f"best[height<={height}]/best"
+            )
+        else:
+            format_selector = "bestvideo+bestaudio/best"
+    else:
+        height = None
+        streams = ["audio"]
+        format_selector = "bestaudio/best"
+
+    video_info = {
+        "url": video_url,
+        "id": metadata.get("id"),
+        "extractor": metadata.get("extractor_key"),
+        "title": metadata.get("title"),
+        "duration": metadata.get("duration"),
+        "is_live": metadata.get("is_live"),
+        "has_subtitles": bool(metadata.get("subtitles")),
+        "subtitle_languages": metadata.get("subtitles", []),
+        "plan": {
+            "streams": streams,
+            "video_height": height,
+            "format": format_selector,
+            "enable_ocr": enable_ocr,
+            "ocr_interval": ocr_interval,
+        },
+    }
+    if "_info" in metadata:
+        video_info["_info"] = metadata["_info"]
+
+    print(f"🗺️  Rencana pipeline: stream={'+'.join(streams)}"
+          + (f", resolusi OCR={height}p" if height else "")
+          + (f", durasi={metadata['duration']:.0f} detik" if metadata.get("duration") else ""))
+    return video_info
+
+
+if __name__ == "__main__":
+    # Test
+    test_url = input("Masukkan URL video: ")
+    info = plan_pipeline(test_url)
+    info.pop("_info", None)
+    print(json.dumps(info, indent=2, ensure_ascii=False))
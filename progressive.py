@@ -0,0 +1,89 @@
+"""
+Modul untuk analisis progresif: transkripsi audio per potongan selagi file masih didownload
+"""
+import os
+
+from audio_extractor import extract_audio
+from cancellation import CancellationToken, JobCancelled
+
+
+class ProgressiveTranscriber:
+    def __init__(self, stt, output_dir: str = "downloads", chunk_seconds: float = None,
+                 safety_margin: float = 10.0, poll_interval: float = 2.0, language: str = "id",
+                 token: CancellationToken = None):
+        """
+        Inisialisasi transkripsi progresif
+
+        Args:
+            stt: Instance SpeechToText yang sudah di-load
+            output_dir: Direktori untuk file audio potongan
+            chunk_seconds: Panjang minimal potongan audio yang ditranskripsi sekaligus
+                           (default: PROGRESSIVE_CHUNK_SECONDS atau 120 detik)
+            safety_margin: Jarak aman (detik) dari ujung data yang sudah tertulis, karena
+                           perkiraan posisi dari jumlah byte tidak presisi
+            poll_interval: Interval cek progress download (detik)
+            language: Bahasa audio
+            token: CancellationToken (opsional), dicek selama menunggu download dan transkripsi
+        """
+        self.stt = stt
+        self.output_dir = output_dir
+        self.chunk_seconds = chunk_seconds or float(os.getenv("PROGRESSIVE_CHUNK_SECONDS", "120"))
+        self.safety_margin = safety_margin
+        self.poll_interval = poll_interval
+        self.language = language
+        self.token = token or CancellationToken()
+
+    def _transcribe_range(self, media_path: str, start: float, end: float = None) -> list:
+        audio_path = extract_audio(media_path, self.output_dir, start=start, end=end, token=self.token)
+        try:
+            return self.stt.transcribe(audio_path, language=self.language, no_filter=True, offset=start,
+                                       token=self.token)
+        finally:
+            try:
+                os.remove(audio_path)
+            except OSError:
+                pass
+
+    def run(self, download_future, progress, duration: float = None) -> list:
+        """
+        Transkripsi audio yang sedang didownload, potongan demi potongan
+
+        Args:
+            download_future: Future dari download stream audio (hasil: path file final)
+            progress: DownloadProgress yang terpasang di download tersebut
+            duration: Durasi video (detik) dari metadata, untuk memetakan byte ke waktu.
+                      Jika tidak diketahui, transkripsi menunggu download selesai
+
+        Returns:
+            List segmen transkripsi (format sama dengan SpeechToText.transcribe)
+        """
+        segments = []
+        position = 0.0
+        progressive_ok = bool(duration)
+
+        while progressive_ok and not download_future.done():
+            ready = duration * progress.fraction() - self.safety_margin
+            partial_path = progress.tmpfilename
+            if not partial_path or ready - position < self.chunk_seconds:
+                self.token.sleep(self.poll_interval)
+                continue
+
+            # Potong di batas waktu yang sudah pasti tertulis, sisanya menunggu data berikutnya
+            end = position + self.chunk_seconds * int((ready - position) // self.chunk_seconds)
+            print(f"   ⏩ Transkripsi progresif {position:.0f}-{end:.0f} detik "
+                  f"(download {progress.fraction() * 100:.0f}%)")
+            try:
+                segments.extend(self._transcribe_range(partial_path, position, end))
+                position = end
+            except JobCancelled:
+                raise
+            except Exception as e:
+                # File parsial belum bisa didecode (mis. container non-fragmented): tunggu selesai
+                print(f"   ⚠️  File parsial tidak bisa dibaca ({str(e)[:80]}), menunggu download selesai...")
+                progressive_ok = False
+
+        # Sisa audio setelah download selesai
+        media_path = self.token.result(download_future)
+        print(f"   ⏩ Transkripsi sisa audio mulai {position:.0f} detik")
+        segments.extend(self._transcribe_range(media_path, position))
+        return segments
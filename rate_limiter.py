@@ -0,0 +1,203 @@
+"""
+Modul rate limiter token bucket untuk Groq: satu limiter bersama per proses membatasi request
+per menit dan token per menit, disesuaikan dari header x-ratelimit-* respons, dan memberi jeda
+bersama saat Groq membalas 429. Aman dipakai dari banyak thread dan event loop sekaligus
+"""
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+
+
+# Batas default Groq free tier (llama-3.1-8b-instant). Bisa diganti lewat GROQ_RPM / GROQ_TPM;
+# header respons Groq akan menyesuaikan batas token sebenarnya
+DEFAULT_RPM = 30
+DEFAULT_TPM = 6000
+
+# Retry 429: backoff eksponensial dengan full jitter, atau retry-after dari server
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "6"))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Jeda maksimal satu kali tidur saat menunggu kuota (agar token pembatalan tetap dicek)
+WAIT_SLICE = 0.5
+
+
+def parse_reset(value: str) -> float:
+    """
+    Parse durasi reset dari header Groq ("7.66s", "2m59.56s", "120ms", atau detik polos)
+
+    Returns:
+        Detik (0 jika format tidak dikenali)
+    """
+    if not value:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    seconds = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """Jeda sebelum retry ke-attempt: retry-after server (+ jitter kecil) atau full jitter"""
+    if retry_after:
+        return retry_after + random.uniform(0, min(1.0, retry_after * 0.1))
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_second: float, clock=time.monotonic):
+        """
+        Token bucket yang boleh minus (reservasi): pemanggil yang meminta lebih dari isi bucket
+        mendapat waktu tunggu sampai defisitnya terisi, sehingga antrian tetap adil (FIFO)
+
+        Args:
+            capacity: Isi maksimal bucket (burst)
+            per_second: Kecepatan pengisian
+            clock: Fungsi waktu (diganti di test)
+        """
+        self.capacity = capacity
+        self.per_second = per_second
+        self.level = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Ambil amount dari bucket; kembalikan detik yang harus ditunggu sebelum dipakai"""
+        self._refill()
+        amount = min(amount, self.capacity)  # Satu request besar tetap bisa jalan saat bucket penuh
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.per_second
+
+    def refund(self, amount: float):
+        """Kembalikan token yang tidak terpakai (mis. jawaban lebih pendek dari max_tokens)"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def drain(self, remaining: float, reset_seconds: float):
+        """Samakan isi bucket dengan sisa kuota yang dilaporkan server"""
+        self._refill()
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+        if remaining is not None and remaining <= 0 and reset_seconds:
+            self.level = min(self.level, -reset_seconds * self.per_second)
+
+
+class RateLimiter:
+    def __init__(self, rpm: float = None, tpm: float = None, clock=time.monotonic):
+        """
+        Limiter request/menit dan token/menit
+
+        Args:
+            rpm: Request per menit (default: GROQ_RPM atau 30)
+            tpm: Token per menit, prompt + jawaban (default: GROQ_TPM atau 6000)
+        """
+        rpm = rpm or float(os.getenv("GROQ_RPM", DEFAULT_RPM))
+        tpm = tpm or float(os.getenv("GROQ_TPM", DEFAULT_TPM))
+        self.requests = TokenBucket(rpm, rpm / 60.0, clock)
+        self.tokens = TokenBucket(tpm, tpm / 60.0, clock)
+        self._clock = clock
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Reservasi satu request + tokens; kembalikan detik tunggu sebelum request boleh dikirim"""
+        with self._lock:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+            return max(wait, self._paused_until - self._clock())
+
+    async def acquire(self, tokens: int, token=None):
+        """
+        Tunggu (async) sampai kuota cukup untuk satu request dengan perkiraan tokens
+
+        Args:
+            tokens: Perkiraan token prompt + max_tokens jawaban
+            token: CancellationToken (opsional), dicek selama menunggu
+        """
+        deadline = self._clock() + self.reserve(tokens)
+        try:
+            while True:
+                if token is not None:
+                    token.check()
+                # Jeda bersama dari 429 bisa datang setelah reservasi
+                with self._lock:
+                    deadline = max(deadline, self._paused_until)
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return
+                await asyncio.sleep(min(WAIT_SLICE, remaining))
+        except BaseException:
+            # Dibatalkan sebelum request dikirim: reservasi token dikembalikan
+            self.settle(tokens, 0)
+            raise
+
+    def settle(self, reserved: int, used: int):
+        """Kembalikan selisih token yang direservasi dengan yang benar-benar dipakai"""
+        if used is not None and used < reserved:
+            with self._lock:
+                self.tokens.refund(reserved - used)
+
+    def update_from_headers(self, headers):
+        """
+        Sesuaikan limiter dari header respons Groq:
+        x-ratelimit-limit-tokens, x-ratelimit-remaining-tokens, x-ratelimit-reset-tokens,
+        x-ratelimit-remaining-requests, x-ratelimit-reset-requests
+        """
+        if not headers:
+            return
+
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        limit_tokens = number("x-ratelimit-limit-tokens")
+        remaining_tokens = number("x-ratelimit-remaining-tokens")
+        remaining_requests = number("x-ratelimit-remaining-requests")
+        with self._lock:
+            if limit_tokens and limit_tokens != self.tokens.capacity:
+                self.tokens.capacity = limit_tokens
+                self.tokens.per_second = limit_tokens / 60.0
+            self.tokens.drain(remaining_tokens, parse_reset(headers.get("x-ratelimit-reset-tokens")))
+            if remaining_requests is not None and remaining_requests <= 0:
+                # Kuota request (harian di Groq) habis: semua request menunggu sampai reset
+                reset = parse_reset(headers.get("x-ratelimit-reset-requests"))
+                self._paused_until = max(self._paused_until, self._clock() + reset)
+
+    def pause(self, seconds: float):
+        """Jeda semua request (mis. setelah 429 dengan retry-after)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def shared_limiter() -> RateLimiter:
+    """Limiter bersama untuk semua ReportGenerator dalam proses ini"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
+
+
+if __name__ == "__main__":
+    # Test: 10 request 1000 token dengan batas 30 RPM / 6000 TPM
+    limiter = RateLimiter(rpm=30, tpm=6000)
+    for idx in range(10):
+        print(f"Request {idx + 1}: tunggu {limiter.reserve(1000):.1f} detik")
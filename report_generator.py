@@ -2,22 +2,276 @@
 Modul untuk generate laporan analisis menggunakan Groq API
 """
 import os
+import re
+import math
 import json
-from groq import Groq
+import hashlib
+import time
+import queue
+import asyncio
+import threading
+from groq import Groq, AsyncGroq, RateLimitError
 from dotenv import load_dotenv
 
+import metrics
+from cancellation import JobCancelled
+from rate_limiter import shared_limiter, backoff_delay, parse_reset, MAX_RETRIES
+from model_health import ModelHealth
+from llm_cache import LLMCache, make_key, cache_enabled
+from lexicon_detector import scan, summarize_hits, context_windows, lexicon_hash
+from timeline import Timeline, OCR_DEDUP_THRESHOLD
+from token_usage import UsageRecorder, UsageHistory, print_usage
+
 # Load environment variables
 load_dotenv()
 
+SYSTEM_PROMPT = """Anda adalah ahli analisis konten digital yang berpengalaman dalam mendeteksi cyberbullying, ujaran kebencian, konten seksual/vulgar, dan konten berbahaya lainnya.
+
+PENTING:
+- JANGAN filter atau sensor kata-kata vulgar/kasar - Anda HARUS mendeteksi dan melaporkannya apa adanya
+- Identifikasi dan laporkan semua bahasa vulgar, seksual, kasar, atau tidak pantas
+- Kata-kata seperti "ngewe", "memek", "kontol", "anjing", dll HARUS dideteksi dan dilaporkan
+- Gunakan kutipan langsung dari transkrip untuk mendukung analisis
+- Berikan analisis objektif, detail, dan actionable dengan bahasa profesional"""
+
+# Versi prompt laporan, bagian dari key checkpoint stage laporan. WAJIB dinaikkan setiap kali
+# isi prompt berubah selain teks konstanta di bawah (_create_*_prompt, _format_item,
+# _video_header, bagian leksikon/timeline, _clean_report), agar laporan lama tidak dipakai lagi.
+# Cache respons LLM tidak bergantung pada ini (key-nya hash pesan yang benar-benar dikirim)
+PROMPT_VERSION = 2
+
+# Parameter generate laporan
+REPORT_TEMPERATURE = 0.5  # Lebih seimbang untuk analisis naratif
+REPORT_MAX_TOKENS = 3000  # Lebih banyak token untuk laporan lengkap
+
+# Context window model Groq (token). Transkrip yang tidak muat dalam satu request dianalisis
+# per bagian (map) lalu temuannya digabung menjadi laporan akhir (reduce)
+MODEL_CONTEXT = {
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "llama-3.1-70b-versatile": 131072,
+    "llama-3.2-90b-versatile": 8192,
+    "llama-3.2-11b-versatile": 8192,
+    "mixtral-8x7b-32768": 32768,
+}
+DEFAULT_CONTEXT = 8192
+
+# Budget token input per request. Membatasi latency satu panggilan (dan batas TPM Groq)
+# walaupun context window model jauh lebih besar
+REPORT_CHUNK_TOKENS = int(os.getenv("REPORT_CHUNK_TOKENS", "6000"))
+REPORT_MAP_MAX_TOKENS = 800   # Panjang temuan per bagian
+REPORT_MAP_WORKERS = int(os.getenv("REPORT_MAP_WORKERS", "4"))  # Request map paralel
+
+# Detektor leksikon lokal: hit dan konteksnya ditaruh di awal prompt (maks sebagian budget).
+# Video tanpa hit: "llm" = analisis lengkap seperti biasa, "summary" = satu request ringkas
+# dengan sampel transkrip, "skip" = laporan lokal tanpa request ke Groq
+LEXICON_CONTEXT_ITEMS = 2      # Segmen sebelum/sesudah hit yang ikut ditampilkan
+LEXICON_PROMPT_SHARE = 0.3     # Porsi maksimal budget token untuk bagian hit leksikon
+LEXICON_CLEAN_MODE = os.getenv("LEXICON_CLEAN_MODE", "llm")
+REPORT_SUMMARY_MAX_TOKENS = 1000
+
+CHARS_PER_TOKEN = 3.5         # Perkiraan kasar untuk teks campuran Indonesia/Inggris
+PROMPT_OVERHEAD_TOKENS = 1200  # System prompt + instruksi format laporan
+
+REPORT_FORMAT = """INSTRUKSI:
+Buatlah laporan analisis dalam format berikut:
+
+RINGKASAN EKSEKUTIF
+- Berikan overview singkat tentang isi video
+- Sebutkan apakah ada konten berbahaya atau tidak
+- Jika ada, sebutkan jenis dan tingkat keparahannya
+
+ANALISIS KONTEN
+- Jelaskan tema utama video
+- Analisis tone dan konteks percakapan
+- Identifikasi jika ada bahasa yang:
+  * Vulgar atau seksual (contoh: kata-kata seperti "ngewe", "memek", "kontol", dll)
+  * Menghina atau merendahkan seseorang
+  * Mengancam atau mengintimidasi
+  * Mengandung kebencian terhadap kelompok tertentu
+  * Mempromosikan kekerasan atau perilaku berbahaya
+  * Gossip atau rumor yang merugikan reputasi orang lain
+
+TEMUAN DETAIL (jika ada konten berbahaya)
+Untuk setiap temuan, tuliskan:
+- Timestamp: [waktu]
+- Kutipan: "teks yang bermasalah"
+- Jenis: [cyberbullying/ujaran kebencian/ancaman/dll]
+- Tingkat bahaya: [rendah/sedang/tinggi/kritis]
+- Penjelasan: mengapa ini berbahaya
+
+REKOMENDASI
+- Jika ada konten berbahaya: berikan rekomendasi tindakan (review manual, warning, removal, dll)
+- Jika tidak ada: nyatakan bahwa video aman untuk ditayangkan
+- Saran umum untuk creator atau moderator
+
+KESIMPULAN
+- Ringkasan final dalam 2-3 kalimat
+
+PENTING:
+- Gunakan bahasa Indonesia yang jelas dan profesional
+- Jangan menulis dalam format template atau poin-poin kosong
+- Langsung berikan analisis substantif, bukan struktur kosong
+- JANGAN filter atau sensor kata-kata vulgar/kasar - tulis apa adanya untuk tujuan deteksi
+- HARUS mendeteksi dan melaporkan semua kata vulgar, seksual, atau kasar yang ditemukan
+- Berikan contoh konkret dari transkrip (termasuk kata vulgar) untuk mendukung analisis
+- Jika tidak ada konten berbahaya, katakan dengan jelas dan fokus pada konten positif video
+- Analisis konteks: apakah percakapan mengandung gossip, rumor, atau membahas privasi orang lain tanpa izin
+"""
+
+FINDINGS_FORMAT = """Tulis hasil dalam format berikut:
+
+RINGKASAN BAGIAN: 2-3 kalimat tentang isi dan tone bagian ini
+
+TEMUAN:
+- [timestamp] "kutipan apa adanya" | jenis | tingkat bahaya (rendah/sedang/tinggi/kritis) | penjelasan singkat
+
+Jika tidak ada konten berbahaya, tulis "TEMUAN: tidak ada". Jangan sensor kata vulgar/kasar,
+jangan mengarang temuan, dan pertahankan timestamp asli."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Perkiraan jumlah token teks (tanpa tokenizer)"""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def chunk_budget(model: str) -> int:
+    """Budget token untuk teks transkrip dalam satu request ke model"""
+    context = MODEL_CONTEXT.get(model, DEFAULT_CONTEXT)
+    request_tokens = min(REPORT_CHUNK_TOKENS, context - REPORT_MAX_TOKENS)
+    return max(500, request_tokens - PROMPT_OVERHEAD_TOKENS)
+
+
+# Batas aman dari context window model (estimate_tokens hanya perkiraan dari jumlah karakter)
+CONTEXT_SAFETY = 0.9
+
+# Jika prompt tidak muat, max_tokens jawaban boleh dikurangi sampai proporsi ini sebelum
+# prompt dipadatkan
+MIN_ANSWER_SHARE = 0.5
+
+# Panjang maksimal satu baris transkrip saat prompt dipadatkan
+COMPACT_LINE_CHARS = 300
+
+# Baris transkrip dalam prompt: "12. [00:01:02] ...", ">> 12. [...]" (hit leksikon) atau
+# "   12. [...]" (konteks hit)
+ITEM_LINE = re.compile(r"^(>> |   )?\d+\. \[")
+
+
+def fit_context(prompt: str, max_tokens: int, model: str) -> tuple:
+    """
+    Pastikan prompt + jawaban muat dalam context window model. Jawaban dikurangi lebih dulu
+    (sampai MIN_ANSWER_SHARE dari max_tokens), baru kemudian prompt dipadatkan
+
+    Returns:
+        Tuple (prompt, max_tokens); prompt yang sama (objek yang sama) jika tidak dipadatkan
+    """
+    context = int(MODEL_CONTEXT.get(model, DEFAULT_CONTEXT) * CONTEXT_SAFETY)
+    prompt_tokens = estimate_tokens(SYSTEM_PROMPT + prompt)
+    if prompt_tokens + max_tokens <= context:
+        return prompt, max_tokens
+    min_answer = int(max_tokens * MIN_ANSWER_SHARE)
+    if prompt_tokens + min_answer <= context:
+        return prompt, context - prompt_tokens
+    
+    compacted = compact_prompt(prompt, context - min_answer - estimate_tokens(SYSTEM_PROMPT))
+    metrics.increment("llm_prompt_compacted")
+    print(f"   🗜️  Prompt ~{prompt_tokens} token melebihi context window {model}, "
+          f"dipadatkan menjadi ~{estimate_tokens(SYSTEM_PROMPT + compacted)} token")
+    return compacted, min_answer
+
+
+def compact_prompt(prompt: str, budget: int) -> str:
+    """
+    Padatkan prompt sampai muat budget token, bertahap dari yang tidak menghilangkan isi:
+    spasi berlebih dan baris identik berurutan, baris transkrip yang sangat panjang dipotong,
+    baris transkrip tanpa hit leksikon dilewati secara merata sepanjang video, dan terakhir
+    prompt dipotong di akhir
+    """
+    lines = []
+    for line in prompt.split("\n"):
+        line = " ".join(line.split()) if ITEM_LINE.match(line) else line.rstrip()
+        if line and lines and lines[-1] == line:
+            continue
+        lines.append(line)
+    size = lambda candidate: estimate_tokens("\n".join(candidate))
+    if size(lines) <= budget:
+        return "\n".join(lines)
+    
+    lines = [line[:COMPACT_LINE_CHARS] + "..." if ITEM_LINE.match(line) and len(line) > COMPACT_LINE_CHARS
+             else line for line in lines]
+    if size(lines) <= budget:
+        return "\n".join(lines)
+    
+    droppable = [idx for idx, line in enumerate(lines) if ITEM_LINE.match(line) and not line.startswith(">> ")]
+    keep = [True] * len(lines)
+    kept_lines = lambda: [line for line, kept in zip(lines, keep) if kept]
+    dropped = 0
+    while droppable and size(kept_lines()) > budget:
+        # Perkiraan jumlah baris yang harus dilewati, diambil merata dari baris yang tersisa
+        average = sum(len(lines[idx]) + 1 for idx in droppable) / len(droppable)
+        excess_chars = (size(kept_lines()) - budget) * CHARS_PER_TOKEN + 100
+        count = min(len(droppable), max(1, math.ceil(excess_chars / average)))
+        step = len(droppable) / count
+        for k in range(count):
+            keep[droppable[int(k * step)]] = False
+        dropped += count
+        droppable = [idx for idx in droppable if keep[idx]]
+    lines = kept_lines()
+    if dropped:
+        lines.append(f"\n[CATATAN: {dropped} baris transkrip dilewati agar prompt muat context window model]")
+    
+    text = "\n".join(lines)
+    if estimate_tokens(text) > budget:
+        text = text[:int((budget - 1) * CHARS_PER_TOKEN)]
+    return text
+
+
+def report_config() -> dict:
+    """
+    Konfigurasi yang menentukan hasil laporan (model, prompt, parameter), untuk key checkpoint.
+    Perubahan prompt (teks konstanta atau PROMPT_VERSION) atau model hanya membuat stage
+    laporan dijalankan ulang
+    """
+    model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+    prompt_text = SYSTEM_PROMPT + REPORT_FORMAT + FINDINGS_FORMAT
+    return {
+        "model": model,
+        "prompt": hashlib.sha1(prompt_text.encode("utf-8")).hexdigest(),
+        "prompt_version": PROMPT_VERSION,
+        "temperature": REPORT_TEMPERATURE,
+        "max_tokens": REPORT_MAX_TOKENS,
+        "chunk_tokens": chunk_budget(model),
+        "lexicon": lexicon_hash(),
+        "lexicon_clean_mode": LEXICON_CLEAN_MODE,
+        "ocr_dedup_threshold": OCR_DEDUP_THRESHOLD,
+    }
+
 
 class ReportGenerator:
-    def __init__(self):
-        """Inisialisasi Groq client"""
+    def __init__(self, use_cache: bool = True, cache: LLMCache = None, limiter=None,
+                 health: ModelHealth = None, base_url: str = None):
+        """
+        Inisialisasi Groq client
+        
+        Args:
+            use_cache: Jika False, cache respons di disk dilewati (selalu request ke Groq,
+                       hasilnya tetap disimpan). LLM_CACHE=0 mematikan cache sepenuhnya
+            cache: Instance LLMCache (default: LLMCache() di LLM_CACHE_DIR)
+            limiter: RateLimiter (default: limiter bersama satu proses, GROQ_RPM/GROQ_TPM)
+            health: Registry kesehatan model (default: ModelHealth() di GROQ_MODEL_HEALTH_FILE)
+            base_url: Base URL API yang kompatibel dengan Groq, mis. server mock lokal untuk
+                      benchmark (default: GROQ_BASE_URL atau API Groq)
+        """
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY tidak ditemukan di environment variables!")
         
-        self.client = Groq(api_key=api_key)
+        self._api_key = api_key
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL") or None
+        # Client AsyncGroq terikat ke event loop, jadi dibuat per panggilan agenerate_report.
+        # Jika diisi (mis. di test), client ini yang dipakai
+        self.client = None
+        self.limiter = limiter or shared_limiter()
         # Model default: llama-3.1-8b-instant (masih aktif dan cepat)
         # Alternatif yang mungkin aktif: llama-3.3-70b-versatile, llama-3.1-70b-versatile
         self.model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
@@ -29,91 +283,305 @@ class ReportGenerator:
             "llama-3.2-90b-versatile",
             "llama-3.2-11b-versatile",
         ]
-        print(f"✅ Groq client initialized dengan model: {self.model}")
+        # Model yang decommissioned atau circuit-nya terbuka dilewati tanpa request
+        self.health = health or ModelHealth()
+        # Model yang dilewati di run sebelumnya dicek ulang di background sejak awal
+        models = list(dict.fromkeys([self.model] + self.fallback_models))
+        if self.health.due_for_probe() or self.health.skipped(models):
+            self.health.ensure_probe(self._probe)
+        self.use_cache = use_cache
+        self.cache = (cache or LLMCache()) if cache_enabled() else None
+        # Ringkasan usage token/latency laporan terakhir (lihat token_usage.UsageRecorder)
+        self.last_usage = None
+        endpoint = f" ({self.base_url})" if self.base_url else ""
+        print(f"✅ Groq client initialized dengan model: {self.model}{endpoint}")
+    
+    def generate_report(self, speech_data: list, ocr_data: list, video_info: dict = None,
+                        token=None, on_chunk=None) -> str:
+        """
+        Generate laporan analisis cyberbullying dari data yang dikumpulkan (versi sinkron
+        dari agenerate_report, untuk stage pipeline yang berjalan di thread)
+        
+        Returns:
+            String laporan lengkap dalam format teks
+        """
+        return asyncio.run(self.agenerate_report(speech_data, ocr_data, video_info, token=token,
+                                                 on_chunk=on_chunk))
+    
+    def stream_report(self, speech_data: list, ocr_data: list, video_info: dict = None, token=None):
+        """
+        Versi sinkron astream_report: laporan dibuat di thread terpisah dan potongan teksnya
+        di-yield begitu diterima (mis. untuk st.write_stream atau CLI)
+        
+        Yields:
+            Potongan teks laporan akhir
+        """
+        chunks = queue.Queue()
+        done = object()
+        result = {}
+        
+        def run():
+            try:
+                result["report"] = self.generate_report(speech_data, ocr_data, video_info, token=token,
+                                                        on_chunk=chunks.put)
+            except BaseException as e:
+                result["error"] = e
+            finally:
+                chunks.put(done)
+        
+        worker = threading.Thread(target=run, name="report-stream", daemon=True)
+        worker.start()
+        while True:
+            piece = chunks.get()
+            if piece is done:
+                break
+            yield piece
+        worker.join()
+        if "error" in result:
+            raise result["error"]
+    
+    async def astream_report(self, speech_data: list, ocr_data: list, video_info: dict = None, token=None):
+        """
+        Generate laporan sebagai async generator: potongan teks laporan akhir di-yield begitu
+        diterima dari Groq, sehingga teks pertama muncul setelah time-to-first-token, bukan
+        setelah seluruh laporan selesai. Gabungan semua potongan sama dengan hasil agenerate_report
+        
+        Yields:
+            Potongan teks laporan akhir
+        """
+        chunks = asyncio.Queue()
+        done = object()
+        
+        async def run():
+            try:
+                return await self.agenerate_report(speech_data, ocr_data, video_info, token=token,
+                                                   on_chunk=chunks.put_nowait)
+            finally:
+                chunks.put_nowait(done)
+        
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                piece = await chunks.get()
+                if piece is done:
+                    break
+                yield piece
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
     
-    def generate_report(self, speech_data: list, ocr_data: list, video_info: dict = None) -> str:
+    async def agenerate_report(self, speech_data: list, ocr_data: list, video_info: dict = None,
+                               token=None, on_chunk=None) -> str:
         """
-        Generate laporan analisis cyberbullying dari data yang dikumpulkan
+        Generate laporan analisis cyberbullying dari data yang dikumpulkan.
+        
+        Jika seluruh transkrip muat dalam budget token model, laporan dibuat dengan satu
+        request. Jika tidak, transkrip dibagi per bagian waktu yang dianalisis paralel (map),
+        lalu temuan semua bagian digabung menjadi laporan akhir (reduce). Semua request
+        melewati rate limiter bersama, jadi banyak laporan bisa berjalan bersamaan dalam
+        satu event loop tanpa melewati kuota Groq
         
         Args:
             speech_data: List hasil transkripsi audio
             ocr_data: List hasil OCR dari frame video
             video_info: Informasi video (opsional)
+            token: CancellationToken (opsional); dicek sebelum setiap request dan sisa
+                   waktu deadline dipakai sebagai timeout request Groq
+            on_chunk: Callback on_chunk(teks) (opsional). Request laporan akhir dikirim
+                      dengan streaming dan setiap potongan teks diteruskan begitu diterima
             
         Returns:
             String laporan lengkap dalam format teks
         """
+        client = self.client or AsyncGroq(api_key=self._api_key, base_url=self.base_url, max_retries=0)
+        usage = UsageRecorder()
+        try:
+            report = await self._generate(client, speech_data, ocr_data, video_info, token, on_chunk, usage)
+        finally:
+            if client is not self.client:
+                await client.close()
+        
+        # Usage token dan latency laporan ini disimpan per video
+        self.last_usage = usage.summary()
+        print_usage(self.last_usage)
+        try:
+            UsageHistory().record({**self.last_usage, "title": (video_info or {}).get("title"),
+                                   "url": (video_info or {}).get("url")})
+        except OSError as e:
+            print(f"   ⚠️  Gagal menyimpan riwayat usage: {str(e)[:100]}")
+        return report
+    
+    async def _generate(self, client, speech_data: list, ocr_data: list, video_info: dict, token,
+                        on_chunk=None, usage: UsageRecorder = None) -> str:
         print("🤖 Generating laporan dengan Groq AI...")
+        skipped = self.health.skipped(list(dict.fromkeys([self.model] + self.fallback_models)))
+        if skipped:
+            print(f"   ⏭️  Model dilewati: {', '.join(f'{m} ({state})' for m, state in skipped.items())}")
         
-        # Gabungkan semua teks untuk analisis
-        all_texts = []
+        # Gabungkan speech dan OCR menurut waktu agar setiap bagian mencakup rentang waktu yang
+        # utuh; teks OCR yang berulang di frame berikutnya atau sama dengan ucapan dilewati
+        timeline = Timeline.from_sources(speech_data, ocr_data)
+        all_texts = timeline.items()
+        if timeline.stats["ocr_repeated"] or timeline.stats["ocr_spoken"]:
+            print(f"   🧹 Timeline: {timeline.stats['ocr_repeated']} frame OCR berulang digabung, "
+                  f"{timeline.stats['ocr_spoken']} teks OCR sama dengan ucapan dilewati")
         
-        # Tambahkan teks dari speech
-        for seg in speech_data:
-            all_texts.append({
-                "source": "speech",
-                "text": seg["text"],
-                "timestamp": seg["timestamp"]
-            })
+        # Pre-screening lokal: semua teks di-scan sekali dengan detektor leksikon
+        hits = scan(all_texts)
+        if hits:
+            counts = ", ".join(f"{category}: {count}" for category, count in summarize_hits(hits).items())
+            print(f"   🔎 Detektor leksikon: {len(hits)} kata ditemukan ({counts})")
+        else:
+            print("   🔎 Detektor leksikon: tidak ada kata kasar/vulgar")
+            if LEXICON_CLEAN_MODE == "skip":
+                print("✅ Laporan dibuat tanpa Groq (LEXICON_CLEAN_MODE=skip)")
+                report = self._clean_report(all_texts, video_info)
+                if on_chunk:
+                    on_chunk(report)
+                return report
+            if LEXICON_CLEAN_MODE == "summary":
+                report = await self._acomplete(client, self._create_summary_prompt(all_texts, video_info),
+                                        REPORT_SUMMARY_MAX_TOKENS, token, on_chunk, usage)
+                print("✅ Laporan ringkas berhasil di-generate")
+                return report
         
-        # Tambahkan teks dari OCR
-        for ocr in ocr_data:
-            all_texts.append({
-                "source": "ocr",
-                "text": ocr["text"],
-                "timestamp": ocr["timestamp"]
-            })
+        budget = chunk_budget(self.model)
+        lexicon_section = self._lexicon_section(all_texts, hits, int(budget * LEXICON_PROMPT_SHARE))
+        chunks = self._split_chunks(all_texts, budget - estimate_tokens(lexicon_section))
+        if len(chunks) <= 1:
+            report = await self._acomplete(client, self._create_prompt(all_texts, video_info, lexicon_section),
+                                    REPORT_MAX_TOKENS, token, on_chunk, usage)
+            print("✅ Laporan berhasil di-generate")
+            return report
         
-        # Buat prompt untuk Groq
-        prompt = self._create_prompt(all_texts, video_info)
+        # Map: setiap bagian dianalisis paralel menjadi ringkasan + daftar temuan
+        print(f"   📚 {len(all_texts)} teks dibagi menjadi {len(chunks)} bagian (map-reduce)")
+        hit_terms = {}
+        for hit in hits:
+            hit_terms.setdefault(hit["index"] + 1, []).append(hit["term"])
+        prompts = [self._create_chunk_prompt(chunk, idx, len(chunks), video_info, hit_terms)
+                   for idx, chunk in enumerate(chunks, 1)]
+        findings = await self._acomplete_all(client, prompts, token, usage)
+        findings = [f"BAGIAN {idx} [{chunk[0]['timestamp']} - {chunk[-1]['timestamp']}]\n{text.strip()}"
+                    for idx, (chunk, text) in enumerate(zip(chunks, findings), 1)]
         
-        # Coba model utama dulu, lalu fallback ke model lain jika gagal
-        models_to_try = [self.model] + [m for m in self.fallback_models if m != self.model]
+        # Temuan yang masih terlalu panjang untuk satu request digabung bertahap
+        budget -= estimate_tokens(lexicon_section)
+        while len(findings) > 1 and estimate_tokens("\n\n".join(findings)) > budget:
+            groups = self._pack(findings, budget)
+            if len(groups) == len(findings):
+                # Setiap temuan sudah sebesar budget; gabungkan berpasangan agar tetap mengecil
+                groups = [findings[idx:idx + 2] for idx in range(0, len(findings), 2)]
+            print(f"   🔗 Menggabungkan {len(findings)} hasil bagian menjadi {len(groups)}...")
+            findings = await self._acomplete_all(client, [self._create_merge_prompt(group) for group in groups],
+                                                 token, usage)
+        
+        # Reduce: laporan akhir dari temuan semua bagian
+        print(f"   🧩 Menyusun laporan akhir dari {len(chunks)} bagian...")
+        report = await self._acomplete(client, self._create_reduce_prompt(findings, len(all_texts), video_info,
+                                                           lexicon_section),
+                                REPORT_MAX_TOKENS, token, on_chunk, usage)
+        print("✅ Laporan berhasil di-generate")
+        return report
+    
+    async def _acomplete_all(self, client, prompts: list, token=None, usage: UsageRecorder = None) -> list:
+        """Jalankan beberapa request map bersamaan (maks REPORT_MAP_WORKERS), urutan hasil sama"""
+        semaphore = asyncio.Semaphore(max(1, REPORT_MAP_WORKERS))
+        
+        async def run(prompt):
+            async with semaphore:
+                return await self._acomplete(client, prompt, REPORT_MAP_MAX_TOKENS, token, usage=usage)
+        
+        return await asyncio.gather(*(run(prompt) for prompt in prompts))
+    
+    async def _acomplete(self, client, prompt: str, max_tokens: int, token=None, on_chunk=None,
+                         usage: UsageRecorder = None) -> str:
+        """
+        Satu request chat ke Groq dengan fallback ke model lain jika model gagal.
+        Dengan on_chunk, request dikirim streaming; fallback hanya dilakukan selama belum ada
+        teks yang diteruskan (teks yang sudah tampil tidak bisa ditarik kembali).
+        Prompt yang tidak muat context window model dipadatkan dulu (fit_context)
+        
+        Returns:
+            Isi jawaban model
+        """
+        # Model utama lalu fallback, tanpa model yang sedang dilewati registry kesehatan
+        models_to_try = self.health.order(list(dict.fromkeys([self.model] + self.fallback_models)))
+        first_model = models_to_try[0]
+        
+        emitted = []
+        if on_chunk:
+            def forward(piece):
+                emitted.append(piece)
+                on_chunk(piece)
+        else:
+            forward = None
         
         last_error = None
         for model_name in models_to_try:
+            if token is not None:
+                token.check()
+            model_prompt, model_max_tokens = fit_context(prompt, max_tokens, model_name)
+            if model_prompt is not prompt and usage is not None:
+                usage.record_compaction()
+            messages = [
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": model_prompt
+                }
+            ]
+            params = {"temperature": REPORT_TEMPERATURE, "max_tokens": model_max_tokens}
+            cache_key = make_key(model_name, messages, params) if self.cache is not None else None
+            if cache_key and self.use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    if usage is not None:
+                        usage.record(model_name, cached=True)
+                    if on_chunk:
+                        on_chunk(cached)
+                    return cached
+            elif cache_key:
+                metrics.increment("llm_cache_bypass")
+            
             try:
-                if model_name != self.model:
+                if model_name != first_model:
                     print(f"   Mencoba model alternatif: {model_name}")
                 
                 # Kirim ke Groq API
-                response = self.client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": """Anda adalah ahli analisis konten digital yang berpengalaman dalam mendeteksi cyberbullying, ujaran kebencian, konten seksual/vulgar, dan konten berbahaya lainnya.
-
-PENTING:
-- JANGAN filter atau sensor kata-kata vulgar/kasar - Anda HARUS mendeteksi dan melaporkannya apa adanya
-- Identifikasi dan laporkan semua bahasa vulgar, seksual, kasar, atau tidak pantas
-- Kata-kata seperti "ngewe", "memek", "kontol", "anjing", dll HARUS dideteksi dan dilaporkan
-- Gunakan kutipan langsung dari transkrip untuk mendukung analisis
-- Berikan analisis objektif, detail, dan actionable dengan bahasa profesional"""
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.5,  # Lebih seimbang untuk analisis naratif
-                    max_tokens=3000  # Lebih banyak token untuk laporan lengkap
-                )
+                started = time.monotonic()
+                content = await self._request(client, model_name, messages, params, token, forward, usage)
+                self.health.record_success(model_name, time.monotonic() - started)
                 
-                report = response.choices[0].message.content
                 if model_name != self.model:
                     print(f"✅ Berhasil dengan model: {model_name}")
                     print(f"   💡 Update .env dengan: GROQ_MODEL={model_name}")
-                else:
-                    print("✅ Laporan berhasil di-generate")
-                return report
+                if cache_key and content:
+                    try:
+                        self.cache.put(cache_key, content, model=model_name)
+                    except OSError as e:
+                        print(f"   ⚠️  Gagal menyimpan cache LLM: {e}")
+                return content
                 
+            except JobCancelled:
+                raise
             except Exception as e:
                 error_str = str(e)
                 last_error = e
+                kind = self.health.record_failure(model_name, e)
+                if kind != "neutral":
+                    self.health.ensure_probe(self._probe)
+                if emitted:
+                    # Stream terputus setelah teks tampil: model lain akan mengulang dari awal
+                    print(f"   ⚠️  Stream {model_name} terputus: {error_str[:100]}")
+                    raise
                 
                 # Cek jika model decommissioned
-                if "decommissioned" in error_str.lower() or "model_decommissioned" in error_str:
+                if kind == "decommissioned":
                     print(f"   ⚠️  Model {model_name} sudah tidak didukung, mencoba model lain...")
                     continue
                 else:
@@ -134,22 +602,214 @@ PENTING:
         print("      GROQ_MODEL=llama-3.1-8b-instant")
         print("   3. Atau jalankan: python update_groq_model.py")
         raise Exception(f"Gagal generate laporan dengan semua model yang dicoba: {str(last_error)}")
+
+    async def _request(self, client, model: str, messages: list, params: dict, token=None,
+                       on_chunk=None, usage: UsageRecorder = None) -> str:
+        """
+        Kirim satu request setelah kuota limiter (request + token) tersedia. Header rate limit
+        respons menyesuaikan limiter; 429 di-retry dengan retry-after atau backoff + jitter.
+        Dengan on_chunk, jawaban diterima streaming dan setiap potongan teks diteruskan.
+        Usage respons (token prompt/jawaban) dan latency dicatat ke usage
+        
+        Returns:
+            Isi jawaban model
+        """
+        estimated_prompt = estimate_tokens(SYSTEM_PROMPT + messages[-1]["content"])
+        reserved = estimated_prompt + params["max_tokens"]
+        for attempt in range(MAX_RETRIES + 1):
+            await self.limiter.acquire(reserved, token)
+            request_options = {}
+            if token is not None and token.remaining() is not None:
+                request_options["timeout"] = token.remaining()
+            
+            if on_chunk:
+                request_options["stream"] = True
+            
+            metrics.increment("llm_requests")
+            sent = time.monotonic()
+            settled = False
+            try:
+                raw = await client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    **params,
+                    **request_options
+                )
+                self.limiter.update_from_headers(raw.headers)
+                response = await raw.parse()
+                if on_chunk:
+                    # Sisa reservasi dikembalikan _consume_stream (juga jika stream terputus)
+                    settled = True
+                    content, response_usage = await self._consume_stream(response, reserved, on_chunk, token,
+                                                                         sent, estimated_prompt)
+                else:
+                    content = response.choices[0].message.content
+                    response_usage = getattr(response, "usage", None)
+                    settled = True
+                    self.limiter.settle(reserved, getattr(response_usage, "total_tokens", None))
+            except RateLimitError as e:
+                # Request yang ditolak tidak memakai kuota token
+                metrics.increment("llm_rate_limited")
+                settled = True
+                self.limiter.settle(reserved, 0)
+                headers = e.response.headers
+                self.limiter.update_from_headers(headers)
+                if attempt == MAX_RETRIES:
+                    raise
+                retry_after = parse_reset(headers.get("retry-after"))
+                if retry_after:
+                    self.limiter.pause(retry_after)
+                delay = backoff_delay(attempt, retry_after)
+                print(f"   ⏳ Rate limit Groq ({model}), coba lagi dalam {delay:.1f} detik...")
+                await self._sleep(delay, token)
+                continue
+            finally:
+                if not settled:
+                    # Request gagal (error server, timeout, koneksi, pembatalan): reservasi
+                    # token dikembalikan agar tidak menguras kuota laporan lain
+                    self.limiter.settle(reserved, 0)
+            
+            if usage is not None:
+                usage.record(model, getattr(response_usage, "prompt_tokens", None),
+                             getattr(response_usage, "completion_tokens", None),
+                             time.monotonic() - sent, estimated_prompt)
+            return content
     
-    def _create_prompt(self, all_texts: list, video_info: dict = None) -> str:
-        """Buat prompt untuk Groq berdasarkan data yang dikumpulkan"""
+    async def _consume_stream(self, stream, reserved: int, on_chunk, token=None, sent: float = None,
+                              prompt_tokens: int = 0) -> tuple:
+        """
+        Baca stream jawaban: potongan teks diteruskan ke on_chunk, token pembatalan dicek di
+        antara potongan, dan usage di chunk terakhir (x_groq.usage) dipakai untuk limiter.
+        Jika stream terputus, reservasi dikembalikan kecuali perkiraan token prompt
+        (prompt_tokens) dan token jawaban yang sudah diterima
         
-        # Format teks dengan lebih readable
-        text_summary = ""
-        for i, item in enumerate(all_texts[:50], 1):  # Limit to 50 items to avoid token limit
-            source = "Audio" if item['source'] == 'speech' else "Teks di Video"
-            text_summary += f"{i}. [{item['timestamp']}] ({source}): {item['text']}\n"
+        Returns:
+            Tuple (isi jawaban lengkap, usage atau None)
+        """
+        sent = sent or time.monotonic()
+        parts = []
+        usage = None
+        completed = False
+        try:
+            async for chunk in stream:
+                if token is not None:
+                    token.check()
+                if chunk.choices:
+                    piece = chunk.choices[0].delta.content
+                    if piece:
+                        if not parts:
+                            print(f"   ⚡ Token pertama setelah {time.monotonic() - sent:.1f} detik")
+                        parts.append(piece)
+                        on_chunk(piece)
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None) or usage
+            completed = True
+        finally:
+            used = getattr(usage, "total_tokens", None)
+            if used is None and not completed:
+                used = prompt_tokens + estimate_tokens("".join(parts))
+            self.limiter.settle(reserved, used)
+            await stream.close()
+        return "".join(parts), usage
+    
+    async def _sleep(self, seconds: float, token=None):
+        """asyncio.sleep yang tetap mengecek token pembatalan"""
+        deadline = asyncio.get_running_loop().time() + seconds
+        while True:
+            if token is not None:
+                token.check()
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(0.5, remaining))
+    
+    def _probe(self, model: str):
+        """Request sangat kecil untuk mengecek ulang model yang dilewati (thread background)"""
+        time.sleep(self.limiter.reserve(20))
+        client = Groq(api_key=self._api_key, base_url=self.base_url, max_retries=0)
+        client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": "ping"}],
+            max_tokens=1,
+        )
+    
+    def _format_item(self, index: int, item: dict) -> str:
+        source = "Audio" if item['source'] == 'speech' else "Teks di Video"
+        return f"{index}. [{item['timestamp']}] ({source}): {item['text']}\n"
+    
+    def _split_chunks(self, all_texts: list, budget: int) -> list:
+        """Bagi teks berurutan waktu menjadi bagian yang masing-masing muat dalam budget token"""
+        chunks = [[]]
+        used = 0
+        for index, item in enumerate(all_texts, 1):
+            item = dict(item, index=index)
+            cost = estimate_tokens(self._format_item(index, item))
+            if chunks[-1] and used + cost > budget:
+                chunks.append([])
+                used = 0
+            chunks[-1].append(item)
+            used += cost
+        return [chunk for chunk in chunks if chunk]
+    
+    def _pack(self, texts: list, budget: int) -> list:
+        """Kelompokkan teks berurutan menjadi grup yang masing-masing muat dalam budget token"""
+        groups = [[]]
+        used = 0
+        for text in texts:
+            cost = estimate_tokens(text)
+            if groups[-1] and used + cost > budget:
+                groups.append([])
+                used = 0
+            groups[-1].append(text)
+            used += cost
+        return groups
+    
+    def _video_header(self, video_info: dict = None) -> tuple:
+        """Judul dan durasi video yang sudah diformat"""
+        video_title = video_info.get('title', 'Tidak diketahui') if video_info else 'Tidak diketahui'
+        video_duration = video_info.get('duration') if video_info else None
+        if isinstance(video_duration, (int, float)):
+            video_duration = self._format_duration(video_duration)
+        elif not video_duration:
+            video_duration = 'Tidak diketahui'
+        return video_title, video_duration
+    
+    def _lexicon_section(self, all_texts: list, hits: list, max_tokens: int) -> str:
+        """
+        Bagian prompt berisi hit detektor leksikon beserta segmen di sekitarnya, agar model
+        memeriksa bagian ini lebih dulu. Konteks yang melebihi max_tokens dilewati (teksnya tetap
+        ada di transkrip lengkap/bagian map)
+        """
+        if not hits:
+            return ""
         
-        if len(all_texts) > 50:
-            text_summary += f"\n... dan {len(all_texts) - 50} teks lainnya"
+        hit_terms = {}
+        for hit in hits:
+            hit_terms.setdefault(hit["index"], []).append(hit["term"])
+        counts = ", ".join(f"{category} {count}" for category, count in summarize_hits(hits).items())
+        section = (f"HASIL DETEKTOR KATA KASAR/VULGAR (periksa bagian ini lebih dulu):\n"
+                   f"Ditemukan {len(hits)} kata ({counts}). Baris bertanda >> mengandung kata "
+                   f"yang terdeteksi; nilai sendiri apakah konteksnya berbahaya.\n")
         
-        # Informasi video
-        video_title = video_info.get('title', 'Tidak diketahui') if video_info else 'Tidak diketahui'
-        video_duration = video_info.get('duration', 'Tidak diketahui') if video_info else 'Tidak diketahui'
+        windows = context_windows(hits, len(all_texts), radius=LEXICON_CONTEXT_ITEMS)
+        for shown, (start, end) in enumerate(windows):
+            block = "\n"
+            for index in range(start, end + 1):
+                marker = ">> " if index in hit_terms else "   "
+                block += marker + self._format_item(index + 1, all_texts[index])
+                if index in hit_terms:
+                    block = block.rstrip("\n") + f"  [kata: {', '.join(hit_terms[index])}]\n"
+            if estimate_tokens(section + block) > max_tokens:
+                section += f"\n... dan {len(windows) - shown} konteks lainnya (lihat transkrip)\n"
+                break
+            section += block
+        return section
+    
+    def _create_prompt(self, all_texts: list, video_info: dict = None, lexicon_section: str = "") -> str:
+        """Buat prompt untuk Groq berdasarkan data yang dikumpulkan (seluruh teks dalam satu request)"""
+        
+        # Format teks dengan lebih readable
+        text_summary = "".join(self._format_item(i, item) for i, item in enumerate(all_texts, 1))
+        video_title, video_duration = self._video_header(video_info)
         
         prompt = f"""Analisis video berikut untuk mendeteksi konten berbahaya seperti cyberbullying, ujaran kebencian, atau konten yang merugikan.
 
@@ -158,55 +818,106 @@ INFORMASI VIDEO:
 - Durasi: {video_duration}
 - Total teks ditemukan: {len(all_texts)} segmen
 
+{lexicon_section}
 TRANSKRIP DAN TEKS DARI VIDEO:
 {text_summary}
 
-INSTRUKSI:
-Buatlah laporan analisis dalam format berikut:
+{REPORT_FORMAT}"""
+        return prompt
+    
+    def _create_chunk_prompt(self, chunk: list, part: int, total_parts: int, video_info: dict = None,
+                             hit_terms: dict = None) -> str:
+        """Prompt map: temukan konten berbahaya dalam satu bagian transkrip"""
+        text_summary = "".join(self._format_item(item["index"], item) for item in chunk)
+        video_title, video_duration = self._video_header(video_info)
+        hit_lines = "".join(f"- Baris {item['index']} [{item['timestamp']}]: {', '.join(hit_terms[item['index']])}\n"
+                            for item in chunk if hit_terms and item["index"] in hit_terms)
+        if hit_lines:
+            hit_lines = f"\nDetektor kata kasar/vulgar menandai baris berikut, periksa lebih dulu:\n{hit_lines}"
+        
+        return f"""Berikut bagian {part} dari {total_parts} transkrip video "{video_title}" (durasi {video_duration}), rentang waktu {chunk[0]['timestamp']} - {chunk[-1]['timestamp']}.
 
-RINGKASAN EKSEKUTIF
-- Berikan overview singkat tentang isi video
-- Sebutkan apakah ada konten berbahaya atau tidak
-- Jika ada, sebutkan jenis dan tingkat keparahannya
+Analisis HANYA bagian ini untuk mendeteksi cyberbullying, ujaran kebencian, bahasa vulgar/seksual, ancaman, hinaan, gossip atau rumor yang merugikan, dan konten berbahaya lainnya.
+{hit_lines}
+TRANSKRIP DAN TEKS DARI VIDEO (BAGIAN {part}/{total_parts}):
+{text_summary}
+{FINDINGS_FORMAT}"""
+    
+    def _create_merge_prompt(self, findings: list) -> str:
+        """Prompt penggabungan bertahap: ringkas beberapa hasil bagian menjadi satu"""
+        joined = "\n\n".join(findings)
+        return f"""Berikut hasil analisis beberapa bagian berurutan dari satu video:
 
-ANALISIS KONTEN
-- Jelaskan tema utama video
-- Analisis tone dan konteks percakapan
-- Identifikasi jika ada bahasa yang:
-  * Vulgar atau seksual (contoh: kata-kata seperti "ngewe", "memek", "kontol", dll)
-  * Menghina atau merendahkan seseorang
-  * Mengancam atau mengintimidasi
-  * Mengandung kebencian terhadap kelompok tertentu
-  * Mempromosikan kekerasan atau perilaku berbahaya
-  * Gossip atau rumor yang merugikan reputasi orang lain
+{joined}
 
-TEMUAN DETAIL (jika ada konten berbahaya)
-Untuk setiap temuan, tuliskan:
-- Timestamp: [waktu]
-- Kutipan: "teks yang bermasalah"
-- Jenis: [cyberbullying/ujaran kebencian/ancaman/dll]
-- Tingkat bahaya: [rendah/sedang/tinggi/kritis]
-- Penjelasan: mengapa ini berbahaya
+Gabungkan menjadi satu hasil untuk seluruh rentang waktu di atas. Ringkasan digabung, semua
+temuan dipertahankan (temuan yang sama persis boleh digabung).
+
+{FINDINGS_FORMAT}"""
+    
+    def _create_reduce_prompt(self, findings: list, total_texts: int, video_info: dict = None,
+                              lexicon_section: str = "") -> str:
+        """Prompt reduce: laporan akhir dari temuan semua bagian"""
+        joined = "\n\n".join(findings)
+        video_title, video_duration = self._video_header(video_info)
+        
+        return f"""Analisis video berikut untuk mendeteksi konten berbahaya seperti cyberbullying, ujaran kebencian, atau konten yang merugikan.
+
+INFORMASI VIDEO:
+- Judul: {video_title}
+- Durasi: {video_duration}
+- Total teks ditemukan: {total_texts} segmen
+
+Transkrip video terlalu panjang untuk satu analisis, jadi sudah dianalisis per bagian waktu.
+Berikut ringkasan dan temuan setiap bagian, berurutan dari awal sampai akhir video:
+
+{joined}
+
+{lexicon_section}
+Susun laporan untuk SELURUH video dari hasil per bagian di atas. Masukkan semua temuan ke
+TEMUAN DETAIL dengan timestamp dan kutipan aslinya.
+
+{REPORT_FORMAT}"""
+    
+    def _create_summary_prompt(self, all_texts: list, video_info: dict = None) -> str:
+        """Prompt ringkas untuk video tanpa hit leksikon: sampel merata dari seluruh transkrip"""
+        budget = chunk_budget(self.model)
+        sample = all_texts
+        while len(sample) > 1 and estimate_tokens("".join(self._format_item(1, item) for item in sample)) > budget:
+            sample = sample[::2]
+        text_summary = "".join(self._format_item(i, item) for i, item in enumerate(sample, 1))
+        video_title, video_duration = self._video_header(video_info)
+        
+        return f"""Detektor kata kasar/vulgar tidak menemukan apa pun di video "{video_title}" (durasi {video_duration}, {len(all_texts)} segmen teks). Berikut {len(sample)} segmen contoh yang tersebar merata:
+
+{text_summary}
+Buat laporan singkat (maks 300 kata) dengan bagian RINGKASAN EKSEKUTIF, ANALISIS KONTEN,
+REKOMENDASI, dan KESIMPULAN. Tetap laporkan jika ada ancaman, hinaan halus, gossip, atau
+rumor yang merugikan walaupun tanpa kata kasar. Gunakan bahasa Indonesia yang profesional."""
+    
+    def _clean_report(self, all_texts: list, video_info: dict = None) -> str:
+        """Laporan lokal untuk video tanpa hit leksikon (LEXICON_CLEAN_MODE=skip)"""
+        video_title, video_duration = self._video_header(video_info)
+        speech_count = sum(1 for item in all_texts if item["source"] == "speech")
+        
+        return f"""RINGKASAN EKSEKUTIF
+Video "{video_title}" (durasi {video_duration}) tidak mengandung kata kasar, vulgar, hinaan, atau ancaman dari daftar leksikon. Laporan ini dibuat oleh detektor lokal tanpa analisis AI.
+
+ANALISIS KONTEN
+Sebanyak {len(all_texts)} segmen teks diperiksa ({speech_count} dari audio, {len(all_texts) - speech_count} dari teks di video). Tidak ada kata dari leksikon yang ditemukan, termasuk variasi leetspeak dan huruf berulang.
 
 REKOMENDASI
-- Jika ada konten berbahaya: berikan rekomendasi tindakan (review manual, warning, removal, dll)
-- Jika tidak ada: nyatakan bahwa video aman untuk ditayangkan
-- Saran umum untuk creator atau moderator
+Video dapat ditayangkan. Review manual tetap disarankan jika ada konteks yang tidak tertangkap daftar kata, seperti sindiran, gossip, atau rumor.
 
 KESIMPULAN
-- Ringkasan final dalam 2-3 kalimat
-
-PENTING:
-- Gunakan bahasa Indonesia yang jelas dan profesional
-- Jangan menulis dalam format template atau poin-poin kosong
-- Langsung berikan analisis substantif, bukan struktur kosong
-- JANGAN filter atau sensor kata-kata vulgar/kasar - tulis apa adanya untuk tujuan deteksi
-- HARUS mendeteksi dan melaporkan semua kata vulgar, seksual, atau kasar yang ditemukan
-- Berikan contoh konkret dari transkrip (termasuk kata vulgar) untuk mendukung analisis
-- Jika tidak ada konten berbahaya, katakan dengan jelas dan fokus pada konten positif video
-- Analisis konteks: apakah percakapan mengandung gossip, rumor, atau membahas privasi orang lain tanpa izin
-"""
-        return prompt
+Tidak ditemukan konten berbahaya oleh detektor leksikon."""
+    
+    def _format_duration(self, seconds: float) -> str:
+        """Format durasi detik menjadi HH:MM:SS"""
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        secs = int(seconds % 60)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
 
 if __name__ == "__main__":
@@ -222,9 +933,11 @@ if __name__ == "__main__":
         {"text": "HATE SPEECH", "timestamp": "00:02:00"}
     ]
     
-    report = generator.generate_report(fake_speech, fake_ocr)
+    # Laporan dicetak bertahap begitu teksnya diterima
     print("\n" + "="*50)
     print("LAPORAN:")
     print("="*50)
-    print(report)
+    for piece in generator.stream_report(fake_speech, fake_ocr):
+        print(piece, end="", flush=True)
+    print()
 
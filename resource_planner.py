@@ -0,0 +1,345 @@
+"""
+Modul perencana resource: memilih ukuran model Whisper, interval OCR, dan pembagian core antara
+Whisper dan Tesseract dari durasi video, core dan RAM yang tersedia, serta target waktu selesai.
+Model biaya dikalibrasi dari throughput terukur run sebelumnya
+"""
+import os
+import json
+import time
+import statistics
+import threading
+from pathlib import Path
+
+
+# Urutan model Whisper: dari yang paling akurat ke yang paling kecil
+WHISPER_MODELS = ["medium", "small", "base", "tiny"]
+
+# Biaya awal sebelum ada riwayat: detik-core per detik audio untuk tiap model Whisper di CPU
+WHISPER_COST = {"tiny": 0.3, "base": 0.6, "small": 2.0, "medium": 5.0}
+
+# RAM yang dibutuhkan tiap model Whisper (GB)
+WHISPER_RAM_GB = {"tiny": 1.0, "base": 1.0, "small": 2.0, "medium": 5.0}
+
+# Detik-core per frame OCR (Tesseract, frame 480p)
+OCR_FRAME_COST = 0.8
+
+# Interval OCR yang dipertimbangkan (detik), dari yang paling rapat. Interval di atas
+# OCR_DENSE_LIMIT baru dipakai jika model Whisper terkecil pun tidak cukup cepat
+OCR_INTERVALS = [5, 10, 15, 30]
+OCR_DENSE_LIMIT = 10
+
+# Download: detik tetap + detik per detik durasi video
+DOWNLOAD_OVERHEAD = 10.0
+DOWNLOAD_RATE = 0.02
+
+# Generate laporan dengan Groq (detik)
+REPORT_SECONDS = 30.0
+
+# Efisiensi paralel: waktu ~ biaya / core^PARALLEL_EXPONENT
+PARALLEL_EXPONENT = 0.8
+
+# RAM yang disisakan untuk sistem dan proses lain (GB)
+RAM_HEADROOM_GB = float(os.getenv("PLANNER_RAM_HEADROOM_GB", "1.0"))
+
+# Minimal jumlah run sebelum biaya hasil kalibrasi dipakai
+MIN_SAMPLES = 3
+
+# Jumlah run terakhir yang disimpan untuk kalibrasi
+HISTORY_LIMIT = 200
+
+# Lock bersama untuk semua instance dalam satu proses (read-modify-write file JSON)
+_STORE_LOCK = threading.Lock()
+
+
+def available_memory_gb() -> float:
+    """RAM yang masih tersedia (GB), None jika tidak bisa dicek"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 1024 ** 3
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024 ** 2
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024 ** 3
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class RunHistory:
+    def __init__(self, path: str = None):
+        """
+        Inisialisasi riwayat throughput run (file JSON kecil)
+
+        Args:
+            path: Path file JSON (default: PLANNER_HISTORY_FILE atau
+                  downloads/cache/planner_history.json)
+        """
+        if path is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            path = os.getenv("PLANNER_HISTORY_FILE",
+                             os.path.join(downloads_dir, "cache", "planner_history.json"))
+        self.path = path
+
+    def load(self) -> list:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return []
+
+    def record(self, run: dict):
+        """
+        Simpan hasil pengukuran satu run
+
+        Args:
+            run: Dict dengan key duration, whisper_model, stt_cpus, transcribe_seconds,
+                 ocr_interval, ocr_cpus, ocr_seconds, download_seconds, report_seconds
+                 (stage yang tidak dijalankan/diambil dari checkpoint diisi None)
+        """
+        with _STORE_LOCK:
+            runs = self.load()
+            runs.append({**run, "recorded_at": time.time()})
+            runs = runs[-HISTORY_LIMIT:]
+            Path(os.path.dirname(self.path) or ".").mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.path}.tmp{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(runs, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def calibrate(runs: list) -> dict:
+    """
+    Hitung koefisien model biaya dari riwayat run (median throughput terukur)
+
+    Model Whisper yang belum punya cukup sampel memakai biaya awal dikali rasio
+    terukur/awal model lain, sehingga kecepatan mesin tetap terbawa.
+
+    Returns:
+        Dict {"whisper": {model: biaya}, "ocr_frame", "download_rate", "report", "samples"}
+    """
+    whisper_samples = {}
+    ratios = []
+    ocr_samples, download_samples, report_samples = [], [], []
+    for run in runs:
+        duration = run.get("duration")
+        if not duration:
+            continue
+        model = run.get("whisper_model")
+        if run.get("transcribe_seconds") and run.get("stt_cpus") and model in WHISPER_COST:
+            cost = run["transcribe_seconds"] * run["stt_cpus"] ** PARALLEL_EXPONENT / duration
+            whisper_samples.setdefault(model, []).append(cost)
+            ratios.append(cost / WHISPER_COST[model])
+        if run.get("ocr_seconds") and run.get("ocr_cpus") and run.get("ocr_interval"):
+            frames = max(1.0, duration / run["ocr_interval"])
+            ocr_samples.append(run["ocr_seconds"] * run["ocr_cpus"] ** PARALLEL_EXPONENT / frames)
+        if run.get("download_seconds"):
+            download_samples.append(max(0.0, run["download_seconds"] - DOWNLOAD_OVERHEAD) / duration)
+        if run.get("report_seconds"):
+            report_samples.append(run["report_seconds"])
+
+    speed = statistics.median(ratios) if len(ratios) >= MIN_SAMPLES else 1.0
+    whisper = {}
+    for model, prior in WHISPER_COST.items():
+        samples = whisper_samples.get(model, [])
+        whisper[model] = statistics.median(samples) if len(samples) >= MIN_SAMPLES else prior * speed
+
+    median_or = lambda samples, default: statistics.median(samples) if len(samples) >= MIN_SAMPLES else default
+    return {
+        "whisper": whisper,
+        "ocr_frame": median_or(ocr_samples, OCR_FRAME_COST),
+        "download_rate": median_or(download_samples, DOWNLOAD_RATE),
+        "report": median_or(report_samples, REPORT_SECONDS),
+        "samples": len(runs),
+    }
+
+
+def _parallel(cost: float, cpus: int) -> float:
+    return cost / max(1, cpus) ** PARALLEL_EXPONENT
+
+
+def estimate(duration: float, model: str, interval: float, stt_cpus: int, ocr_cpus: int,
+             coefficients: dict) -> dict:
+    """
+    Perkiraan waktu per stage (detik). Whisper dan OCR berjalan paralel; jika OCR tidak
+    mendapat core sendiri (ocr_cpus 0 tapi interval diisi), keduanya berbagi core
+    """
+    transcribe = _parallel(duration * coefficients["whisper"][model], stt_cpus)
+    ocr = 0.0
+    if interval:
+        frames = duration / interval
+        ocr = _parallel(frames * coefficients["ocr_frame"], ocr_cpus or stt_cpus)
+    analysis = max(transcribe, ocr) if ocr_cpus else transcribe + ocr
+    download = DOWNLOAD_OVERHEAD + duration * coefficients["download_rate"]
+    return {
+        "download": round(download, 1),
+        "transcribe": round(transcribe, 1),
+        "ocr": round(ocr, 1),
+        "report": round(coefficients["report"], 1),
+        "total": round(download + analysis + coefficients["report"], 1),
+    }
+
+
+def plan_resources(duration: float, cpus: int, memory_gb: float = None, target_seconds: float = None,
+                   enable_ocr: bool = True, ocr_interval: int = None, loaded_models: list = None,
+                   history: RunHistory = None) -> dict:
+    """
+    Pilih ukuran model Whisper, interval OCR, dan pembagian core
+
+    Urutan preferensi: model paling akurat yang muat di RAM, lalu OCR paling rapat. Jika ada
+    target waktu, dipilih kombinasi terbaik yang perkiraan waktunya masih di bawah target;
+    jika tidak ada yang cukup cepat, kombinasi tercepat yang dipakai.
+
+    Args:
+        duration: Durasi video (detik), None jika tidak diketahui (dipakai default)
+        cpus: Core yang tersedia untuk video ini
+        memory_gb: RAM tersedia (GB, default: dicek dari sistem)
+        target_seconds: Target waktu selesai sejak sekarang (detik, None = tanpa target)
+        enable_ocr: Jika False, semua core untuk Whisper
+        ocr_interval: Interval OCR tetap dari pengguna (None = dipilih planner)
+        loaded_models: Model Whisper yang sudah di-load di proses ini (tidak butuh RAM tambahan)
+        history: RunHistory untuk kalibrasi (default: file riwayat default)
+
+    Returns:
+        Dict rencana yang juga disimpan di output JSON:
+        {"whisper_model", "whisper_models" (urutan fallback), "ocr_interval", "stt_cpus",
+         "ocr_cpus", "estimate" (detik per stage), "target_seconds", "meets_target",
+         "inputs", "calibration_samples"}
+    """
+    cpus = max(1, int(cpus))
+    if memory_gb is None:
+        memory_gb = available_memory_gb()
+    loaded_models = set(loaded_models or [])
+    coefficients = calibrate((history or RunHistory()).load())
+
+    # Model yang muat di RAM (model yang sudah di-load tidak butuh RAM tambahan)
+    models = [model for model in WHISPER_MODELS
+              if model in loaded_models or memory_gb is None
+              or WHISPER_RAM_GB[model] <= memory_gb - RAM_HEADROOM_GB]
+    models = models or [WHISPER_MODELS[-1]]
+
+    if not enable_ocr:
+        intervals = [None]
+    elif ocr_interval:
+        intervals = [ocr_interval]
+    else:
+        intervals = OCR_INTERVALS
+
+    # Kandidat dalam urutan kualitas: OCR rapat untuk semua model dulu, baru OCR jarang
+    dense = [interval for interval in intervals if interval is None or interval <= OCR_DENSE_LIMIT]
+    sparse = [interval for interval in intervals if interval not in dense]
+    candidates = [(model, interval) for group in (dense, sparse) for model in models for interval in group]
+
+    def best_split(model, interval):
+        # Pembagian core Whisper/OCR dengan perkiraan waktu total terkecil
+        if not interval or cpus == 1:
+            return cpus, 0, estimate(duration or 0, model, interval, cpus, 0, coefficients)
+        splits = [(cpus - ocr_cpus, ocr_cpus) for ocr_cpus in range(1, cpus)]
+        return min(
+            ((stt_cpus, ocr_cpus, estimate(duration or 0, model, interval, stt_cpus, ocr_cpus, coefficients))
+             for stt_cpus, ocr_cpus in splits),
+            key=lambda option: (option[2]["total"], -option[0])
+        )
+
+    chosen = None
+    if duration and target_seconds:
+        for model, interval in candidates:
+            stt_cpus, ocr_cpus, times = best_split(model, interval)
+            if times["total"] <= target_seconds:
+                chosen = (model, interval, stt_cpus, ocr_cpus, times)
+                break
+        if chosen is None:
+            # Tidak ada yang cukup cepat: pakai kombinasi tercepat
+            options = [(model, interval) + best_split(model, interval) for model, interval in candidates]
+            chosen = min(options, key=lambda option: option[4]["total"])
+    else:
+        # Tanpa target (atau durasi tidak diketahui): kualitas terbaik
+        model, interval = candidates[0]
+        chosen = (model, interval) + best_split(model, interval)
+
+    model, interval, stt_cpus, ocr_cpus, times = chosen
+    return {
+        "whisper_model": model,
+        "whisper_models": WHISPER_MODELS[WHISPER_MODELS.index(model):],
+        "ocr_interval": interval,
+        "stt_cpus": stt_cpus,
+        "ocr_cpus": ocr_cpus,
+        "estimate": times if duration else None,
+        "target_seconds": target_seconds,
+        "meets_target": None if not (duration and target_seconds) else times["total"] <= target_seconds,
+        "inputs": {
+            "duration": duration,
+            "cpus": cpus,
+            "memory_gb": round(memory_gb, 1) if memory_gb is not None else None,
+            "loaded_models": sorted(loaded_models),
+        },
+        "calibration_samples": coefficients["samples"],
+    }
+
+
+def record_run(plan: dict, stages: dict, duration: float, whisper_model: str, skip: list = (),
+               history: RunHistory = None):
+    """
+    Simpan throughput terukur satu analisis ke riwayat kalibrasi
+
+    Args:
+        plan: Rencana dari plan_resources()
+        stages: Waktu per stage dari PipelineDAG.report()["stages"]
+        duration: Durasi video (detik); tanpa durasi run tidak dicatat
+        whisper_model: Model Whisper yang benar-benar dipakai (bisa lebih kecil dari rencana)
+        skip: Stage yang waktunya tidak mewakili throughput (mis. menunggu download)
+    """
+    if not duration:
+        return
+
+    def wall(name):
+        timing = stages.get(name) or {}
+        if name in skip or timing.get("cached"):
+            return None
+        return timing.get("wall")
+
+    try:
+        (history or RunHistory()).record({
+            "duration": duration,
+            "whisper_model": whisper_model,
+            "stt_cpus": plan["stt_cpus"],
+            "transcribe_seconds": wall("transcribe") if whisper_model else None,
+            "ocr_interval": plan["ocr_interval"],
+            "ocr_cpus": plan["ocr_cpus"],
+            "ocr_seconds": wall("ocr"),
+            "download_seconds": wall("download_audio"),
+            "report_seconds": wall("report"),
+        })
+    except OSError as e:
+        print(f"   ⚠️  Gagal menyimpan riwayat planner: {str(e)[:100]}")
+
+
+def print_plan(plan: dict):
+    """Tampilkan rencana resource"""
+    ocr = f"OCR tiap {plan['ocr_interval']} detik" if plan["ocr_interval"] else "tanpa OCR"
+    print(f"🧮 Rencana resource: Whisper {plan['whisper_model']}, {ocr}, "
+          f"{plan['stt_cpus']} core Whisper + {plan['ocr_cpus']} core OCR")
+    if plan["estimate"]:
+        line = f"   Perkiraan selesai: {plan['estimate']['total']:.0f} detik"
+        if plan["target_seconds"]:
+            icon = "✅" if plan["meets_target"] else "⚠️ "
+            line += f" (target {plan['target_seconds']:.0f} detik {icon})"
+        print(line)
+
+
+if __name__ == "__main__":
+    # Usage: python resource_planner.py <durasi_detik> [target_detik] [cpus]
+    import sys
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 600
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    cpus = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    plan = plan_resources(duration, cpus, target_seconds=target)
+    print_plan(plan)
+    print(json.dumps(plan, indent=2))
@@ -4,10 +4,60 @@ Modul untuk konversi speech-to-text menggunakan Whisper
 import whisper
 import os
 import time
+import threading
+import numpy as np
+
+
+# Model yang sudah di-load, dipakai bersama oleh semua job dalam satu proses
+_MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Sample rate audio Whisper
+SAMPLE_RATE = 16000
+
+# Panjang window audio per panggilan Whisper saat transkripsi dipotong per window: token dicek
+# di antara window, jadi ini batas atas waktu tunggu pembatalan (~waktu decode satu window)
+WINDOW_SECONDS = float(os.getenv("WHISPER_WINDOW_SECONDS", "30"))
+
+# Transkripsi per window selalu dipakai (opt-in). Tanpa ini, window hanya dipakai jika sisa
+# deadline token lebih pendek dari durasi audio. Per window sedikit menurunkan akurasi:
+# Whisper tidak membawa konteks teks sebelumnya lintas window (hanya 3 segmen terakhir
+# sebagai initial_prompt) dan kalimat panjang bisa terpotong di batas window
+WHISPER_WINDOWED = os.getenv("WHISPER_WINDOWED", "0") == "1"
+
+INITIAL_PROMPT = (
+    "Transkripsi percakapan informal dalam bahasa Indonesia. "
+    "Tulis semua kata apa adanya tanpa filtering atau censoring."
+)
+
+
+def split_windows(audio: np.ndarray, window_seconds: float = WINDOW_SECONDS, search_seconds: float = 2.0):
+    """
+    Potong audio menjadi window sekitar window_seconds, dipotong di titik paling senyap
+    pada search_seconds terakhir tiap window agar kata tidak terpotong
+
+    Yields:
+        Tuple (offset_detik, potongan audio)
+    """
+    window = int(window_seconds * SAMPLE_RATE)
+    search = min(int(search_seconds * SAMPLE_RATE), window // 2)
+    frame = SAMPLE_RATE // 50  # 20 ms
+    start = 0
+    while start < len(audio):
+        end = start + window
+        if end >= len(audio) or search < frame:
+            end = min(end, len(audio))
+        else:
+            tail = audio[end - search:end]
+            count = len(tail) // frame
+            energy = np.square(tail[:count * frame].reshape(count, frame)).mean(axis=1)
+            end = end - search + int(energy.argmin()) * frame
+        yield start / SAMPLE_RATE, audio[start:end]
+        start = end
 
 
 class SpeechToText:
-    def __init__(self, model_size: str = "base", max_retries: int = 3):
+    def __init__(self, model_size: str = "base", max_retries: int = 3, num_threads: int = None):
         """
         Inisialisasi Whisper model
         
@@ -18,9 +68,19 @@ class SpeechToText:
                        - medium: Akurasi tinggi, direkomendasikan untuk deteksi kata sensitif
                        - large: Paling akurat tapi lambat
             max_retries: Jumlah maksimal retry saat download model
+            num_threads: Jumlah thread torch untuk inferensi (opsional), agar tidak
+                         berebut core dengan stage lain yang berjalan paralel
         """
         print(f"🤖 Loading Whisper model: {model_size}")
         
+        # Whisper memasang hook kv-cache di model selama decode, jadi satu model
+        # tidak boleh dipakai dua transkripsi bersamaan
+        self._lock = threading.Lock()
+        
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        
         # Hapus file corrupt jika ada
         cache_dir = os.path.expanduser("~/.cache/whisper")
         model_file = os.path.join(cache_dir, f"{model_size}.pt")
@@ -65,14 +125,46 @@ class SpeechToText:
                     print("   4. Atau gunakan model yang lebih kecil (tiny) untuk test")
                     raise
     
-    def transcribe(self, audio_path: str, language: str = "id", no_filter: bool = True) -> list:
+    @staticmethod
+    def loaded_models() -> list:
+        """Ukuran model yang sudah di-load di proses ini"""
+        with _MODEL_CACHE_LOCK:
+            return list(_MODEL_CACHE)
+    
+    @classmethod
+    def shared(cls, model_size: str = "base", num_threads: int = None) -> "SpeechToText":
+        """
+        Ambil instance bersama untuk ukuran model ini (di-load sekali per proses)
+        
+        Args:
+            model_size: Ukuran model Whisper
+            num_threads: Jumlah thread torch, hanya dipakai saat model pertama kali di-load
+        """
+        with _MODEL_CACHE_LOCK:
+            stt = _MODEL_CACHE.get(model_size)
+            if stt is None:
+                stt = cls(model_size=model_size, num_threads=num_threads)
+                _MODEL_CACHE[model_size] = stt
+            return stt
+    
+    def transcribe(self, audio_path, language: str = "id", no_filter: bool = True,
+                   offset: float = 0.0, token=None, windowed: bool = None) -> list:
         """
         Transcribe audio menjadi teks dengan timestamp
         
         Args:
-            audio_path: Path ke file audio
+            audio_path: Path ke file audio, atau array float32 mono 16kHz yang sudah
+                        didecode (mis. dari SharedMediaReader.audio())
             language: Bahasa audio (default: 'id' untuk Indonesia)
             no_filter: Jika True, disable filtering kata vulgar (default: True)
+            offset: Posisi awal audio di video (detik), ditambahkan ke semua timestamp.
+                    Dipakai saat audio ditranskripsi per potongan
+            token: CancellationToken (opsional), dicek sebelum dan sesudah transkripsi
+            windowed: Transkripsi per window (WHISPER_WINDOW_SECONDS) dengan token dicek di
+                      antara window. Default: WHISPER_WINDOWED, atau otomatis jika sisa
+                      deadline token lebih pendek dari durasi audio. Tanpa window, Whisper
+                      dipanggil sekali (akurasi terbaik) dan pembatalan di tengah decode
+                      mengandalkan worker keluar paksa (CANCEL_GRACE_SECONDS)
             
         Returns:
             List of dict dengan format:
@@ -87,44 +179,31 @@ class SpeechToText:
             ]
         """
         try:
-            print(f"🎤 Transcribing audio: {audio_path}")
-            
-            # Parameter untuk akurasi maksimal dan tanpa filtering
-            transcribe_options = {
-                "audio": audio_path,
-                "language": language,
-                "word_timestamps": True,
-                "verbose": False,
-            }
+            if isinstance(audio_path, str):
+                print(f"🎤 Transcribing audio: {audio_path}")
+            else:
+                print(f"🎤 Transcribing audio: {len(audio_path) / 16000:.1f} detik PCM")
+                if len(audio_path) == 0:
+                    print("✅ Transkripsi selesai. Ditemukan 0 segmen.")
+                    return []
             
-            # Disable suppression tokens (kata-kata yang biasa di-filter)
-            if no_filter:
-                # Set suppress_tokens ke empty list untuk disable filtering
-                transcribe_options["suppress_tokens"] = []
-                # Tambah initial_prompt untuk guide model agar tidak filter
-                transcribe_options["initial_prompt"] = (
-                    "Transkripsi percakapan informal dalam bahasa Indonesia. "
-                    "Tulis semua kata apa adanya tanpa filtering atau censoring."
-                )
+            audio = whisper.load_audio(audio_path) if isinstance(audio_path, str) else audio_path
+            if windowed is None:
+                remaining = token.remaining() if token is not None else None
+                windowed = WHISPER_WINDOWED or (remaining is not None and remaining < len(audio) / SAMPLE_RATE)
+            # Default satu panggilan Whisper untuk seluruh audio (konteks teks tidak terputus)
+            windows = split_windows(audio) if windowed else [(0.0, audio)]
             
-            # Transcribe dengan Whisper
-            result = self.model.transcribe(**transcribe_options)
-            
-            # Format hasil menjadi list dengan timestamp
             segments = []
-            for segment in result["segments"]:
-                start_time = segment["start"]
-                end_time = segment["end"]
-                
-                # Format timestamp menjadi HH:MM:SS
-                timestamp = self._format_timestamp(start_time)
-                
-                segments.append({
-                    "text": segment["text"].strip(),
-                    "start": start_time,
-                    "end": end_time,
-                    "timestamp": timestamp
-                })
+            for window_offset, window_audio in windows:
+                if token is not None:
+                    token.check()
+                # Teks terakhir dari window sebelumnya jadi konteks window berikutnya
+                previous_text = " ".join(seg["text"] for seg in segments[-3:])
+                segments.extend(self._transcribe_window(window_audio, language, no_filter,
+                                                        offset + window_offset, previous_text))
+            if token is not None:
+                token.check()
             
             print(f"✅ Transkripsi selesai. Ditemukan {len(segments)} segmen.")
             return segments
@@ -133,6 +212,47 @@ class SpeechToText:
             print(f"❌ Error saat transcribe: {str(e)}")
             raise
     
+    def _transcribe_window(self, audio, language: str, no_filter: bool, offset: float,
+                           previous_text: str = "") -> list:
+        """Satu panggilan Whisper, hasilnya diformat menjadi list segmen"""
+        # Parameter untuk akurasi maksimal dan tanpa filtering
+        transcribe_options = {
+            "audio": audio,
+            "language": language,
+            "word_timestamps": True,
+            "verbose": False,
+        }
+        
+        # Disable suppression tokens (kata-kata yang biasa di-filter)
+        if no_filter:
+            # Set suppress_tokens ke empty list untuk disable filtering
+            transcribe_options["suppress_tokens"] = []
+            # Tambah initial_prompt untuk guide model agar tidak filter
+            transcribe_options["initial_prompt"] = f"{INITIAL_PROMPT} {previous_text}".strip()
+        elif previous_text:
+            transcribe_options["initial_prompt"] = previous_text
+        
+        # Transcribe dengan Whisper
+        with self._lock:
+            result = self.model.transcribe(**transcribe_options)
+        
+        # Format hasil menjadi list dengan timestamp
+        segments = []
+        for segment in result["segments"]:
+            start_time = segment["start"] + offset
+            end_time = segment["end"] + offset
+            
+            # Format timestamp menjadi HH:MM:SS
+            timestamp = self._format_timestamp(start_time)
+            
+            segments.append({
+                "text": segment["text"].strip(),
+                "start": start_time,
+                "end": end_time,
+                "timestamp": timestamp
+            })
+        return segments
+    
     def _format_timestamp(self, seconds: float) -> str:
         """Format detik menjadi format HH:MM:SS"""
         hours = int(seconds // 3600)
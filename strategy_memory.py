@@ -0,0 +1,184 @@
+"""
+Modul untuk mengingat strategi download (player client + format) yang berhasil per extractor/host
+"""
+import os
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+from download_cache import resolve_video_key
+
+
+# Kata kunci error yang tidak akan berhasil walau di-retry (fail fast)
+PERMANENT_ERRORS = [
+    "private video",
+    "video unavailable",
+    "this video is unavailable",
+    "has been removed",
+    "removed by the uploader",
+    "account associated with this video has been terminated",
+    "copyright",
+    "unsupported url",
+    "http error 404",
+    "http error 410",
+    "not available in your country",
+    "members-only",
+    "join this channel",
+    "confirm your age",
+    "this live event will begin",
+    "premieres in",
+    "is not a valid url",
+]
+
+# Error karena format tidak tersedia: coba format lain, bukan retry
+FORMAT_ERRORS = ["requested format", "no video formats", "format is not available"]
+
+# Error bot detection: ganti player client
+BOT_ERRORS = ["not a bot", "sign in", "cookies", "http error 403"]
+
+
+def classify_error(error_msg: str) -> str:
+    """
+    Klasifikasi error download
+
+    Returns:
+        'permanent' (langsung gagal), 'format' (coba format lain),
+        'bot' (coba player client lain), atau 'transient' (backoff lalu retry)
+    """
+    msg = error_msg.lower()
+    if any(keyword in msg for keyword in PERMANENT_ERRORS):
+        return "permanent"
+    if any(keyword in msg for keyword in FORMAT_ERRORS):
+        return "format"
+    if any(keyword in msg for keyword in BOT_ERRORS):
+        return "bot"
+    return "transient"
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff dengan full jitter (attempt dimulai dari 1)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def host_key(video_url: str) -> str:
+    """Key memori strategi: extractor yt-dlp jika dikenali, jika tidak hostname"""
+    resolved = resolve_video_key(video_url)
+    if resolved:
+        return resolved[0].lower()
+    host = (urlparse(video_url).hostname or "unknown").lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+
+# Lock bersama untuk semua instance dalam satu proses (read-modify-write file JSON)
+_STORE_LOCK = threading.Lock()
+
+
+def _strategy_id(client_list: list, format_choice: str) -> str:
+    return f"{','.join(client_list or [])}|{format_choice}"
+
+
+class StrategyMemory:
+    def __init__(self, path: str = None):
+        """
+        Inisialisasi store strategi download (file JSON kecil)
+
+        Args:
+            path: Path file JSON (default: DOWNLOAD_STRATEGY_FILE atau
+                  downloads/cache/download_strategies.json)
+        """
+        if path is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            path = os.getenv("DOWNLOAD_STRATEGY_FILE",
+                             os.path.join(downloads_dir, "cache", "download_strategies.json"))
+        self.path = path
+
+    def _load(self) -> dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save(self, data: dict):
+        Path(os.path.dirname(self.path) or ".").mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _update(self, host: str, client_list: list, format_choice: str, func):
+        with _STORE_LOCK:
+            data = self._load()
+            stats = data.setdefault(host, {}).setdefault(_strategy_id(client_list, format_choice), {
+                "client": client_list,
+                "format": format_choice,
+                "successes": 0.0,
+                "failures": 0.0,
+                "latency": None,
+            })
+            func(stats)
+            self._save(data)
+
+    def record_success(self, host: str, client_list: list, format_choice: str, latency: float):
+        """Catat strategi yang berhasil beserta latency (EMA)"""
+        def apply(stats):
+            stats["successes"] += 1
+            stats["failures"] *= 0.5  # Kegagalan lama cepat dilupakan
+            if stats["latency"] is None:
+                stats["latency"] = latency
+            else:
+                stats["latency"] = 0.7 * stats["latency"] + 0.3 * latency
+            stats["last_success"] = time.time()
+        self._update(host, client_list, format_choice, apply)
+
+    def record_failure(self, host: str, client_list: list, format_choice: str, kind: str):
+        """Catat strategi yang gagal (kecuali error permanen yang bukan salah strategi)"""
+        if kind == "permanent":
+            return
+
+        def apply(stats):
+            stats["failures"] += 1
+            stats["successes"] *= 0.8
+            stats["last_failure"] = time.time()
+            stats["last_error"] = kind
+        self._update(host, client_list, format_choice, apply)
+
+    def rank(self, host: str, candidates: list) -> list:
+        """
+        Urutkan kandidat strategi berdasarkan riwayat: tingkat sukses tertinggi,
+        lalu latency terendah. Strategi tanpa riwayat tetap di urutan default.
+
+        Args:
+            host: Key dari host_key()
+            candidates: List of (client_list, format_choice) dalam urutan default
+
+        Returns:
+            List kandidat yang sudah diurutkan
+        """
+        history = self._load().get(host, {})
+
+        def score(indexed):
+            idx, (client_list, format_choice) = indexed
+            stats = history.get(_strategy_id(client_list, format_choice))
+            if not stats:
+                # Belum pernah dicoba: netral (0.5), urutan default dipertahankan
+                return (-0.5, float("inf"), idx)
+            success_rate = (stats["successes"] + 0.5) / (stats["successes"] + stats["failures"] + 1)
+            latency = stats["latency"] if stats["latency"] is not None else float("inf")
+            return (-success_rate, latency, idx)
+
+        return [candidate for _, candidate in sorted(enumerate(candidates), key=score)]
+
+
+if __name__ == "__main__":
+    # Test
+    memory = StrategyMemory()
+    print(json.dumps(memory._load(), indent=2))
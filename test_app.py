@@ -14,11 +14,36 @@ print()
 print("[1/6] Test Import Modul...")
 try:
     import video_downloader
+    import download_cache
+    import pipeline_plan
+    import strategy_memory
+    import download_scheduler
+    import progressive
+    import pipeline_dag
+    import checkpoint
+    import cancellation
+    import resource_planner
+    import batch_runner
+    import job_queue
+    import lease_queue
+    import job_scheduler
+    import media_reader
     import audio_extractor
     import speech_to_text
     import ocr_extractor
+    import metrics
+    import llm_cache
+    import token_usage
+    import rate_limiter
+    import model_health
+    import mock_groq_server
+    import load_test_groq
+    import benchmark_report
+    import lexicon_detector
+    import timeline
     import report_generator
     import pdf_generator
+    import benchmark_sanitize
     import main
     print("   ✅ Semua modul berhasil di-import")
 except Exception as e:
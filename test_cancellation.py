@@ -0,0 +1,68 @@
+"""
+Test untuk cancellation: deadline mematikan subprocess, pembatalan menghentikan DAG, dan
+pembatalan job lewat antrian SQLite
+"""
+import time
+import threading
+
+import pytest
+
+from cancellation import CancellationToken, JobCancelled, DeadlineExceeded, run_process
+from pipeline_dag import PipelineDAG
+from job_queue import JobQueue, CANCELLED, RUNNING
+
+
+def test_deadline_kills_subprocess():
+    token = CancellationToken(timeout=0.3)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        run_process(["sleep", "30"], token)
+    assert time.monotonic() - started < 5
+
+
+def test_stage_deadline_never_exceeds_job_deadline():
+    job = CancellationToken(timeout=0.2)
+    stage = job.child("transcribe", timeout=60)
+    assert stage.remaining() <= 0.2
+    time.sleep(0.3)
+    with pytest.raises(DeadlineExceeded):
+        stage.check()
+
+
+def test_cancelling_job_stops_running_and_pending_stages():
+    token = CancellationToken()
+    dag = PipelineDAG(cpu_budget=2, token=token)
+    started = []
+
+    def slow_stage(results, cpus, stage_token):
+        started.append("slow")
+        while True:
+            stage_token.sleep(0.05)
+
+    def next_stage(results, cpus, stage_token):
+        started.append("next")
+
+    dag.add("slow", slow_stage, cpus=1)
+    dag.add("next", next_stage, deps=["slow"], cpus=1)
+    threading.Timer(0.2, token.cancel, args=("Dibatalkan dari test",)).start()
+
+    began = time.monotonic()
+    with pytest.raises(JobCancelled):
+        dag.run()
+    assert time.monotonic() - began < 3
+    assert started == ["slow"]
+
+
+def test_queue_cancel_queued_and_running_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    running_id = queue.enqueue("https://example.com/a", probe=False)
+    queue.register_worker("w1")
+    assert queue.claim("w1")["id"] == running_id
+    queued_id = queue.enqueue("https://example.com/b", probe=False)
+
+    assert queue.cancel(queued_id) == CANCELLED
+    assert queue.cancel(running_id) == RUNNING
+    assert queue.cancel_requested(running_id)
+
+    queue.mark_cancelled(running_id, "Dibatalkan dari UI")
+    assert queue.get(running_id)["status"] == CANCELLED
@@ -0,0 +1,132 @@
+"""
+Test untuk download_scheduler menggunakan HTTP server lokal yang menyajikan file media fixture
+"""
+import os
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+from download_scheduler import DownloadScheduler, HostLimiter
+
+
+class _TrackingHandler(SimpleHTTPRequestHandler):
+    """Handler file statis yang mencatat jumlah request GET aktif secara bersamaan"""
+    stats = None
+
+    def do_GET(self):
+        with self.stats["lock"]:
+            self.stats["active"] += 1
+            self.stats["peak"] = max(self.stats["peak"], self.stats["active"])
+            self.stats["gets"].append(self.path)
+        try:
+            time.sleep(0.2)  # Simulasi server lambat agar overlap terlihat
+            super().do_GET()
+        finally:
+            with self.stats["lock"]:
+                self.stats["active"] -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def media_server(tmp_path):
+    """HTTP server lokal dengan beberapa file .mp4 fixture"""
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    for idx in range(4):
+        (media_dir / f"clip{idx}.mp4").write_bytes(os.urandom(64 * 1024))
+
+    stats = {"lock": threading.Lock(), "active": 0, "peak": 0, "gets": []}
+    handler = type("Handler", (_TrackingHandler,), {"stats": stats})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=str(media_dir)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield base_url, media_dir, stats
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    """Cache download dan memori strategi di direktori sementara"""
+    monkeypatch.setenv("DOWNLOAD_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("DOWNLOAD_STRATEGY_FILE", str(tmp_path / "strategies.json"))
+    return tmp_path / "downloads"
+
+
+def test_download_all_fetches_every_url(media_server, isolated_cache):
+    base_url, media_dir, _ = media_server
+    urls = [f"{base_url}/clip{idx}.mp4" for idx in range(4)]
+
+    with DownloadScheduler(str(isolated_cache), max_workers=4, per_host_concurrency=4,
+                           per_host_rate=100) as scheduler:
+        results = scheduler.download_all(urls)
+
+    assert [r["url"] for r in results] == urls
+    for idx, result in enumerate(results):
+        assert result["error"] is None
+        with open(result["path"], "rb") as f:
+            assert f.read() == (media_dir / f"clip{idx}.mp4").read_bytes()
+
+
+def test_per_host_concurrency_limit(media_server, isolated_cache):
+    base_url, _, stats = media_server
+    urls = [f"{base_url}/clip{idx}.mp4" for idx in range(4)]
+
+    with DownloadScheduler(str(isolated_cache), max_workers=4, per_host_concurrency=1,
+                           per_host_rate=100) as scheduler:
+        results = scheduler.download_all(urls)
+
+    assert all(r["error"] is None for r in results)
+    assert stats["peak"] == 1
+
+
+def test_repeat_urls_are_served_from_cache(media_server, isolated_cache):
+    base_url, _, stats = media_server
+    url = f"{base_url}/clip0.mp4"
+
+    with DownloadScheduler(str(isolated_cache), max_workers=1, per_host_rate=100) as scheduler:
+        first = scheduler.download_all([url])[0]
+        gets_after_first = len(stats["gets"])
+        second = scheduler.download_all([url])[0]
+
+    assert second["path"] == first["path"]
+    assert len(stats["gets"]) == gets_after_first
+
+
+def test_failed_url_does_not_stop_batch(media_server, isolated_cache):
+    base_url, _, _ = media_server
+    urls = [f"{base_url}/missing.mp4", f"{base_url}/clip1.mp4"]
+
+    with DownloadScheduler(str(isolated_cache), max_workers=2, per_host_rate=100,
+                           download_kwargs={"max_retries": 1}) as scheduler:
+        results = scheduler.download_all(urls)
+
+    assert results[0]["error"] is not None
+    assert results[1]["error"] is None
+
+
+def test_host_limiter_spaces_request_starts():
+    limiter = HostLimiter(max_concurrent=4, rate_per_sec=10)
+    starts = []
+
+    def worker():
+        with limiter:
+            starts.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    starts.sort()
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.08 for gap in gaps)
@@ -0,0 +1,40 @@
+"""
+Test untuk job_scheduler: replay trace sintetis dengan FIFO vs shortest-expected-job-first + aging
+"""
+from job_scheduler import simulate, turnaround_stats, order_jobs, PRIORITY_BATCH
+
+
+def _trace_long_job_first():
+    # Worker sibuk dengan satu klip, lalu stream 3 jam antri paling depan diikuti 30 klip 30 detik
+    trace = [{"arrival": 0, "duration": 30, "service": 45}]
+    trace += [{"arrival": 1, "duration": 3 * 3600, "service": 5400}]
+    trace += [{"arrival": 2 + idx, "duration": 30, "service": 45} for idx in range(30)]
+    return trace
+
+
+def test_sjf_reduces_mean_and_p95_turnaround():
+    fifo = turnaround_stats(simulate(_trace_long_job_first(), "fifo", workers=1))["all"]
+    sjf = turnaround_stats(simulate(_trace_long_job_first(), "sjf", workers=1))["all"]
+
+    assert sjf["mean"] < fifo["mean"] / 5
+    assert sjf["p95"] < fifo["p95"]
+
+
+def test_aging_prevents_starvation_of_long_job():
+    # Klip terus berdatangan; tanpa aging job panjang tidak pernah jalan sebelum klip habis
+    trace = [{"arrival": 0, "duration": 3600, "service": 1800}]
+    trace += [{"arrival": idx * 40, "duration": 30, "service": 40} for idx in range(500)]
+    finished = {id(job): job for job in simulate(trace, "sjf", workers=1)}
+    long_job = next(job for job in finished.values() if job["duration"] == 3600)
+    last_clip_start = max(job["start"] for job in finished.values() if job["duration"] == 30)
+
+    assert long_job["start"] < last_clip_start
+
+
+def test_batch_jobs_yield_to_interactive_jobs():
+    now = 1000.0
+    jobs = [
+        {"id": "batch", "created_at": now - 10, "expected_seconds": 60, "priority_class": PRIORITY_BATCH},
+        {"id": "interactive", "created_at": now, "expected_seconds": 120, "priority_class": "interactive"},
+    ]
+    assert [job["id"] for job in order_jobs(jobs, now)] == ["interactive", "batch"]
@@ -0,0 +1,146 @@
+"""
+Test untuk lease_queue: beberapa proses lokal berbagi satu direktori sementara sebagai "NFS"
+"""
+import os
+import json
+import time
+import multiprocessing
+
+import pytest
+
+from lease_queue import LeaseQueue, LeaseLost, lease_worker_loop, DONE, PENDING, CLAIMED
+
+
+def _record_handler(root: str, node: str):
+    """Handler palsu: catat job yang dikerjakan node ini ke file terpisah"""
+    def handler(job, token):
+        time.sleep(0.01)
+        with open(os.path.join(root, f"handled-{node}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"job": job["id"], "node": node}) + "\n")
+        return {"node": node}
+    return handler
+
+
+def _run_node(root: str, node: str):
+    queue = LeaseQueue(root, lease_seconds=5)
+    lease_worker_loop(queue, _record_handler(root, node), node_id=node, poll_interval=0.05,
+                      exit_when_idle=True)
+
+
+def _handled(root: str) -> list:
+    entries = []
+    for name in os.listdir(root):
+        if name.startswith("handled-"):
+            with open(os.path.join(root, name), encoding="utf-8") as f:
+                entries.extend(json.loads(line) for line in f)
+    return entries
+
+
+def test_each_job_is_processed_exactly_once_across_processes(tmp_path):
+    root = str(tmp_path)
+    queue = LeaseQueue(root)
+    job_ids = [queue.submit(f"https://example.com/video{idx}") for idx in range(30)]
+
+    nodes = [multiprocessing.Process(target=_run_node, args=(root, f"node{idx}")) for idx in range(4)]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join(timeout=60)
+        assert node.exitcode == 0
+
+    handled = [entry["job"] for entry in _handled(root)]
+    assert sorted(handled) == sorted(job_ids)
+    assert queue.counts()[DONE] == 30
+
+
+def test_expired_lease_is_reclaimed_by_another_node(tmp_path):
+    queue = LeaseQueue(str(tmp_path), lease_seconds=0.2)
+    job_id = queue.submit("https://example.com/video")
+
+    # Node pertama klaim lalu "mati" (tidak pernah heartbeat)
+    first = queue.claim("dead-node")
+    assert first["id"] == job_id
+    assert queue.claim("other-node") is None
+
+    time.sleep(0.3)
+    assert queue.reclaim_expired() == [job_id]
+    assert queue.get(job_id)["status"] == PENDING
+
+    second = queue.claim("other-node")
+    assert second["id"] == job_id
+    assert second["attempts"] == 2
+
+    # Pemilik lama tidak bisa lagi memperpanjang atau menyelesaikan job
+    assert queue.heartbeat(job_id, first["lease_token"]) is False
+    with pytest.raises(LeaseLost):
+        queue.complete(job_id, first["lease_token"], {})
+
+    queue.complete(job_id, second["lease_token"], {"ok": True})
+    assert queue.get(job_id)["status"] == DONE
+    assert queue.get(job_id)["result"] == {"ok": True}
+
+
+def test_heartbeat_keeps_lease_alive(tmp_path):
+    queue = LeaseQueue(str(tmp_path), lease_seconds=0.3)
+    queue.submit("https://example.com/video")
+    job = queue.claim("node")
+
+    for _ in range(4):
+        time.sleep(0.1)
+        assert queue.heartbeat(job["id"], job["lease_token"])
+        assert queue.reclaim_expired() == []
+
+
+def test_late_heartbeat_cannot_overwrite_new_owner(tmp_path):
+    root = str(tmp_path)
+    stalled = LeaseQueue(root, lease_seconds=0.2)
+    other = LeaseQueue(root, lease_seconds=5)
+    job_id = stalled.submit("https://example.com/video")
+    first = stalled.claim("stalled-node")
+    time.sleep(0.3)
+
+    second = {}
+    write_json = stalled._write_json
+
+    def late_write(path, data):
+        # Node lain me-reclaim dan mengklaim ulang tepat sebelum heartbeat lama menulis lease
+        if not second:
+            assert other.reclaim_expired() == [job_id]
+            second.update(other.claim("new-node"))
+        write_json(path, data)
+
+    stalled._write_json = late_write
+    assert stalled.heartbeat(job_id, first["lease_token"]) is False
+    stalled._write_json = write_json
+
+    assert other.heartbeat(job_id, second["lease_token"])
+    with pytest.raises(LeaseLost):
+        stalled.complete(job_id, first["lease_token"], {"node": "stalled"})
+    other.complete(job_id, second["lease_token"], {"node": "new"})
+
+    assert other.get(job_id)["result"] == {"node": "new"}
+    assert os.listdir(os.path.join(root, "leases")) == []
+
+
+def test_handler_is_cancelled_when_lease_is_lost(tmp_path):
+    root = str(tmp_path)
+    queue = LeaseQueue(root, lease_seconds=0.3)
+    other = LeaseQueue(root, lease_seconds=5)
+    job_id = queue.submit("https://example.com/video")
+    seen = {}
+
+    def handler(job, token):
+        # Node lain mengambil alih job (mis. setelah node ini tertahan lebih lama dari lease)
+        os.rename(queue._path(CLAIMED, job["id"], job["lease_token"]), queue._path(PENDING, job["id"]))
+        seen["new_owner"] = other.claim("new-node")
+        deadline = time.time() + 5
+        while not token.cancelled and time.time() < deadline:
+            time.sleep(0.01)
+        seen["cancelled"] = token.cancelled
+        token.check()
+        return {}
+
+    assert lease_worker_loop(queue, handler, node_id="old-node", max_jobs=1) == 1
+    assert seen["cancelled"]
+    assert queue.get(job_id)["status"] == CLAIMED
+    assert queue.get(job_id)["claimed_by"] == "new-node"
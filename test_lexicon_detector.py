@@ -0,0 +1,39 @@
+"""
+Test untuk lexicon_detector: normalisasi leetspeak/huruf berulang, batas kata, dan pemetaan hit
+ke segmen asal dari satu pass atas seluruh teks
+"""
+from lexicon_detector import normalize, scan, context_windows
+
+
+def _terms(text):
+    return [hit["term"] for hit in scan([{"text": text}])]
+
+
+def test_normalize_leetspeak_and_repeated_letters():
+    assert normalize("4nj1iiiNG!!") == "anjing "
+    assert _terms("dasar g0bl0kkk") == ["goblok"]
+    assert _terms("b4ngs4aat lo") == ["bangsat"]
+    assert _terms("killll") == ["kill"]
+
+
+def test_double_letters_are_kept():
+    assert normalize("cook") == "cook"
+    assert _terms("I like to cook dinner") == []
+    assert _terms("good") == []
+    assert _terms("book") == []
+
+
+def test_word_boundaries_and_affixes():
+    assert _terms("liburan di pantai") == []
+    assert _terms("perekonomian membaik") == []
+    assert _terms("dia membunuh") == ["bunuh"]
+    assert _terms("anjingnya galak") == ["anjing"]
+    assert _terms("ngentotin") == ["ngentot"]
+
+
+def test_hits_map_back_to_segments():
+    items = [{"text": "halo semua"}, {"text": "selamat pagi"}, {"text": "kamu tolol"},
+             {"text": "mati aja sana"}, {"text": "sampai jumpa"}]
+    hits = scan(items)
+    assert [(hit["index"], hit["category"]) for hit in hits] == [(2, "hinaan"), (3, "ancaman")]
+    assert context_windows(hits, len(items), radius=1) == [(1, 4)]
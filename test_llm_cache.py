@@ -0,0 +1,48 @@
+"""
+Test untuk llm_cache: hit/miss tercatat di metrics, entry kedaluwarsa sesuai TTL, dan entry
+paling lama tidak dipakai dihapus saat kuota disk terlampaui
+"""
+import os
+import time
+
+import metrics
+from llm_cache import LLMCache, make_key
+
+
+def _key(content, model="m", temperature=0.5):
+    return make_key(model, [{"role": "user", "content": content}], {"temperature": temperature})
+
+
+def test_key_depends_on_model_messages_and_params():
+    assert _key("a") == _key("a")
+    assert len({_key("a"), _key("b"), _key("a", model="n"), _key("a", temperature=0.2)}) == 4
+
+
+def test_hit_miss_and_ttl(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 6)
+    before = metrics.snapshot("llm_cache")
+    assert cache.get(_key("a")) is None
+    cache.put(_key("a"), "jawaban")
+    assert cache.get(_key("a")) == "jawaban"
+    after = metrics.snapshot("llm_cache")
+    assert after["llm_cache_hit"] - before.get("llm_cache_hit", 0) == 1
+    assert after["llm_cache_miss"] - before.get("llm_cache_miss", 0) == 1
+
+    cache.ttl_seconds = 0.01
+    time.sleep(0.05)
+    assert cache.get(_key("a")) is None
+    assert cache.entries() == []
+
+
+def test_size_eviction_removes_least_recently_used(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl_seconds=0, max_bytes=3500)
+    for idx, name in enumerate(["a", "b", "c"]):
+        cache.put(_key(name), "x" * 1000)
+        os.utime(cache._path(_key(name)), (idx, idx))
+    # "a" dipakai lagi, jadi "b" yang paling lama tidak dipakai
+    assert cache.get(_key("a")) is not None
+    cache.put(_key("d"), "x" * 1000)
+
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) is not None
+    assert cache.total_size() <= 3500
@@ -0,0 +1,46 @@
+"""
+Test untuk media_reader: antrian frame menahan paling banyak capacity frame di memori, sisanya
+di file sementara, dan urutan frame tetap sama
+"""
+import threading
+
+import numpy as np
+
+from media_reader import FrameBuffer
+
+
+def _frame(index):
+    return np.full((4, 6), index % 256, dtype=np.uint8)
+
+
+def test_frames_beyond_capacity_are_spilled_in_order():
+    buffer = FrameBuffer(capacity=3)
+    for index in range(10):
+        buffer.put(index * 5.0, _frame(index))
+    assert len(buffer._memory) == 3
+
+    first = [buffer.get() for _ in range(4)]
+    # Setelah file terbaca sebagian, frame baru tetap antri di belakang frame di file
+    buffer.put(50.0, _frame(10))
+    buffer.finish()
+    rest = []
+    while (item := buffer.get()) is not None:
+        rest.append(item)
+
+    items = first + rest
+    assert [timestamp for timestamp, _ in items] == [index * 5.0 for index in range(11)]
+    assert all((frame == index).all() and frame.shape == (4, 6) for index, (_, frame) in enumerate(items))
+    buffer.close()
+
+
+def test_consumer_waits_for_producer():
+    buffer = FrameBuffer(capacity=2)
+    received = []
+    consumer = threading.Thread(target=lambda: received.extend(iter(buffer.get, None)))
+    consumer.start()
+    for index in range(20):
+        buffer.put(float(index), _frame(index))
+    buffer.finish()
+    consumer.join(5)
+
+    assert [timestamp for timestamp, _ in received] == [float(index) for index in range(20)]
@@ -0,0 +1,71 @@
+"""
+Test untuk mock_groq_server: injeksi error (decommissioned, 500) memicu fallback model, dan
+respons yang tercatat di cache LLM diputar ulang untuk prompt yang sama
+"""
+import pytest
+
+from mock_groq_server import MockGroqServer, parse_errors
+from report_generator import ReportGenerator
+from rate_limiter import RateLimiter
+
+
+SPEECH = [{"text": f"kalimat {idx}", "timestamp": f"00:00:{idx:02d}"} for idx in range(5)]
+
+
+@pytest.fixture
+def env(groq_env):
+    groq_env.setenv("GROQ_MODEL", "llama-3.1-8b-instant")
+    return groq_env
+
+
+def test_injected_errors_fall_back_to_next_model(env):
+    mock = MockGroqServer(rpm=600, tpm=10 ** 6, latency=0.01, reply="LAPORAN",
+                          decommissioned=["llama-3.1-8b-instant"]).start()
+    try:
+        generator = ReportGenerator(use_cache=False, limiter=RateLimiter(rpm=600, tpm=10 ** 6), base_url=mock.url)
+        report = generator.generate_report(SPEECH, [])
+    finally:
+        mock.stop()
+
+    assert report == "LAPORAN"
+    assert mock.stats["decommissioned"] == 1
+    assert generator.health.skipped(["llama-3.1-8b-instant"]) == {"llama-3.1-8b-instant": "decommissioned"}
+    assert parse_errors("429=0.1,timeout=0.02") == {"429": 0.1, "timeout": 0.02}
+
+
+def test_recorded_responses_are_replayed(env, tmp_path):
+    recorder = MockGroqServer(rpm=600, tpm=10 ** 6, latency=0.01, reply="LAPORAN TERCATAT").start()
+    try:
+        # Jawaban "asli" tersimpan di cache LLM
+        ReportGenerator(limiter=RateLimiter(rpm=600, tpm=10 ** 6), base_url=recorder.url).generate_report(SPEECH, [])
+    finally:
+        recorder.stop()
+
+    mock = MockGroqServer(rpm=600, tpm=10 ** 6, latency=0.01, reply="LAPORAN MOCK",
+                          replay_dir=str(tmp_path / "llm")).start()
+    try:
+        generator = ReportGenerator(use_cache=False, limiter=RateLimiter(rpm=600, tpm=10 ** 6), base_url=mock.url)
+        replayed = generator.generate_report(SPEECH, [])
+        other = generator.generate_report(SPEECH[:2], [])
+    finally:
+        mock.stop()
+
+    assert replayed == "LAPORAN TERCATAT"
+    assert other == "LAPORAN MOCK"
+    assert mock.stats["replayed"] == 1 and mock.stats["replay_miss"] == 1
+
+
+def test_failed_requests_return_their_token_reservation(env):
+    mock = MockGroqServer(rpm=600, tpm=10 ** 6, latency=0.01, errors={"500": 1.0}).start()
+    # Jam limiter dibekukan: bucket hanya kembali penuh jika reservasi dikembalikan
+    limiter = RateLimiter(rpm=600, tpm=10 ** 6, clock=lambda: 0.0)
+    try:
+        generator = ReportGenerator(use_cache=False, limiter=limiter, base_url=mock.url)
+        for on_chunk in (None, lambda piece: None):
+            with pytest.raises(Exception, match="semua model"):
+                generator.generate_report(SPEECH, [], on_chunk=on_chunk)
+    finally:
+        mock.stop()
+
+    assert mock.stats["injected_500"] >= 2
+    assert limiter.tokens.level == limiter.tokens.capacity
@@ -0,0 +1,151 @@
+"""
+Test untuk model_health: model decommissioned langsung dilewati (tersimpan lintas instance),
+circuit breaker terbuka setelah kegagalan berulang, dan probe menutupnya lagi
+"""
+import time
+import threading
+from types import SimpleNamespace
+
+import httpx
+import groq
+
+from cancellation import JobCancelled
+from model_health import ModelHealth, OPEN, HEALTHY, DECOMMISSIONED, FAILURE_THRESHOLD, classify_error
+from rate_limiter import RateLimiter
+from report_generator import ReportGenerator
+
+
+def api_error(status: int, code: str = None, message: str = "error"):
+    """Exception API Groq seperti yang dibuat SDK dari respons error"""
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions"))
+    body = {"error": {"message": message, "type": "invalid_request_error", "code": code}}
+    return groq.AsyncGroq(api_key="test")._make_status_error(f"Error code: {status} - {body}", body=body,
+                                                             response=response)
+
+
+def test_decommissioned_model_is_skipped_across_instances(tmp_path):
+    path = str(tmp_path / "health.json")
+    ModelHealth(path).record_failure("old", api_error(400, "model_decommissioned"))
+
+    assert ModelHealth(path).order(["old", "new"]) == ["new"]
+
+
+def test_errors_are_classified_by_status_and_code():
+    assert classify_error(api_error(400, "model_decommissioned")) == "decommissioned"
+    assert classify_error(api_error(404, "model_not_found")) == "decommissioned"
+    assert classify_error(api_error(429, "rate_limit_exceeded")) == "neutral"
+    assert classify_error(api_error(401, "invalid_api_key")) == "neutral"
+    assert classify_error(JobCancelled()) == "neutral"
+    # Teks pesan tidak menentukan jenis error
+    assert classify_error(api_error(400, "invalid_request_error", "parameter `seed` is not supported")) == "failure"
+    assert classify_error(api_error(500, None, "request req_429401 failed")) == "failure"
+    assert classify_error(Exception("connection reset")) == "failure"
+
+
+def test_circuit_opens_after_repeated_failures_and_probe_closes_it(clock, tmp_path):
+    health = ModelHealth(str(tmp_path / "health.json"), clock=clock)
+    health.record_failure("m", api_error(429, "rate_limit_exceeded"))  # Bukan salah model
+    for _ in range(FAILURE_THRESHOLD):
+        assert health.order(["m", "backup"])[0] == "m"
+        health.record_failure("m", api_error(503))
+    assert health.order(["m", "backup"]) == ["backup"]
+    assert health.due_for_probe() == []
+
+    clock.now += 301
+    assert health.probe(lambda model: (_ for _ in ()).throw(Exception("500 error"))) == {"m": False}
+    assert health._load()["m"]["state"] == OPEN
+    assert health._load()["m"]["open_seconds"] == 600
+
+    clock.now += 601
+    assert health.probe(lambda model: None) == {"m": True}
+    assert health._load()["m"]["state"] == HEALTHY
+    assert health.order(["m", "backup"]) == ["m", "backup"]
+
+
+def test_due_circuit_is_half_open_for_one_request(clock, tmp_path):
+    path = str(tmp_path / "health.json")
+    health = ModelHealth(path, clock=clock)
+    for _ in range(FAILURE_THRESHOLD):
+        health.record_failure("m", api_error(503))
+    clock.now += 301
+
+    # Proses baru (tanpa thread probe) tetap mencoba model utama sekali setelah jatuh tempo
+    fresh = ModelHealth(path, clock=clock)
+    assert fresh.order(["m", "backup"]) == ["m", "backup"]
+    assert fresh.order(["m", "backup"]) == ["backup"]
+    fresh.record_success("m")
+    assert fresh.order(["m", "backup"]) == ["m", "backup"]
+
+
+def test_skipped_models_are_probed_from_startup(groq_env, tmp_path):
+    groq_env.setenv("GROQ_MODEL", "old-model")
+    health = ModelHealth(str(tmp_path / "health.json"))
+    health.record_failure("old-model", api_error(404, "model_not_found"))
+    started = []
+    groq_env.setattr(health, "ensure_probe", lambda probe_fn: started.append(probe_fn))
+
+    ReportGenerator(limiter=RateLimiter(rpm=10 ** 6, tpm=10 ** 9), health=health)
+    assert len(started) == 1
+
+
+def _wait_probe_stopped(health):
+    for _ in range(100):
+        if not health.probe_running():
+            return
+        time.sleep(0.02)
+
+
+def test_one_probe_thread_per_registry_and_it_stops_without_open_circuits(clock, tmp_path):
+    path = str(tmp_path / "health.json")
+    ModelHealth(path, clock=clock).record_failure("old", api_error(400, "model_decommissioned"))
+    for _ in range(FAILURE_THRESHOLD):
+        ModelHealth(path, clock=clock).record_failure("m", api_error(503))
+
+    instances = [ModelHealth(path, clock=clock) for _ in range(5)]
+    for health in instances:
+        health.ensure_probe(lambda model: None, interval=0.01)
+    assert sum(thread.name == "model-probe" and thread.is_alive() for thread in threading.enumerate()) == 1
+
+    # Circuit m tertutup lewat probe; model decommissioned (belum jatuh tempo) tidak menahan thread
+    clock.now += 301
+    _wait_probe_stopped(instances[0])
+    assert not instances[0].probe_running()
+    assert instances[0]._load()["m"]["state"] == HEALTHY
+    assert instances[0]._load()["old"]["state"] == DECOMMISSIONED
+
+    # Setelah jatuh tempo, probe berikutnya (mis. saat ReportGenerator dibuat) mengecek ulang
+    clock.now += 8 * 24 * 3600
+    instances[1].ensure_probe(lambda model: None, interval=0.01)
+    _wait_probe_stopped(instances[1])
+    assert instances[1]._load()["old"]["state"] == HEALTHY
+
+
+def test_report_goes_straight_to_known_good_model(groq_env, tmp_path):
+    groq_env.setenv("LLM_CACHE", "0")
+    groq_env.setenv("GROQ_MODEL", "old-model")
+    health = ModelHealth(str(tmp_path / "health.json"))
+    generator = ReportGenerator(limiter=RateLimiter(rpm=10 ** 6, tpm=10 ** 9), health=health)
+    groq_env.setattr(health, "ensure_probe", lambda probe_fn: None)
+    calls = []
+
+    class Raw:
+        headers = {}
+
+        async def parse(self):
+            message = SimpleNamespace(content="ok")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    async def create(model, **kwargs):
+        calls.append(model)
+        if model == "old-model":
+            raise api_error(400, "model_decommissioned", "old-model has been decommissioned")
+        return Raw()
+
+    completions = SimpleNamespace(with_raw_response=SimpleNamespace(create=create))
+    generator.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    speech = [{"text": "halo", "timestamp": "00:00:01"}]
+
+    generator.generate_report(speech, [])
+    assert calls == ["old-model", "llama-3.1-8b-instant"]
+    generator.generate_report(speech, [])
+    assert calls[2:] == ["llama-3.1-8b-instant"]
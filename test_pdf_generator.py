@@ -0,0 +1,21 @@
+"""
+Test untuk sanitize_text di pdf_generator: versi tabel translate harus menghasilkan teks yang
+sama persis dengan implementasi per karakter sebelumnya
+"""
+from pdf_generator import PDFGenerator
+from benchmark_sanitize import SAMPLES, legacy_sanitize_text, make_transcript
+
+
+def test_sanitize_matches_legacy_output():
+    generator = PDFGenerator()
+    texts = SAMPLES + make_transcript(200) + ["", "｡ｱｲ", "é́", "ctrl\x07‎﻿", "Ω≈ç√∫", "ÿĀ"]
+    for text in texts:
+        assert generator.sanitize_text(text) == legacy_sanitize_text(text)
+
+
+def test_sanitize_ascii_and_fullwidth():
+    generator = PDFGenerator()
+    assert generator.sanitize_text(None) == ""
+    assert generator.sanitize_text("dasar goblok lo") == "dasar goblok lo"
+    assert generator.sanitize_text("【LIVE】：berita （terkini）") == "[LIVE]:berita (terkini)"
+    assert generator.sanitize_text("wkwk 😂") == "wkwk  "
@@ -0,0 +1,90 @@
+"""
+Test untuk rate_limiter: token bucket request + token, retry 429 dengan retry-after, dan banyak
+laporan bersamaan terhadap server mock tanpa melewati kuota
+"""
+import asyncio
+
+import httpx
+from groq import RateLimitError
+
+from rate_limiter import RateLimiter, TokenBucket, parse_reset
+from mock_groq_server import MockGroqServer
+from report_generator import ReportGenerator
+
+
+def test_parse_reset_formats():
+    assert parse_reset("7.66s") == 7.66
+    assert abs(parse_reset("2m59.56s") - 179.56) < 1e-6
+    assert parse_reset("120ms") == 0.12
+    assert parse_reset("3") == 3.0
+
+
+def test_bucket_waits_for_deficit_and_refunds(clock):
+    limiter = RateLimiter(rpm=60, tpm=600, clock=clock)
+    assert limiter.reserve(600) == 0
+    # Bucket token kosong: 300 token butuh 30 detik pada 10 token/detik
+    assert abs(limiter.reserve(300) - 30) < 1e-6
+    limiter.settle(300, 0)
+    clock.now = 10
+    assert limiter.reserve(100) == 0
+
+    bucket = TokenBucket(capacity=10, per_second=1, clock=clock)
+    assert bucket.reserve(50) == 0  # Satu request lebih besar dari kapasitas tetap bisa jalan
+
+
+def test_headers_pause_until_request_quota_resets(clock):
+    limiter = RateLimiter(rpm=60, tpm=6000, clock=clock)
+    limiter.update_from_headers({
+        "x-ratelimit-limit-tokens": "12000", "x-ratelimit-remaining-tokens": "100",
+        "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "5s",
+    })
+    assert limiter.tokens.capacity == 12000
+    assert limiter.reserve(100) >= 5
+
+
+def test_rate_limited_request_is_retried(groq_env):
+    groq_env.setenv("LLM_CACHE", "0")
+    generator = ReportGenerator(limiter=RateLimiter(rpm=10 ** 6, tpm=10 ** 9))
+    calls = []
+
+    class Raw:
+        headers = {}
+
+        async def parse(self):
+            message = type("M", (), {"content": "ok"})
+            return type("R", (), {"choices": [type("C", (), {"message": message})], "usage": None})
+
+    async def create(**kwargs):
+        calls.append(kwargs["model"])
+        if len(calls) == 1:
+            response = httpx.Response(429, headers={"retry-after": "0.1"},
+                                      request=httpx.Request("POST", "http://mock"))
+            raise RateLimitError("rate limited", response=response, body=None)
+        return Raw()
+
+    completions = type("Completions", (), {})()
+    completions.with_raw_response = type("Raw", (), {"create": staticmethod(create)})()
+    generator.client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+    assert generator.generate_report([{"text": "halo", "timestamp": "00:00:01"}], []) == "ok"
+    assert calls == [generator.model, generator.model]
+
+
+def test_concurrent_reports_against_mock_server_stay_within_quota(groq_env):
+    mock = MockGroqServer(rpm=600, tpm=10 ** 6, latency=0.05).start()
+    groq_env.setenv("GROQ_BASE_URL", mock.url)
+    groq_env.setenv("LLM_CACHE", "0")
+    try:
+        generator = ReportGenerator(limiter=RateLimiter(rpm=600, tpm=10 ** 6))
+        speech = [{"text": f"kalimat {idx}", "timestamp": f"00:00:{idx:02d}"} for idx in range(10)]
+
+        async def run_all():
+            return await asyncio.gather(*(generator.agenerate_report(speech, [], {"title": str(idx)})
+                                          for idx in range(8)))
+
+        reports = asyncio.run(run_all())
+    finally:
+        mock.stop()
+
+    assert len(reports) == 8 and all(reports)
+    assert mock.stats["accepted"] == 8
+    assert mock.stats["rate_limited"] == 0
@@ -0,0 +1,209 @@
+"""
+Test untuk report_generator: transkrip panjang dianalisis per bagian (map) tanpa ada teks yang
+terbuang, lalu temuan semua bagian digabung menjadi laporan akhir (reduce)
+"""
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import report_generator
+from report_generator import ReportGenerator, estimate_tokens, compact_prompt
+from rate_limiter import RateLimiter
+from mock_groq_server import MockGroqServer
+
+
+class FakeRawResponse:
+    def __init__(self, content):
+        self.headers = {}
+        self._content = content
+
+    async def parse(self):
+        message = SimpleNamespace(content=self._content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.prompts = []
+        self.max_tokens = []
+        self.with_raw_response = self
+        self._lock = threading.Lock()
+
+    async def create(self, model, messages, temperature, max_tokens, **kwargs):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+            self.max_tokens.append(max_tokens)
+        return FakeRawResponse("LAPORAN AKHIR" if "SELURUH video" in prompt else "TEMUAN: tidak ada")
+
+
+def _generator():
+    generator = ReportGenerator(limiter=RateLimiter(rpm=10 ** 6, tpm=10 ** 9))
+    generator.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    return generator
+
+
+def _speech(count):
+    return [{"text": f"kalimat nomor {idx} " + "bla " * 20,
+             "timestamp": f"{idx // 3600:02d}:{idx // 60 % 60:02d}:{idx % 60:02d}"}
+            for idx in range(count)]
+
+
+def test_short_transcript_uses_single_request(groq_env):
+    generator = _generator()
+    report = generator.generate_report(_speech(60), [])
+    prompts = generator.client.chat.completions.prompts
+
+    assert len(prompts) == 1
+    assert "kalimat nomor 59 " in prompts[0]
+    assert report == "TEMUAN: tidak ada"
+
+
+def test_long_transcript_covers_every_segment_within_budget(monkeypatch, groq_env):
+    monkeypatch.setattr(report_generator, "REPORT_CHUNK_TOKENS", 2500)
+    generator = _generator()
+    report = generator.generate_report(_speech(600), [{"text": "TEKS LAYAR", "timestamp": "00:05:00"}])
+    completions = generator.client.chat.completions
+    map_prompts = [p for p, n in zip(completions.prompts, completions.max_tokens)
+                   if n == report_generator.REPORT_MAP_MAX_TOKENS and "BAGIAN" in p and "HANYA" in p]
+
+    assert report == "LAPORAN AKHIR"
+    assert len(map_prompts) > 1
+    assert all(estimate_tokens(p) <= 2500 for p in map_prompts)
+    for idx in range(600):
+        assert any(f"kalimat nomor {idx} " in p for p in map_prompts)
+    assert any("TEKS LAYAR" in p for p in map_prompts)
+
+
+def test_repeated_report_is_served_from_cache(groq_env):
+    generator = _generator()
+    completions = generator.client.chat.completions
+    first = generator.generate_report(_speech(10), [])
+    second = generator.generate_report(_speech(10), [])
+
+    assert first == second
+    assert len(completions.prompts) == 1
+
+    generator.use_cache = False
+    generator.generate_report(_speech(10), [])
+    assert len(completions.prompts) == 2
+
+
+def test_lexicon_hits_are_prioritized_and_clean_videos_can_skip_llm(monkeypatch, groq_env):
+    generator = _generator()
+    completions = generator.client.chat.completions
+    speech = _speech(30)
+    speech[20]["text"] = "dasar g0bl0k lo"
+    generator.generate_report(speech, [])
+    prompt = completions.prompts[-1]
+    assert prompt.index("HASIL DETEKTOR") < prompt.index("TRANSKRIP DAN TEKS")
+    assert ">> 21. [00:00:20]" in prompt
+
+    monkeypatch.setattr(report_generator, "LEXICON_CLEAN_MODE", "skip")
+    report = generator.generate_report(_speech(30), [])
+    assert len(completions.prompts) == 1
+    assert "RINGKASAN EKSEKUTIF" in report
+
+
+def test_report_streams_chunks_that_add_up_to_the_report(groq_env):
+    mock = MockGroqServer(rpm=600, tpm=10 ** 6, latency=0.01, reply="LAPORAN satu dua tiga").start()
+    groq_env.setenv("GROQ_BASE_URL", mock.url)
+    try:
+        generator = ReportGenerator(limiter=RateLimiter(rpm=600, tpm=10 ** 6))
+        pieces = list(generator.stream_report(_speech(5), []))
+
+        async def collect():
+            return [piece async for piece in generator.astream_report(_speech(5), [])]
+
+        cached_pieces = asyncio.run(collect())
+    finally:
+        mock.stop()
+
+    assert pieces == ["LAPORAN", " satu", " dua", " tiga"]
+    assert generator.last_usage["cached"] == 1 and generator.last_usage["requests"] == 0
+    # Request kedua dijawab cache: laporan utuh dikirim sebagai satu potongan
+    assert cached_pieces == ["LAPORAN satu dua tiga"]
+    assert mock.stats["accepted"] == 1
+
+
+def test_oversized_prompt_is_compacted_for_small_context_fallback(monkeypatch, groq_env, tmp_path):
+    # Budget bagian mengikuti model utama (context besar); fallback dengan context kecil harus
+    # tetap menerima prompt yang muat
+    monkeypatch.setattr(report_generator, "REPORT_CHUNK_TOKENS", 10 ** 6)
+    monkeypatch.setattr(report_generator, "MODEL_CONTEXT", dict(report_generator.MODEL_CONTEXT,
+                                                                 **{"llama-3.3-70b-versatile": 4000}))
+    generator = _generator()
+    monkeypatch.setattr(generator.health, "ensure_probe", lambda probe_fn: None)
+    completions = generator.client.chat.completions
+    original_create = completions.create
+
+    async def create(model, messages, temperature, max_tokens, **kwargs):
+        if model == "llama-3.1-8b-instant":
+            raise Exception("internal server error")
+        return await original_create(model, messages, temperature, max_tokens, **kwargs)
+
+    completions.create = create
+    speech = _speech(400)
+    speech[200]["text"] = "dasar g0bl0k lo"
+    generator.generate_report(speech, [])
+
+    assert len(completions.prompts) == 1
+    prompt = completions.prompts[0]
+    assert estimate_tokens(report_generator.SYSTEM_PROMPT + prompt) + completions.max_tokens[0] <= 4000
+    assert ">> 201. [00:03:20]" in prompt
+    assert "baris transkrip dilewati" in prompt
+    assert generator.last_usage["compacted"] == 1
+    history = json.loads((tmp_path / "usage.json").read_text())
+    assert history[-1]["requests"] == 1 and history[-1]["compacted"] == 1
+
+
+def test_compact_prompt_drops_repeats_before_content():
+    prompt = "HEADER\n" + "1. [00:00:01] (Audio):   halo    semua\n" * 3 + "2. [00:00:02] (Audio): lanjut"
+    assert compact_prompt(prompt, 1000) == "HEADER\n1. [00:00:01] (Audio): halo semua\n2. [00:00:02] (Audio): lanjut"
+
+
+def test_broken_stream_keeps_only_tokens_received(monkeypatch, groq_env):
+    generator = _generator()
+    monkeypatch.setattr(generator.health, "ensure_probe", lambda probe_fn: None)
+    generator.limiter = RateLimiter(rpm=600, tpm=10 ** 6, clock=lambda: 0.0)
+
+    class BrokenStream:
+        def __init__(self):
+            self.closed = False
+
+        async def __aiter__(self):
+            delta = SimpleNamespace(content="LAPORAN sebagian")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            raise ConnectionError("stream terputus")
+
+        async def close(self):
+            self.closed = True
+
+    stream = BrokenStream()
+
+    class Raw:
+        headers = {}
+
+        async def parse(self):
+            return stream
+
+    async def create(model, **kwargs):
+        return Raw()
+
+    generator.client.chat.completions.create = create
+    pieces = []
+    try:
+        generator.generate_report(_speech(5), [], on_chunk=pieces.append)
+    except ConnectionError:
+        pass
+
+    assert pieces == ["LAPORAN sebagian"] and stream.closed
+    used = generator.limiter.tokens.capacity - generator.limiter.tokens.level
+    assert 0 < used < report_generator.REPORT_MAX_TOKENS
+
+
+def test_prompt_version_invalidates_report_checkpoint(monkeypatch):
+    before = report_generator.report_config()
+    monkeypatch.setattr(report_generator, "PROMPT_VERSION", report_generator.PROMPT_VERSION + 1)
+    assert report_generator.report_config() != before
@@ -0,0 +1,43 @@
+"""
+Test untuk resource_planner: pilihan model/interval OCR terhadap target waktu dan kalibrasi riwayat
+"""
+from resource_planner import RunHistory, plan_resources, record_run
+
+
+def test_without_target_uses_most_accurate_model_that_fits_memory(tmp_path):
+    history = RunHistory(str(tmp_path / "history.json"))
+    plan = plan_resources(600, cpus=8, memory_gb=16, history=history)
+    assert plan["whisper_model"] == "medium"
+    assert plan["ocr_interval"] == 5
+    assert plan["stt_cpus"] + plan["ocr_cpus"] == 8
+
+    small_ram = plan_resources(600, cpus=8, memory_gb=3.5, history=history)
+    assert small_ram["whisper_model"] == "small"
+    assert plan_resources(600, cpus=8, memory_gb=3.5, loaded_models=["medium"],
+                          history=history)["whisper_model"] == "medium"
+
+
+def test_tight_target_trades_accuracy_for_speed(tmp_path):
+    history = RunHistory(str(tmp_path / "history.json"))
+    relaxed = plan_resources(3 * 3600, cpus=8, memory_gb=16, target_seconds=24 * 3600, history=history)
+    tight = plan_resources(3 * 3600, cpus=8, memory_gb=16, target_seconds=1800, history=history)
+
+    assert relaxed["whisper_model"] == "medium" and relaxed["meets_target"]
+    assert ["medium", "small", "base", "tiny"].index(tight["whisper_model"]) > 0
+    assert tight["estimate"]["total"] <= 1800
+
+
+def test_calibration_from_measured_runs(tmp_path):
+    history = RunHistory(str(tmp_path / "history.json"))
+    before = plan_resources(3600, cpus=4, memory_gb=16, target_seconds=3000, history=history)
+
+    # Mesin ini ternyata 10x lebih cepat dari perkiraan awal untuk semua model
+    plan = {"stt_cpus": 4, "ocr_cpus": 0, "ocr_interval": None}
+    for _ in range(3):
+        stages = {"transcribe": {"wall": 3600 * 0.2 / 4 ** 0.8}}
+        record_run(plan, stages, 3600, "small", history=history)
+    after = plan_resources(3600, cpus=4, memory_gb=16, target_seconds=3000, history=history)
+
+    order = ["medium", "small", "base", "tiny"]
+    assert order.index(after["whisper_model"]) < order.index(before["whisper_model"])
+    assert after["calibration_samples"] == 3
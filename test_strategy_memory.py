@@ -0,0 +1,16 @@
+"""
+Test untuk strategy_memory: klasifikasi error download
+"""
+from strategy_memory import classify_error
+
+
+def test_classify_error():
+    assert classify_error("ERROR: Sign in to confirm you're not a bot") == "bot"
+    assert classify_error("HTTP Error 403: Forbidden") == "bot"
+    assert classify_error("ERROR: Private video") == "permanent"
+    assert classify_error("Requested format is not available") == "format"
+
+
+def test_bot_only_matches_specific_phrases():
+    assert classify_error("Unable to download https://example.com/robots.txt") == "transient"
+    assert classify_error("Read timed out fetching 'Bottom Text' (bot_clip.mp4)") == "transient"
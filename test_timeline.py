@@ -0,0 +1,48 @@
+"""
+Test untuk timeline: speech dan OCR digabung menurut waktu, frame OCR berulang digabung, teks
+OCR yang sama dengan ucapan dilewati, dan query rentang waktu
+"""
+from timeline import Timeline, parse_timestamp
+
+
+SPEECH = [
+    {"text": "halo semua selamat datang", "start": 0.0, "end": 4.0, "timestamp": "00:00:00"},
+    {"text": "hari ini kita bahas berita", "start": 30.0, "end": 36.0, "timestamp": "00:00:30"},
+]
+
+
+def _frame(text, seconds):
+    return {"text": text, "timestamp": f"00:00:{seconds:02d}", "timestamp_seconds": seconds}
+
+
+def test_sources_are_merged_by_time():
+    timeline = Timeline.from_sources(SPEECH, [_frame("BREAKING NEWS", 15)])
+    assert [(item["source"], item["timestamp"]) for item in timeline] == [
+        ("speech", "00:00:00"), ("ocr", "00:00:15"), ("speech", "00:00:30")]
+
+
+def test_repeated_frames_and_spoken_text_are_deduplicated():
+    ocr = [_frame("Halo semua, selamat datang!", 0)]
+    ocr += [_frame("LIVE STREAMING", seconds) for seconds in (10, 15, 20)]
+    ocr += [_frame("LIVE STREAMlNG", 25), _frame("LIVE STREAMING", 45)]
+    timeline = Timeline.from_sources(SPEECH, ocr)
+    spans = timeline.items("ocr")
+
+    assert [(span["start"], span["end"], span["frames"]) for span in spans] == [(10, 30, 4), (45, 50, 1)]
+    assert timeline.stats == {"ocr_repeated": 3, "ocr_spoken": 1}
+    assert len(Timeline.from_sources(SPEECH, ocr, dedup=False).items("ocr")) == 3
+
+
+def test_range_query_includes_entries_still_running():
+    timeline = Timeline.from_sources(SPEECH, [_frame("JUDUL", 33)])
+    assert [item["text"] for item in timeline.between(34, 40)] == ["hari ini kita bahas berita", "JUDUL"]
+    assert timeline.between(5, 20) == []
+    assert [item["text"] for item in timeline.between(0, 60, source="speech")] == [
+        "halo semua selamat datang", "hari ini kita bahas berita"]
+
+
+def test_timestamp_only_segments():
+    assert parse_timestamp("01:02:03") == 3723
+    timeline = Timeline.from_sources([{"text": "a", "timestamp": "00:01:00"}],
+                                     [{"text": "b", "timestamp": "00:00:30"}])
+    assert [item["text"] for item in timeline] == ["b", "a"]
@@ -0,0 +1,185 @@
+"""
+Modul timeline gabungan speech dan OCR: semua teks diurutkan menurut waktu dalam satu indeks
+interval (query rentang waktu dengan bisect), teks OCR yang sama di frame berurutan digabung
+menjadi satu rentang, dan teks OCR yang hanya mengulang ucapan di sekitarnya (subtitle)
+dilewati. Dipakai bersama oleh prompt laporan dan PDF
+"""
+import os
+from difflib import SequenceMatcher
+from bisect import bisect_left, bisect_right
+
+from lexicon_detector import normalize
+
+
+# Minimal kemiripan teks OCR agar dianggap duplikat: kemiripan karakter dengan frame
+# sebelumnya, atau proporsi kata yang juga diucapkan di sekitarnya
+OCR_DEDUP_THRESHOLD = float(os.getenv("OCR_DEDUP_THRESHOLD", "0.8"))
+
+# Toleransi waktu (detik) saat mencocokkan teks OCR dengan ucapan di sekitarnya
+SPEECH_MATCH_TOLERANCE = 3.0
+
+
+def parse_timestamp(value) -> float:
+    """Detik dari "HH:MM:SS" (atau angka detik)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    seconds = 0.0
+    for part in str(value or "0").split(":"):
+        seconds = seconds * 60 + float(part or 0)
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format detik menjadi HH:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _words(text: str) -> set:
+    return set(normalize(text).split())
+
+
+def _overlap(words: set, other: set) -> float:
+    """Proporsi kata di words yang juga ada di other"""
+    return len(words & other) / len(words) if words else 0.0
+
+
+def _infer_interval(starts: list) -> float:
+    """Interval sampling OCR: selisih positif terkecil antar frame berurutan"""
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:]) if later > earlier]
+    return min(gaps) if gaps else 1.0
+
+
+class Timeline:
+    def __init__(self, entries: list):
+        """
+        Indeks interval atas entry {"source", "text", "start", "end", "timestamp"}
+
+        Entry diurutkan menurut waktu mulai (speech lebih dulu pada waktu yang sama). Query
+        rentang memakai bisect atas waktu mulai, dimundurkan sejauh durasi entry terpanjang
+        agar entry yang dimulai lebih awal tapi masih berlangsung ikut ditemukan
+        """
+        self._entries = sorted(entries, key=lambda entry: (entry["start"], entry["source"] != "speech"))
+        self._starts = [entry["start"] for entry in self._entries]
+        self._max_span = max((entry["end"] - entry["start"] for entry in self._entries), default=0.0)
+        self.stats = {"ocr_repeated": 0, "ocr_spoken": 0}
+
+    @classmethod
+    def from_sources(cls, speech_data: list, ocr_data: list, ocr_interval: float = None,
+                     dedup: bool = True) -> "Timeline":
+        """
+        Bangun timeline dari hasil transkripsi dan OCR
+
+        Args:
+            speech_data: Segmen speech ("start"/"end" detik, atau "timestamp" saja)
+            ocr_data: Hasil OCR per frame ("timestamp_seconds" atau "timestamp")
+            ocr_interval: Interval frame OCR (detik); default disimpulkan dari data
+            dedup: Jika False, teks OCR yang mengulang ucapan tetap disimpan (frame berurutan
+                   dengan teks sama tetap digabung)
+        """
+        speech = []
+        for seg in speech_data or []:
+            start = seg.get("start")
+            start = parse_timestamp(seg.get("timestamp")) if start is None else float(start)
+            end = seg.get("end")
+            speech.append({"source": "speech", "text": seg["text"], "start": start,
+                           "end": max(start, float(end)) if end is not None else start,
+                           "timestamp": seg.get("timestamp") or format_timestamp(start)})
+        speech_index = cls(speech)
+
+        frames = sorted(
+            ({"text": item["text"], "timestamp": item.get("timestamp"),
+              "start": float(item["timestamp_seconds"]) if item.get("timestamp_seconds") is not None
+              else parse_timestamp(item.get("timestamp"))}
+             for item in ocr_data or []),
+            key=lambda frame: frame["start"])
+        interval = ocr_interval or _infer_interval([frame["start"] for frame in frames])
+        ocr_spans = cls.merge_frames(frames, interval)
+
+        kept = []
+        spoken_duplicates = 0
+        for span in ocr_spans:
+            if dedup:
+                nearby = speech_index.between(span["start"] - SPEECH_MATCH_TOLERANCE,
+                                              span["end"] + SPEECH_MATCH_TOLERANCE)
+                spoken = set().union(*(_words(entry["text"]) for entry in nearby))
+                if _overlap(_words(span["text"]), spoken) >= OCR_DEDUP_THRESHOLD:
+                    spoken_duplicates += 1
+                    continue
+            kept.append(span)
+
+        timeline = cls(speech + kept)
+        timeline.stats = {"ocr_repeated": len(frames) - len(ocr_spans), "ocr_spoken": spoken_duplicates}
+        return timeline
+
+    @staticmethod
+    def merge_frames(frames: list, interval: float) -> list:
+        """
+        Gabungkan frame OCR berurutan yang teksnya (hampir) sama menjadi satu rentang.
+        Teks terpanjang dari rentang dipakai (hasil OCR frame lain bisa terpotong)
+
+        Args:
+            frames: Frame {"text", "start", "timestamp"} berurutan waktu
+            interval: Interval frame OCR (detik)
+
+        Returns:
+            List entry OCR {"source", "text", "start", "end", "timestamp", "frames"}
+        """
+        spans = []
+        last_text = None
+        for frame in frames:
+            text = " ".join(normalize(frame["text"]).split())
+            if (spans and frame["start"] - spans[-1]["end"] <= interval / 2 and text and last_text
+                    and SequenceMatcher(None, text, last_text).ratio() >= OCR_DEDUP_THRESHOLD):
+                span = spans[-1]
+                span["end"] = frame["start"] + interval
+                span["frames"] += 1
+                if len(frame["text"]) > len(span["text"]):
+                    span["text"] = frame["text"]
+            else:
+                spans.append({"source": "ocr", "text": frame["text"], "start": frame["start"],
+                              "end": frame["start"] + interval, "frames": 1,
+                              "timestamp": frame.get("timestamp") or format_timestamp(frame["start"])})
+            last_text = text
+        return spans
+
+    def between(self, start: float, end: float, source: str = None) -> list:
+        """
+        Entry yang berlangsung (sebagian) dalam rentang [start, end] detik
+
+        Args:
+            source: Hanya entry dari sumber ini ("speech" atau "ocr"), opsional
+        """
+        low = bisect_left(self._starts, start - self._max_span)
+        high = bisect_right(self._starts, end)
+        return [entry for entry in self._entries[low:high]
+                if entry["end"] >= start and (source is None or entry["source"] == source)]
+
+    def items(self, source: str = None) -> list:
+        """Semua entry berurutan waktu (salinan), opsional hanya dari satu sumber"""
+        return [dict(entry) for entry in self._entries if source is None or entry["source"] == source]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.items())
+
+
+if __name__ == "__main__":
+    # Test dengan data dummy: subtitle yang sama dengan ucapan dan teks layar yang bertahan
+    speech = [
+        {"text": "halo semua selamat datang", "start": 0.0, "end": 3.0, "timestamp": "00:00:00"},
+        {"text": "dasar goblok lo", "start": 10.0, "end": 12.0, "timestamp": "00:00:10"},
+    ]
+    ocr = [
+        {"text": "Halo semua, selamat datang", "timestamp": "00:00:00", "timestamp_seconds": 0},
+        {"text": "LIVE STREAMING", "timestamp": "00:00:05", "timestamp_seconds": 5},
+        {"text": "LIVE STREAMING", "timestamp": "00:00:10", "timestamp_seconds": 10},
+        {"text": "LIVE STREAMlNG", "timestamp": "00:00:15", "timestamp_seconds": 15},
+    ]
+    timeline = Timeline.from_sources(speech, ocr)
+    for entry in timeline:
+        print(f"[{entry['timestamp']}] ({entry['source']}) {entry['text']}")
+    print(f"Statistik: {timeline.stats}")
+    print(f"Rentang 00:00:09-00:00:11: {[entry['text'] for entry in timeline.between(9, 11)]}")
@@ -0,0 +1,145 @@
+"""
+Modul pencatatan pemakaian token Groq: usage dari setiap respons (prompt/jawaban/total token)
+dan latency request dikumpulkan per laporan, lalu ringkasannya disimpan per video ke riwayat
+JSON agar konsumsi kuota dan lama stage laporan bisa dipantau
+"""
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+
+# Jumlah laporan terakhir yang disimpan di riwayat
+HISTORY_LIMIT = 500
+
+# Lock bersama untuk semua instance dalam satu proses (read-modify-write file JSON)
+_STORE_LOCK = threading.Lock()
+
+
+class UsageRecorder:
+    def __init__(self):
+        """Pencatat usage request Groq untuk satu laporan (aman dipakai dari banyak task/thread)"""
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.requests = []
+        self.compacted = 0
+
+    def record(self, model: str, prompt_tokens: int = None, completion_tokens: int = None,
+               latency: float = None, estimated_prompt_tokens: int = None, cached: bool = False):
+        """
+        Catat satu request
+
+        Args:
+            model: Model yang menjawab
+            prompt_tokens, completion_tokens: Usage dari respons Groq (None jika tidak ada)
+            latency: Lama request (detik)
+            estimated_prompt_tokens: Perkiraan token prompt sebelum dikirim
+            cached: True jika dijawab dari cache LLM (tidak memakai kuota)
+        """
+        with self._lock:
+            self.requests.append({
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency": latency,
+                "estimated_prompt_tokens": estimated_prompt_tokens,
+                "cached": cached,
+            })
+
+    def record_compaction(self):
+        """Catat prompt yang dipadatkan agar muat context window model"""
+        with self._lock:
+            self.compacted += 1
+
+    def summary(self) -> dict:
+        """
+        Ringkasan usage laporan
+
+        Returns:
+            Dict requests, cached, prompt_tokens, completion_tokens, total_tokens,
+            estimated_prompt_tokens, request_seconds, report_seconds, compacted, models
+        """
+        with self._lock:
+            sent = [request for request in self.requests if not request["cached"]]
+            models = {}
+            for request in sent:
+                stats = models.setdefault(request["model"], {"requests": 0, "total_tokens": 0,
+                                                             "request_seconds": 0.0})
+                stats["requests"] += 1
+                stats["total_tokens"] += (request["prompt_tokens"] or 0) + (request["completion_tokens"] or 0)
+                stats["request_seconds"] += request["latency"] or 0.0
+            prompt_tokens = sum(request["prompt_tokens"] or 0 for request in sent)
+            completion_tokens = sum(request["completion_tokens"] or 0 for request in sent)
+            return {
+                "requests": len(sent),
+                "cached": len(self.requests) - len(sent),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "estimated_prompt_tokens": sum(request["estimated_prompt_tokens"] or 0 for request in sent),
+                "request_seconds": round(sum(request["latency"] or 0.0 for request in sent), 3),
+                "report_seconds": round(time.monotonic() - self._started, 3),
+                "compacted": self.compacted,
+                "models": models,
+            }
+
+
+class UsageHistory:
+    def __init__(self, path: str = None):
+        """
+        Inisialisasi riwayat usage per video (file JSON kecil)
+
+        Args:
+            path: Path file JSON (default: LLM_USAGE_FILE atau downloads/cache/llm_usage.json)
+        """
+        if path is None:
+            downloads_dir = os.getenv("DOWNLOADS_DIR", "downloads")
+            path = os.getenv("LLM_USAGE_FILE", os.path.join(downloads_dir, "cache", "llm_usage.json"))
+        self.path = path
+
+    def load(self) -> list:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return []
+
+    def record(self, entry: dict):
+        """Simpan usage satu laporan (ringkasan UsageRecorder + judul/URL video)"""
+        with _STORE_LOCK:
+            entries = self.load()
+            entries.append({**entry, "recorded_at": time.time()})
+            entries = entries[-HISTORY_LIMIT:]
+            Path(os.path.dirname(self.path) or ".").mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.path}.tmp{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def print_usage(summary: dict):
+    """Tampilkan ringkasan usage satu laporan"""
+    if summary["requests"]:
+        estimate = summary["estimated_prompt_tokens"]
+        accuracy = f", perkiraan prompt {estimate}" if estimate else ""
+        print(f"   📈 Token Groq: {summary['prompt_tokens']} prompt + {summary['completion_tokens']} jawaban "
+              f"= {summary['total_tokens']} ({summary['requests']} request, "
+              f"{summary['request_seconds']:.1f} detik{accuracy})")
+    if summary["cached"]:
+        print(f"   💾 {summary['cached']} respons diambil dari cache LLM")
+    if summary["compacted"]:
+        print(f"   🗜️  {summary['compacted']} prompt dipadatkan agar muat context window model")
+
+
+if __name__ == "__main__":
+    # Tampilkan usage laporan terakhir yang tercatat
+    entries = UsageHistory().load()
+    if not entries:
+        print("Belum ada riwayat usage")
+    for entry in entries[-20:]:
+        recorded = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["recorded_at"]))
+        print(f"{recorded} {entry.get('title') or '-'}: {entry['total_tokens']} token, "
+              f"{entry['requests']} request, {entry['report_seconds']:.1f} detik")
@@ -5,9 +5,121 @@ import os
 import yt_dlp
 from pathlib import Path
 import time
+import copy
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from download_cache import DownloadCache
+from strategy_memory import StrategyMemory, classify_error, backoff_delay, host_key
+from cancellation import CancellationToken, JobCancelled
 
 
-def download_video(video_url: str, output_dir: str = "downloads", max_retries: int = 3) -> str:
+# Stream audio kecil untuk transkripsi (Whisper resample ke 16kHz mono, bitrate tinggi tidak perlu)
+AUDIO_STREAM_FORMATS = ['bestaudio[abr<=96]/bestaudio', 'best']
+
+# Stream audio untuk mode progresif: WebM/Opus bisa didecode selagi file masih bertambah
+AUDIO_PROGRESSIVE_FORMATS = ['bestaudio[ext=webm][abr<=96]/bestaudio[ext=webm]/bestaudio', 'best']
+
+# Resolusi default stream video untuk OCR jika rencana pipeline tidak tersedia
+DEFAULT_OCR_HEIGHT = 480
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def build_ydl_opts(client_list: list = None, format_choice: str = None, outtmpl: str = None) -> dict:
+    """
+    Buat konfigurasi yt-dlp dengan timeout lebih panjang dan anti-bot detection
+    
+    Args:
+        client_list: Daftar player client YouTube (mis. ['android'])
+        format_choice: Format selector yt-dlp (opsional)
+        outtmpl: Template nama file output (opsional)
+        
+    Returns:
+        Dict opsi untuk yt_dlp.YoutubeDL
+    """
+    ydl_opts = {
+        'quiet': False,
+        'no_warnings': False,
+        'socket_timeout': 60,  # Timeout 60 detik
+        'retries': 3,  # Retry 3 kali per format
+        'fragment_retries': 3,  # Retry untuk fragment
+        # Download fragment DASH/HLS secara paralel
+        'concurrent_fragment_downloads': int(os.getenv("YTDLP_CONCURRENT_FRAGMENTS", "4")),
+        # Anti-bot detection options
+        'user_agent': USER_AGENT,
+        'referer': 'https://www.youtube.com/',
+        # Additional options untuk bypass bot detection
+        'http_headers': {
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-us,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        },
+    }
+    if client_list:
+        ydl_opts['extractor_args'] = {
+            'youtube': {
+                'player_client': client_list,  # Gunakan client dari strategy
+            }
+        }
+    if format_choice:
+        ydl_opts['format'] = format_choice
+    if outtmpl:
+        ydl_opts['outtmpl'] = outtmpl
+    return ydl_opts
+
+
+class DownloadProgress:
+    """Progress hook yt-dlp yang mencatat seberapa jauh file sedang ditulis"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tmpfilename = None
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        self.fragment_index = None
+        self.fragment_count = None
+        self.finished = False
+    
+    def __call__(self, status: dict):
+        with self._lock:
+            if status.get("tmpfilename") or status.get("filename"):
+                self.tmpfilename = status.get("tmpfilename") or status.get("filename")
+            self.downloaded_bytes = status.get("downloaded_bytes") or self.downloaded_bytes
+            self.total_bytes = status.get("total_bytes") or status.get("total_bytes_estimate") or self.total_bytes
+            self.fragment_index = status.get("fragment_index", self.fragment_index)
+            self.fragment_count = status.get("fragment_count", self.fragment_count)
+            if status.get("status") == "finished":
+                self.finished = True
+    
+    def fraction(self) -> float:
+        """Perkiraan bagian file (0.0-1.0) yang sudah tertulis"""
+        with self._lock:
+            if self.finished:
+                return 1.0
+            if self.fragment_index and self.fragment_count:
+                return min(1.0, self.fragment_index / self.fragment_count)
+            if self.total_bytes:
+                return min(1.0, self.downloaded_bytes / self.total_bytes)
+            return 0.0
+
+
+@contextlib.contextmanager
+def _open_ydl(ydl_opts: dict, session_pool=None):
+    """Buka YoutubeDL baru, atau pinjam dari session pool agar koneksi HTTP dipakai ulang"""
+    if session_pool is None:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            yield ydl
+    else:
+        yield session_pool.get(ydl_opts)
+
+
+def download_video(video_url: str, output_dir: str = "downloads", max_retries: int = 3,
+                   use_cache: bool = True, video_info: dict = None, formats: list = None,
+                   session_pool=None, progress_hooks: list = None,
+                   token: CancellationToken = None) -> str:
     """
     Download video dari URL menggunakan yt-dlp dengan retry mechanism
     
@@ -15,6 +127,17 @@ def download_video(video_url: str, output_dir: str = "downloads", max_retries: i
         video_url: URL video (YouTube, dll)
         output_dir: Direktori untuk menyimpan video
         max_retries: Jumlah maksimal retry jika download gagal
+        use_cache: Jika True, pakai cache download berbasis extractor + ID video
+        video_info: Metadata bersama dari plan_pipeline() (opsional). Format dari
+                    rencana dicoba lebih dulu dan metadata hasil prefetch dipakai
+                    ulang agar tidak perlu ekstraksi ulang
+        formats: Daftar format selector yt-dlp (urutan prioritas) untuk menggantikan
+                 format default, mis. stream audio saja
+        session_pool: SessionPool dari download_scheduler (opsional) untuk memakai
+                      ulang instance YoutubeDL dan koneksi HTTP antar download
+        progress_hooks: Progress hook yt-dlp tambahan (mis. DownloadProgress untuk mode progresif)
+        token: CancellationToken (opsional). Dicek di setiap progress hook yt-dlp, sehingga
+               download yang sedang berjalan berhenti saat token dibatalkan
         
     Returns:
         Path ke file video yang didownload
@@ -28,6 +151,22 @@ def download_video(video_url: str, output_dir: str = "downloads", max_retries: i
         'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',  # Format terbaik
     ]
     
+    # Format dari rencana pipeline dicoba lebih dulu
+    plan = (video_info or {}).get("plan") or {}
+    if formats:
+        format_options = list(formats)
+    elif plan.get("format"):
+        format_options.insert(0, plan["format"])
+    prefetched_info = (video_info or {}).get("_info")
+    
+    # Cek cache dulu: URL yang sama (atau variannya) tidak perlu didownload ulang
+    cache = DownloadCache(os.getenv("DOWNLOAD_CACHE_DIR", os.path.join(output_dir, "cache"))) if use_cache else None
+    if cache:
+        cached_path = cache.lookup(video_url, format_options)
+        if cached_path:
+            print(f"⚡ Video ditemukan di cache: {cached_path}")
+            return cached_path
+    
     # Strategy untuk bypass bot detection: coba dengan client yang berbeda
     client_strategies = [
         ['android'],  # Strategy 1: Android client (paling stabil)
@@ -36,107 +175,154 @@ def download_video(video_url: str, output_dir: str = "downloads", max_retries: i
         ['android', 'ios'],  # Strategy 4: Coba android dulu, lalu ios
     ]
     
-    for attempt in range(max_retries):
-        for strategy_idx, client_list in enumerate(client_strategies):
-            for format_choice in format_options:
-                # Konfigurasi yt-dlp dengan timeout lebih panjang dan anti-bot detection
-                ydl_opts = {
-                    'format': format_choice,
-                    'outtmpl': os.path.join(output_dir, '%(title)s.%(ext)s'),
-                    'quiet': False,
-                    'no_warnings': False,
-                    'socket_timeout': 60,  # Timeout 60 detik
-                    'retries': 3,  # Retry 3 kali per format
-                    'fragment_retries': 3,  # Retry untuk fragment
-                    # Anti-bot detection options
-                    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'referer': 'https://www.youtube.com/',
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': client_list,  # Gunakan client dari strategy
-                        }
-                    },
-                    # Additional options untuk bypass bot detection
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-us,en;q=0.5',
-                        'Accept-Encoding': 'gzip, deflate',
-                        'Connection': 'keep-alive',
-                    },
-                }
+    # Urutkan kombinasi (client, format) berdasarkan strategi yang terakhir berhasil untuk host ini
+    memory = StrategyMemory()
+    host = host_key(video_url)
+    candidates = memory.rank(host, [
+        (client_list, format_choice)
+        for client_list in client_strategies
+        for format_choice in format_options
+    ])
+    
+    # Exception dari progress hook menghentikan download yt-dlp yang sedang berjalan
+    token = token or CancellationToken()
+    hooks = list(progress_hooks or []) + [lambda status: token.check()]
+    
+    candidate_idx = 0
+    transient_failures = 0
+    last_error = None
+    while candidate_idx < len(candidates):
+        token.check()
+        client_list, format_choice = candidates[candidate_idx]
+        # Nama file berdasarkan extractor + ID agar video dengan judul sama tidak saling timpa
+        outtmpl = cache.output_template(format_choice) if cache else os.path.join(output_dir, '%(extractor_key)s-%(id)s.%(ext)s')
+        ydl_opts = build_ydl_opts(client_list, format_choice, outtmpl)
+        ydl_opts['progress_hooks'] = hooks
+        if progress_hooks:
+            ydl_opts['hls_use_mpegts'] = True  # Segmen HLS ditulis sebagai MPEG-TS yang bisa dibaca sebagian
+        
+        try:
+            started_at = time.time()
+            with _open_ydl(ydl_opts, session_pool) as ydl:
+                if candidate_idx > 0 or transient_failures > 0:
+                    print(f"   Retry dengan strategy {candidate_idx + 1}/{len(candidates)} (client: {','.join(client_list)})...")
+                
+                print(f"📥 Downloading video dari: {video_url}")
+                # Download video (pakai metadata hasil prefetch untuk percobaan pertama)
+                if prefetched_info and candidate_idx == 0 and transient_failures == 0 and format_choice == format_options[0]:
+                    info = ydl.process_ie_result(copy.deepcopy(prefetched_info), download=True)
+                else:
+                    info = ydl.extract_info(video_url, download=True)
+                video_filename = ydl.prepare_filename(info)
+            
+            # Jika file tidak ada, coba cari dengan ekstensi yang berbeda
+            if not os.path.exists(video_filename):
+                # Cari file dengan nama yang sama tapi ekstensi berbeda
+                base_name = os.path.splitext(video_filename)[0]
+                for ext in ['.mp4', '.webm', '.mkv', '.m4a']:
+                    potential_file = base_name + ext
+                    if os.path.exists(potential_file):
+                        video_filename = potential_file
+                        break
+            
+            # Verifikasi file benar-benar ada dan tidak kosong
+            if os.path.exists(video_filename) and os.path.getsize(video_filename) > 0:
+                memory.record_success(host, client_list, format_choice, time.time() - started_at)
+                if cache:
+                    video_filename = cache.store(video_url, info, video_filename, format_choice)
+                print(f"✅ Video berhasil didownload: {video_filename}")
+                return video_filename
+            else:
+                raise Exception("File video tidak ditemukan atau kosong")
+                
+        except Exception as e:
+            if token.cancelled or isinstance(e, JobCancelled):
+                # Dibatalkan, bukan kegagalan strategy: jangan dicatat di memori strategy
+                token.check()
+                raise
+            error_msg = str(e)
+            last_error = e
+            kind = classify_error(error_msg)
+            memory.record_failure(host, client_list, format_choice, kind)
+            
+            # Error permanen (video private/dihapus/dll): tidak ada gunanya retry
+            if kind == "permanent":
+                print(f"❌ Video tidak bisa didownload: {error_msg[:200]}...")
+                raise
+            
+            # Error format atau bot detection: langsung coba strategy berikutnya
+            if kind in ("format", "bot"):
+                if kind == "bot":
+                    print(f"⚠️  Bot detection terdeteksi, coba strategy lain...")
+                candidate_idx += 1
+                continue
+            
+            # Error sementara (timeout, 429, 5xx): backoff lalu retry strategy yang sama
+            transient_failures += 1
+            if transient_failures < max_retries:
+                delay = backoff_delay(transient_failures)
+                print(f"⚠️  Error sementara (attempt {transient_failures}/{max_retries}): {error_msg[:200]}...")
+                print(f"   Retry dalam {delay:.1f} detik...")
+                token.sleep(delay)
+                continue
             
-                try:
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        if attempt > 0 or strategy_idx > 0:
-                            print(f"   Retry attempt {attempt + 1}/{max_retries} (strategy {strategy_idx + 1}/{len(client_strategies)})...")
-                        
-                        print(f"📥 Downloading video dari: {video_url}")
-                        # Download video
-                        info = ydl.extract_info(video_url, download=True)
-                        video_filename = ydl.prepare_filename(info)
-                    
-                    # Jika file tidak ada, coba cari dengan ekstensi yang berbeda
-                    if not os.path.exists(video_filename):
-                        # Cari file dengan nama yang sama tapi ekstensi berbeda
-                        base_name = os.path.splitext(video_filename)[0]
-                        for ext in ['.mp4', '.webm', '.mkv', '.m4a']:
-                            potential_file = base_name + ext
-                            if os.path.exists(potential_file):
-                                video_filename = potential_file
-                                break
-                    
-                    # Verifikasi file benar-benar ada dan tidak kosong
-                    if os.path.exists(video_filename) and os.path.getsize(video_filename) > 0:
-                        print(f"✅ Video berhasil didownload: {video_filename}")
-                        return video_filename
-                    else:
-                        raise Exception("File video tidak ditemukan atau kosong")
-                            
-                except Exception as e:
-                    error_msg = str(e)
-                    
-                    # Skip jika error format (coba format lain)
-                    if "format" in error_msg.lower() or "requested format" in error_msg.lower():
-                        continue  # Coba format berikutnya
-                    
-                    # Skip jika error bot detection tapi masih ada strategy lain
-                    if ("bot" in error_msg.lower() or "sign in" in error_msg.lower() or "cookies" in error_msg.lower()):
-                        if strategy_idx < len(client_strategies) - 1:
-                            print(f"⚠️  Bot detection terdeteksi, coba strategy lain...")
-                            time.sleep(3)  # Delay singkat sebelum coba strategy lain
-                            continue  # Coba strategy berikutnya
-                    
-                    # Jika bukan error terakhir, coba lagi
-                    if attempt < max_retries - 1:
-                        if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                            print(f"⚠️  Timeout saat download (attempt {attempt + 1}/{max_retries})")
-                            print(f"   Error: {error_msg[:200]}...")
-                            print(f"   Menunggu 10 detik sebelum retry...")
-                            time.sleep(10)
-                            break  # Break dari format loop, coba attempt berikutnya
-                        else:
-                            print(f"⚠️  Error: {error_msg[:200]}...")
-                            print(f"   Retry dalam 5 detik...")
-                            time.sleep(5)
-                            # Jika sudah semua strategy, baru break
-                            if strategy_idx >= len(client_strategies) - 1:
-                                break
-                            continue
-                    else:
-                        # Semua retry gagal
-                        print(f"❌ Error saat download video setelah {max_retries} attempts: {error_msg[:200]}...")
-                        print("\n💡 Solusi:")
-                        print("   1. Cek koneksi internet Anda")
-                        print("   2. Coba lagi nanti (mungkin server YouTube sibuk)")
-                        print("   3. Coba dengan video lain")
-                        print("   4. Update yt-dlp: pip install --upgrade yt-dlp")
-                        print("   5. Atau download manual dengan yt-dlp:")
-                        print(f"      yt-dlp '{video_url}' -o 'downloads/%(title)s.%(ext)s'")
-                        raise
+            # Semua retry gagal
+            print(f"❌ Error saat download video setelah {max_retries} attempts: {error_msg[:200]}...")
+            print("\n💡 Solusi:")
+            print("   1. Cek koneksi internet Anda")
+            print("   2. Coba lagi nanti (mungkin server YouTube sibuk)")
+            print("   3. Coba dengan video lain")
+            print("   4. Update yt-dlp: pip install --upgrade yt-dlp")
+            print("   5. Atau download manual dengan yt-dlp:")
+            print(f"      yt-dlp '{video_url}' -o 'downloads/%(title)s.%(ext)s'")
+            raise
+    
+    # Fallback: semua strategy sudah dicoba
+    raise Exception(f"Gagal download video dengan semua strategy: {str(last_error)[:200]}")
+
+
+def download_streams(video_url: str, output_dir: str = "downloads", video_info: dict = None,
+                     progressive: bool = False, token: CancellationToken = None) -> dict:
+    """
+    Download stream audio-only dan stream video-only resolusi rendah secara paralel
+    tanpa di-mux, sehingga transkripsi bisa dimulai begitu audio selesai
+    
+    Args:
+        video_url: URL video
+        output_dir: Direktori untuk menyimpan file
+        video_info: Metadata bersama dari plan_pipeline() (opsional)
+        progressive: Jika True, stream audio dipilih yang bisa dibaca selagi didownload
+                     dan progress-nya dilacak (lihat progressive.py)
+        token: CancellationToken (opsional) untuk menghentikan kedua download
+        
+    Returns:
+        Dict berisi Future untuk masing-masing stream:
+        {"audio": Future[str], "video": Future[str] atau None jika OCR nonaktif,
+         "audio_progress": DownloadProgress}
+    """
+    plan = (video_info or {}).get("plan") or {}
+    height = plan.get("video_height") or DEFAULT_OCR_HEIGHT
+    video_formats = [f'bestvideo[height<={height}]', f'best[height<={height}]/best']
     
-    # Fallback: jika semua gagal
-    raise Exception(f"Gagal download video setelah {max_retries} attempts")
+    # Salinan metadata per stream agar thread tidak berbagi dict yang sama
+    audio_progress = DownloadProgress()
+    audio_formats = AUDIO_PROGRESSIVE_FORMATS if progressive else AUDIO_STREAM_FORMATS
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stream-download")
+    streams = {
+        "audio_progress": audio_progress,
+        "audio": executor.submit(download_video, video_url, output_dir,
+                                 video_info=dict(video_info or {}), formats=audio_formats,
+                                 progress_hooks=[audio_progress] if progressive else None, token=token),
+    }
+    # Stream video hanya dibutuhkan untuk OCR
+    streams["video"] = executor.submit(download_video, video_url, output_dir,
+                                       video_info=dict(video_info or {}), formats=video_formats, token=token) \
+        if plan.get("enable_ocr", True) else None
+    # Thread tetap berjalan, executor tidak menerima task baru
+    executor.shutdown(wait=False)
+    if streams["video"] is not None:
+        print(f"📥 Download paralel: stream audio + stream video {height}p (tanpa mux)")
+    return streams
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+"""
+Proses worker antrian job: mengambil job dari JobQueue (SQLite) dan menjalankan analyze_video
+di luar proses Streamlit. Dengan --shared-dir, worker mengambil job dari direktori bersama
+(LeaseQueue) sehingga beberapa mesin bisa berbagi antrian lewat NFS.
+Job yang dibatalkan dari UI dihentikan lewat CancellationToken; jika analisis tidak berhenti
+dalam CANCEL_GRACE_SECONDS, proses worker keluar paksa dan dijalankan ulang oleh proses induk
+"""
+import os
+import sys
+import time
+import uuid
+import socket
+import threading
+import contextlib
+import multiprocessing
+from pathlib import Path
+from dotenv import load_dotenv
+
+from job_queue import JobQueue
+from lease_queue import LeaseQueue, lease_worker_loop
+from cancellation import CancellationToken, JobCancelled, DeadlineExceeded
+
+# Load environment variables
+load_dotenv()
+
+# Interval cek permintaan pembatalan dari UI (detik)
+CANCEL_POLL_INTERVAL = 1.0
+
+# Batas waktu analisis berhenti sendiri setelah dibatalkan sebelum worker keluar paksa (detik)
+CANCEL_GRACE_SECONDS = float(os.getenv("CANCEL_GRACE_SECONDS", "20"))
+
+# Exit code proses worker yang keluar paksa setelah pembatalan (dijalankan ulang oleh induk)
+RESTART_EXIT_CODE = 75
+
+
+def _heartbeat_loop(queue: JobQueue, worker_id: str, stop: threading.Event, interval: float):
+    while not stop.wait(interval):
+        try:
+            queue.heartbeat(worker_id)
+        except Exception as e:
+            print(f"⚠️  Heartbeat gagal: {str(e)[:100]}")
+
+
+def _watch_cancel(queue: JobQueue, job_id: str, worker_id: str, token: CancellationToken,
+                  finished: threading.Event):
+    """Batalkan token saat UI meminta pembatalan; keluar paksa jika analisis tidak berhenti"""
+    while not finished.wait(CANCEL_POLL_INTERVAL):
+        try:
+            if queue.cancel_requested(job_id):
+                break
+        except Exception as e:
+            print(f"⚠️  Gagal cek pembatalan: {str(e)[:100]}")
+    else:
+        return
+
+    print(f"⏹️  Job {job_id} dibatalkan, menghentikan analisis...")
+    token.cancel("Dibatalkan dari UI")
+    if finished.wait(CANCEL_GRACE_SECONDS):
+        return
+    # Stage tidak merespon token (mis. tertahan di library): bebaskan worker dengan keluar paksa
+    print(f"⚠️  Job {job_id} tidak berhenti dalam {CANCEL_GRACE_SECONDS:.0f} detik, worker keluar paksa")
+    queue.mark_cancelled(job_id, "Dibatalkan dari UI (worker dihentikan paksa)")
+    queue.unregister_worker(worker_id)
+    os._exit(RESTART_EXIT_CODE)
+
+
+def analyze_job(job: dict, output_dir: str, token: CancellationToken = None) -> dict:
+    """
+    Jalankan analyze_video untuk satu job; output print ditulis ke <output_dir>/log.txt
+
+    Returns:
+        Hasil analyze_video (raise exception jika analisis gagal)
+    """
+    # Import di sini agar proses worker yang idle tidak perlu load Whisper/torch dulu
+    from main import analyze_video
+
+    options = dict(job["options"])
+    if options.get("target_seconds") and job.get("created_at"):
+        # Target dihitung sejak job masuk antrian: waktu tunggu ikut mengurangi sisa target
+        options["target_seconds"] = max(1.0, options["target_seconds"] - (time.time() - job["created_at"]))
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    log_path = os.path.join(output_dir, "log.txt")
+    with open(log_path, "a", encoding="utf-8", buffering=1) as log_file:
+        with contextlib.redirect_stdout(log_file), contextlib.redirect_stderr(log_file):
+            return analyze_video(job["url"], output_dir=output_dir, token=token, **options)
+
+
+def run_job(queue: JobQueue, job: dict, worker_id: str = None):
+    """Jalankan satu job dari JobQueue dan simpan status akhirnya"""
+    output_dir = os.path.join(os.getenv("OUTPUT_DIR", "output"), "jobs", job["id"])
+    queue.set_log_path(job["id"], os.path.join(output_dir, "log.txt"))
+
+    print(f"▶️  Job {job['id']}: {job['url']}")
+    started = time.time()
+    token = CancellationToken(name=f"job {job['id']}")
+    finished = threading.Event()
+    threading.Thread(target=_watch_cancel, args=(queue, job["id"], worker_id, token, finished),
+                     daemon=True).start()
+    try:
+        result = analyze_job(job, output_dir, token)
+    except DeadlineExceeded as e:
+        queue.fail(job["id"], str(e))
+        print(f"⏰ Job {job['id']} melewati deadline setelah {time.time() - started:.0f} detik: {e}")
+        return
+    except JobCancelled as e:
+        queue.mark_cancelled(job["id"], str(e))
+        print(f"⏹️  Job {job['id']} dibatalkan setelah {time.time() - started:.0f} detik")
+        return
+    except Exception as e:
+        queue.fail(job["id"], str(e))
+        print(f"❌ Job {job['id']} gagal setelah {time.time() - started:.0f} detik: {str(e)[:100]}")
+        return
+    finally:
+        finished.set()
+    queue.complete(job["id"], result)
+    print(f"✅ Job {job['id']} selesai dalam {time.time() - started:.0f} detik")
+
+
+def worker_loop(poll_interval: float = 2.0, heartbeat_interval: float = 15.0, max_jobs: int = None):
+    """
+    Loop worker: ambil job, jalankan, ulangi
+
+    Args:
+        poll_interval: Jeda cek antrian saat kosong (detik)
+        heartbeat_interval: Interval heartbeat ke database (detik)
+        max_jobs: Berhenti setelah sekian job (None = jalan terus)
+    """
+    queue = JobQueue()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    queue.register_worker(worker_id)
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat_loop, args=(queue, worker_id, stop, heartbeat_interval),
+                     daemon=True).start()
+    print(f"👷 Worker {worker_id} siap (antrian: {queue.db_path})")
+
+    processed = 0
+    try:
+        while max_jobs is None or processed < max_jobs:
+            requeued = queue.requeue_stale()
+            if requeued:
+                print(f"♻️  {requeued} job dari worker mati dikembalikan ke antrian")
+            job = queue.claim(worker_id)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            run_job(queue, job, worker_id)
+            processed += 1
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Worker {worker_id} dihentikan")
+    finally:
+        stop.set()
+        queue.unregister_worker(worker_id)
+
+
+def shared_worker_loop(shared_dir: str, poll_interval: float = 2.0):
+    """
+    Loop worker multi-node: job diambil dari direktori bersama dengan lease file
+
+    Checkpoint stage dan laporan juga disimpan di direktori bersama, sehingga job dari node
+    yang mati dilanjutkan node lain dari stage terakhir yang selesai.
+    """
+    queue = LeaseQueue(shared_dir)
+    os.environ.setdefault("CHECKPOINT_DIR", os.path.join(shared_dir, "checkpoints"))
+
+    def handler(job, token):
+        return analyze_job(job, os.path.join(shared_dir, "output", job["id"]), token)
+
+    print(f"👷 Worker multi-node siap (direktori bersama: {shared_dir})")
+    try:
+        lease_worker_loop(queue, handler, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        print("\n⏹️  Worker dihentikan (lease akan kedaluwarsa dan job diambil node lain)")
+
+
+def main():
+    """Main function"""
+    processes = int(os.getenv("JOB_WORKERS", "1"))
+    if "--processes" in sys.argv:
+        processes = int(sys.argv[sys.argv.index("--processes") + 1])
+
+    target, args = worker_loop, ()
+    shared_dir = os.getenv("SHARED_QUEUE_DIR")
+    if "--shared-dir" in sys.argv:
+        shared_dir = sys.argv[sys.argv.index("--shared-dir") + 1]
+    if shared_dir:
+        target, args = shared_worker_loop, (shared_dir,)
+
+    # Satu job per proses: model Whisper dan memori tiap analisis terisolasi. Proses induk
+    # menjalankan ulang worker yang keluar paksa setelah pembatalan job
+    def spawn(idx):
+        child = multiprocessing.Process(target=target, args=args, name=f"worker-{idx}")
+        child.start()
+        return child
+
+    children = {idx: spawn(idx) for idx in range(max(1, processes))}
+    try:
+        while children:
+            for idx, child in list(children.items()):
+                child.join(timeout=1)
+                if child.is_alive():
+                    continue
+                if child.exitcode == RESTART_EXIT_CODE:
+                    print(f"♻️  Worker {idx} dijalankan ulang setelah pembatalan job")
+                    children[idx] = spawn(idx)
+                else:
+                    del children[idx]
+    except KeyboardInterrupt:
+        for child in children.values():
+            child.join()
+
+
+if __name__ == "__main__":
+    main()